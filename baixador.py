@@ -0,0 +1,258 @@
+"""
+Download em Lote via HTTP
+=========================
+
+Módulo utilitário usado pelos scripts de coleta (images.py e sons.py) para baixar muitos
+arquivos de forma concorrente e retomável.
+
+Funcionalidades principais:
+- requests.Session compartilhada com pool de conexões (keep-alive)
+- Pool de threads limitado, com limite de concorrência e intervalo mínimo por host
+- Páginas HTML (ex.: página de cada som) buscadas com os mesmos limites por host e novas tentativas
+- Novas tentativas com backoff exponencial (respeita Retry-After em 429/503)
+- Retomada de execuções interrompidas a partir de um manifesto JSON
+- Retomada de arquivos parciais com cabeçalho Range quando o servidor suporta
+- Deduplicação por hash SHA-256 do conteúdo
+- Verificação do tamanho recebido contra o Content-Length
+- Verificação opcional do arquivo concluído (ex.: assinatura do formato)
+
+Nota: qualquer URL HTTP funciona, então o baixador pode ser exercitado contra um servidor
+local (python -m http.server) em vez dos sites reais.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+STATUS_REPETIVEIS = {408, 425, 429, 500, 502, 503, 504}
+
+class BaixadorHTTP:
+    def __init__(self, caminho_destino, arquivo_manifesto="manifesto_downloads.json", max_workers=16,
+                 max_por_host=4, intervalo_por_host=0.0, tentativas=4, backoff=0.5, timeout=15,
+                 cabecalhos=None, verificar=None):
+        self.caminho_destino = caminho_destino
+        self.arquivo_manifesto = os.path.join(caminho_destino, arquivo_manifesto)
+        self.max_workers = max_workers
+        self.max_por_host = max_por_host
+        self.intervalo_por_host = intervalo_por_host
+        self.tentativas = tentativas
+        self.backoff = backoff
+        self.timeout = timeout
+        self.verificar = verificar
+
+        self.sessao = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.sessao.mount("http://", adaptador)
+        self.sessao.mount("https://", adaptador)
+        if cabecalhos:
+            self.sessao.headers.update(cabecalhos)
+
+        self._trava = threading.Lock()
+        self._semaforos = {}
+        self._proximo_horario = {}
+        self.manifesto = self._carregar_manifesto()
+        self._hashes = {dados['sha256']: dados['arquivo'] for dados in self.manifesto.values()
+                        if dados.get('status') == 'ok' and dados.get('sha256')}
+
+    def _carregar_manifesto(self):
+        if os.path.exists(self.arquivo_manifesto):
+            try:
+                with open(self.arquivo_manifesto, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Manifesto inválido ({e}), começando do zero")
+        return {}
+
+    def salvar_manifesto(self):
+        with self._trava:
+            conteudo = json.dumps(self.manifesto, indent=1, ensure_ascii=False)
+        temporario = self.arquivo_manifesto + ".tmp"
+        with open(temporario, 'w', encoding='utf-8') as f:
+            f.write(conteudo)
+        os.replace(temporario, self.arquivo_manifesto)
+
+    def _ja_baixado(self, url):
+        dados = self.manifesto.get(url)
+        if not dados:
+            return False
+        if dados.get('status') == 'duplicado':
+            return True
+        return dados.get('status') == 'ok' and os.path.exists(os.path.join(self.caminho_destino, dados['arquivo']))
+
+    def _aguardar_vez(self, host):
+        """Respeita o intervalo mínimo entre requisições ao mesmo host"""
+        if self.intervalo_por_host <= 0:
+            return
+        with self._trava:
+            agora = time.monotonic()
+            horario = max(agora, self._proximo_horario.get(host, agora))
+            self._proximo_horario[host] = horario + self.intervalo_por_host
+        if horario > agora:
+            time.sleep(horario - agora)
+
+    def _semaforo(self, host):
+        with self._trava:
+            if host not in self._semaforos:
+                self._semaforos[host] = threading.BoundedSemaphore(self.max_por_host)
+            return self._semaforos[host]
+
+    def _espera_tentativa(self, tentativa, resposta=None):
+        if resposta is not None:
+            retry_after = resposta.headers.get('Retry-After')
+            if retry_after and retry_after.isdigit():
+                return float(retry_after)
+        return self.backoff * (2 ** tentativa)
+
+    def _transferir(self, url, caminho_parcial):
+        """Baixa url para caminho_parcial, continuando de onde parou se possível. Retorna o hash."""
+        ja_baixados = os.path.getsize(caminho_parcial) if os.path.exists(caminho_parcial) else 0
+        cabecalhos = {'Range': f'bytes={ja_baixados}-'} if ja_baixados else {}
+        resposta = self.sessao.get(url, stream=True, timeout=self.timeout, headers=cabecalhos)
+        try:
+            if resposta.status_code not in (200, 206):
+                return None, resposta
+
+            digest = hashlib.sha256()
+            if resposta.status_code == 206 and ja_baixados:
+                with open(caminho_parcial, 'rb') as f:
+                    for bloco in iter(lambda: f.read(1 << 20), b''):
+                        digest.update(bloco)
+                modo = 'ab'
+            else:
+                modo = 'wb'
+
+            recebidos = 0
+            with open(caminho_parcial, modo) as f:
+                for bloco in resposta.iter_content(1 << 16):
+                    f.write(bloco)
+                    digest.update(bloco)
+                    recebidos += len(bloco)
+
+            # Conexão encerrada antes do fim: o parcial fica para a próxima tentativa (Range)
+            # (com Content-Encoding o tamanho anunciado é o comprimido, então não dá para comparar)
+            esperado = resposta.headers.get('Content-Length')
+            comprimido = 'Content-Encoding' in resposta.headers
+            if not comprimido and esperado is not None and esperado.isdigit() and recebidos != int(esperado):
+                raise requests.ConnectionError(f"recebidos {recebidos} de {esperado} bytes")
+            return digest.hexdigest(), resposta
+        finally:
+            resposta.close()
+
+    def obter_texto(self, url):
+        """
+        Busca o conteúdo de uma página respeitando o limite de concorrência e o intervalo do
+        host, com novas tentativas como em baixar_um. Retorna o texto ou None.
+        """
+        host = urlsplit(url).netloc
+        for tentativa in range(self.tentativas):
+            with self._semaforo(host):
+                self._aguardar_vez(host)
+                resposta = None
+                try:
+                    resposta = self.sessao.get(url, timeout=self.timeout)
+                    if resposta.status_code == 200:
+                        return resposta.text
+                    if resposta.status_code not in STATUS_REPETIVEIS:
+                        print(f"Erro ao abrir {url}: status {resposta.status_code}")
+                        return None
+                except requests.RequestException as e:
+                    print(f"Erro ao abrir {url}: {e}")
+            if tentativa < self.tentativas - 1:
+                time.sleep(self._espera_tentativa(tentativa, resposta))
+        return None
+
+    def obter_textos(self, urls):
+        """obter_texto para várias URLs em paralelo, na ordem recebida"""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(self.obter_texto, urls))
+
+    def baixar_um(self, url, nome_arquivo):
+        """Baixa um arquivo com novas tentativas e registra o resultado no manifesto"""
+        host = urlsplit(url).netloc
+        caminho_final = os.path.join(self.caminho_destino, nome_arquivo)
+        caminho_parcial = caminho_final + ".parte"
+        registro = {'arquivo': nome_arquivo, 'status': 'erro'}
+
+        for tentativa in range(self.tentativas):
+            # A vaga do host só fica ocupada durante a transferência, não durante o backoff
+            with self._semaforo(host):
+                self._aguardar_vez(host)
+                resposta = None
+                try:
+                    sha256, resposta = self._transferir(url, caminho_parcial)
+                except (requests.RequestException, OSError) as e:
+                    registro['erro'] = str(e)
+                else:
+                    if sha256 is not None:
+                        break
+                    registro['erro'] = f"status {resposta.status_code}"
+                    if resposta.status_code == 416 and os.path.exists(caminho_parcial):
+                        # Range inválido: o parcial não serve, recomeçar do zero
+                        os.remove(caminho_parcial)
+                    elif resposta.status_code not in STATUS_REPETIVEIS:
+                        sha256 = None
+                        break
+            if tentativa < self.tentativas - 1:
+                time.sleep(self._espera_tentativa(tentativa, resposta))
+        else:
+            sha256 = None
+
+        if sha256 is None:
+            with self._trava:
+                self.manifesto[url] = registro
+            return registro
+
+        if self.verificar is not None and not self.verificar(caminho_parcial):
+            os.remove(caminho_parcial)
+            registro['erro'] = "arquivo inválido"
+            with self._trava:
+                self.manifesto[url] = registro
+            return registro
+
+        with self._trava:
+            original = self._hashes.get(sha256)
+            if original is None:
+                self._hashes[sha256] = nome_arquivo
+        if original is not None and original != nome_arquivo:
+            os.remove(caminho_parcial)
+            registro = {'arquivo': nome_arquivo, 'status': 'duplicado', 'duplicado_de': original, 'sha256': sha256}
+        else:
+            os.replace(caminho_parcial, caminho_final)
+            registro = {'arquivo': nome_arquivo, 'status': 'ok', 'sha256': sha256,
+                        'bytes': os.path.getsize(caminho_final)}
+
+        with self._trava:
+            self.manifesto[url] = registro
+        return registro
+
+    def baixar(self, itens, salvar_a_cada=50):
+        """
+        Baixa uma lista de (url, nome_arquivo). Itens já concluídos em execuções anteriores
+        são pulados. Retorna um resumo com a contagem de cada status.
+        """
+        os.makedirs(self.caminho_destino, exist_ok=True)
+        pendentes = [(url, nome) for url, nome in itens if not self._ja_baixado(url)]
+        resumo = {'pulados': len(itens) - len(pendentes), 'ok': 0, 'duplicado': 0, 'erro': 0}
+        print(f"Baixando {len(pendentes)} arquivos ({resumo['pulados']} já concluídos)")
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futuros = [executor.submit(self.baixar_um, url, nome) for url, nome in pendentes]
+            for i, futuro in enumerate(as_completed(futuros), 1):
+                registro = futuro.result()
+                resumo[registro['status']] += 1
+                if registro['status'] == 'erro':
+                    print(f"Falha ao baixar {registro['arquivo']}: {registro.get('erro')}")
+                if i % salvar_a_cada == 0:
+                    self.salvar_manifesto()
+        self.salvar_manifesto()
+
+        resumo['segundos'] = time.perf_counter() - inicio
+        return resumo
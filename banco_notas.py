@@ -0,0 +1,286 @@
+"""
+Banco de Notas Compartilhado
+============================
+
+Banco SQLite local que guarda as notas de todas as sessões e de todas as pessoas, em vez
+do dicionario_notas de cada processo, que some ao final da execução. Várias sessões (em
+threads ou processos diferentes) podem gravar ao mesmo tempo.
+
+Funcionalidades principais:
+- Modo WAL com busy_timeout: leitores não bloqueiam o escritor e escritas concorrentes esperam
+  a vez em vez de falhar
+- Gravação em lotes, uma transação por lote
+- Agregados por par (quantidade, soma, soma dos quadrados, pulos e nota bayesiana) mantidos
+  por um gatilho a cada nota inserida, sem recalcular nada
+- Nota bayesiana: (peso * média a priori + soma) / (peso + quantidade), que puxa pares com
+  poucas notas para a média a priori
+- Índice pela nota bayesiana para o top-k global e chave primária (imagem, áudio) para saber
+  se um par já foi avaliado
+- Escritor com buffer para a interface, que grava a cada N notas ou a cada poucos segundos
+
+Os pares são gravados pelo nome dos arquivos, então o banco continua válido depois de
+mudanças no catálogo.
+
+Uso:
+    python banco_notas.py --top 10
+    python banco_notas.py --benchmark
+"""
+
+import argparse
+import os
+import sqlite3
+import threading
+import time
+
+ARQUIVO_BANCO = "notas.db"
+MEDIA_PRIOR = 5.5
+PESO_PRIOR = 3.0
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS prior (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    media REAL NOT NULL,
+    peso REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS notas (
+    id INTEGER PRIMARY KEY,
+    imagem TEXT NOT NULL,
+    audio TEXT NOT NULL,
+    nota REAL,
+    sessao TEXT,
+    avaliador TEXT,
+    instante REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pares (
+    imagem TEXT NOT NULL,
+    audio TEXT NOT NULL,
+    quantidade INTEGER NOT NULL,
+    soma REAL NOT NULL,
+    soma_quadrados REAL NOT NULL,
+    puladas INTEGER NOT NULL,
+    escore REAL NOT NULL,
+    PRIMARY KEY (imagem, audio)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS pares_escore ON pares (escore DESC);
+CREATE TRIGGER IF NOT EXISTS notas_agregar AFTER INSERT ON notas BEGIN
+    INSERT INTO pares (imagem, audio, quantidade, soma, soma_quadrados, puladas, escore)
+    VALUES (NEW.imagem, NEW.audio, NEW.nota IS NOT NULL, coalesce(NEW.nota, 0), coalesce(NEW.nota * NEW.nota, 0),
+            NEW.nota IS NULL,
+            ((SELECT peso * media FROM prior) + coalesce(NEW.nota, 0)) / ((SELECT peso FROM prior) + (NEW.nota IS NOT NULL)))
+    ON CONFLICT (imagem, audio) DO UPDATE SET
+        quantidade = quantidade + excluded.quantidade,
+        soma = soma + excluded.soma,
+        soma_quadrados = soma_quadrados + excluded.soma_quadrados,
+        puladas = puladas + excluded.puladas,
+        escore = ((SELECT peso * media FROM prior) + soma + excluded.soma)
+                 / ((SELECT peso FROM prior) + quantidade + excluded.quantidade);
+END;
+"""
+
+class BancoNotas:
+    """
+    Acesso ao banco; cada thread usa a sua própria conexão. Pode ser criado em vários
+    processos apontando para o mesmo arquivo.
+    """
+
+    def __init__(self, caminho=ARQUIVO_BANCO, media_prior=MEDIA_PRIOR, peso_prior=PESO_PRIOR):
+        self.caminho = caminho
+        self._local = threading.local()
+        conexao = self._conexao()
+        with conexao:
+            conexao.executescript(_ESQUEMA)
+            # A priori é do banco, não do processo: o primeiro a criar o banco define
+            conexao.execute("INSERT OR IGNORE INTO prior (id, media, peso) VALUES (1, ?, ?)", (media_prior, peso_prior))
+
+    def _conexao(self):
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is None:
+            conexao = sqlite3.connect(self.caminho, timeout=30, isolation_level=None, check_same_thread=False)
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute("PRAGMA synchronous=NORMAL")
+            conexao.execute("PRAGMA busy_timeout=30000")
+            self._local.conexao = conexao
+        return conexao
+
+    def fechar(self):
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is not None:
+            conexao.close()
+            self._local.conexao = None
+
+    def registrar_lote(self, avaliacoes, sessao=None, avaliador=None):
+        """
+        Grava uma lista de (imagem, audio, nota) em uma única transação; nota None é um pulo.
+        BEGIN IMMEDIATE reserva a escrita logo no início, então lotes concorrentes esperam
+        em vez de falhar no meio.
+        """
+        if not avaliacoes:
+            return 0
+        agora = time.time()
+        conexao = self._conexao()
+        conexao.execute("BEGIN IMMEDIATE")
+        try:
+            conexao.executemany(
+                "INSERT INTO notas (imagem, audio, nota, sessao, avaliador, instante) VALUES (?, ?, ?, ?, ?, ?)",
+                [(str(imagem), str(audio), None if nota is None else float(nota), sessao, avaliador, agora)
+                 for imagem, audio, nota in avaliacoes])
+            conexao.execute("COMMIT")
+        except BaseException:
+            conexao.execute("ROLLBACK")
+            raise
+        return len(avaliacoes)
+
+    def registrar(self, imagem, audio, nota, sessao=None, avaliador=None):
+        return self.registrar_lote([(imagem, audio, nota)], sessao, avaliador)
+
+    def avaliado(self, imagem, audio):
+        """True se o par já foi mostrado a alguém (com nota ou pulado)"""
+        return self._conexao().execute(
+            "SELECT 1 FROM pares WHERE imagem = ? AND audio = ?", (str(imagem), str(audio))).fetchone() is not None
+
+    def par(self, imagem, audio):
+        """Agregados de um par: quantidade, media, desvio, puladas e escore; None se nunca avaliado"""
+        linha = self._conexao().execute(
+            "SELECT quantidade, soma, soma_quadrados, puladas, escore FROM pares WHERE imagem = ? AND audio = ?",
+            (str(imagem), str(audio))).fetchone()
+        if linha is None:
+            return None
+        quantidade, soma, soma_quadrados, puladas, escore = linha
+        media = soma / quantidade if quantidade else None
+        variancia = max(soma_quadrados / quantidade - media * media, 0.0) if quantidade else None
+        return {'quantidade': quantidade, 'media': media, 'desvio': None if variancia is None else variancia ** 0.5,
+                'puladas': puladas, 'escore': escore}
+
+    def top_k(self, k=10, minimo_notas=1):
+        """Os k pares com maior nota bayesiana: lista de (imagem, audio, escore, quantidade, media)"""
+        return [(imagem, audio, escore, quantidade, soma / quantidade) for imagem, audio, escore, quantidade, soma in
+                self._conexao().execute(
+                    "SELECT imagem, audio, escore, quantidade, soma FROM pares "
+                    "WHERE quantidade >= ? ORDER BY escore DESC LIMIT ?", (max(minimo_notas, 1), k))]
+
+    def medias(self):
+        """Dicionário {(imagem, audio): média} de todos os pares com nota"""
+        return {(imagem, audio): soma / quantidade for imagem, audio, soma, quantidade in
+                self._conexao().execute("SELECT imagem, audio, soma, quantidade FROM pares WHERE quantidade > 0")}
+
+    def atualizar_prior(self, media=None, peso=None):
+        """
+        Troca a média a priori (por padrão, a média global atual das notas) e recalcula o
+        escore de todos os pares em uma única instrução.
+        """
+        conexao = self._conexao()
+        conexao.execute("BEGIN IMMEDIATE")
+        try:
+            if media is None:
+                soma, quantidade = conexao.execute("SELECT sum(soma), sum(quantidade) FROM pares").fetchone()
+                media = soma / quantidade if quantidade else MEDIA_PRIOR
+            if peso is None:
+                peso = conexao.execute("SELECT peso FROM prior").fetchone()[0]
+            conexao.execute("UPDATE prior SET media = ?, peso = ?", (media, peso))
+            conexao.execute("UPDATE pares SET escore = (? * ? + soma) / (? + quantidade)", (peso, media, peso))
+            conexao.execute("COMMIT")
+        except BaseException:
+            conexao.execute("ROLLBACK")
+            raise
+        return media, peso
+
+class EscritorNotas:
+    """
+    Buffer de notas para uma sessão: grava quando acumula `tamanho_lote` notas ou quando a
+    nota mais antiga do buffer passou de `intervalo` segundos. fechar() grava o resto.
+    """
+
+    def __init__(self, banco, sessao=None, avaliador=None, tamanho_lote=10, intervalo=5.0):
+        self.banco = banco
+        self.sessao = sessao
+        self.avaliador = avaliador
+        self.tamanho_lote = tamanho_lote
+        self.intervalo = intervalo
+        self._pendentes = []
+        self._inicio_buffer = None
+
+    def adicionar(self, imagem, audio, nota):
+        if not self._pendentes:
+            self._inicio_buffer = time.monotonic()
+        self._pendentes.append((imagem, audio, nota))
+        if len(self._pendentes) >= self.tamanho_lote or time.monotonic() - self._inicio_buffer >= self.intervalo:
+            self.descarregar()
+
+    def descarregar(self):
+        pendentes, self._pendentes = self._pendentes, []
+        return self.banco.registrar_lote(pendentes, self.sessao, self.avaliador)
+
+    def fechar(self):
+        self.descarregar()
+
+def _escrever_benchmark(argumentos):
+    caminho, processo, lotes, tamanho_lote, n_imagens, n_audios = argumentos
+    import random
+    aleatorio = random.Random(processo)
+    banco = BancoNotas(caminho)
+    inicio = time.perf_counter()
+    for _ in range(lotes):
+        banco.registrar_lote([(f"img{aleatorio.randrange(n_imagens)}", f"aud{aleatorio.randrange(n_audios)}",
+                               aleatorio.randint(1, 10)) for _ in range(tamanho_lote)], sessao=f"p{processo}")
+    return time.perf_counter() - inicio
+
+def benchmark(caminho, processos=8, lotes=200, tamanho_lote=50, n_imagens=500, n_audios=500, consultas=2000):
+    """Escritas concorrentes de vários processos seguidas de consultas de top-k e de existência"""
+    from concurrent.futures import ProcessPoolExecutor
+    import random
+
+    for sufixo in ("", "-wal", "-shm"):
+        if os.path.exists(caminho + sufixo):
+            os.remove(caminho + sufixo)
+    BancoNotas(caminho).fechar()
+
+    inicio = time.perf_counter()
+    with ProcessPoolExecutor(processos) as executor:
+        list(executor.map(_escrever_benchmark, [(caminho, p, lotes, tamanho_lote, n_imagens, n_audios)
+                                                for p in range(processos)]))
+    segundos = time.perf_counter() - inicio
+    total = processos * lotes * tamanho_lote
+
+    banco = BancoNotas(caminho)
+    n_notas = banco._conexao().execute("SELECT count(*) FROM notas").fetchone()[0]
+    soma_pares = banco._conexao().execute("SELECT sum(quantidade) FROM pares").fetchone()[0]
+    aleatorio = random.Random(0)
+    pares = [(f"img{aleatorio.randrange(n_imagens)}", f"aud{aleatorio.randrange(n_audios)}") for _ in range(consultas)]
+    inicio = time.perf_counter()
+    for imagem, audio in pares:
+        banco.avaliado(imagem, audio)
+    tempo_avaliado = (time.perf_counter() - inicio) / consultas
+    inicio = time.perf_counter()
+    for _ in range(consultas):
+        banco.top_k(10, minimo_notas=3)
+    tempo_top = (time.perf_counter() - inicio) / consultas
+    return {
+        'notas': total,
+        'notas_por_segundo': total / segundos,
+        'consistente': n_notas == total and soma_pares == total,
+        'avaliado_us': tempo_avaliado * 1e6,
+        'top_k_us': tempo_top * 1e6,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Consulta o banco de notas ou mede seu desempenho")
+    parser.add_argument("--banco", default=ARQUIVO_BANCO)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--minimo-notas", type=int, default=1)
+    parser.add_argument("--atualizar-prior", action="store_true", help="usa a média global atual como a priori")
+    parser.add_argument("--benchmark", action="store_true", help="mede escritas concorrentes e consultas em um banco temporário")
+    parser.add_argument("--processos", type=int, default=8)
+    args = parser.parse_args()
+
+    if args.benchmark:
+        resultado = benchmark("benchmark_notas.db", args.processos)
+        print(f"{resultado['notas']} notas de {args.processos} processos: {resultado['notas_por_segundo']:.0f} notas/s, "
+              f"agregados consistentes: {resultado['consistente']}")
+        print(f"par avaliado?: {resultado['avaliado_us']:.1f} us, top-10: {resultado['top_k_us']:.1f} us")
+    else:
+        banco = BancoNotas(args.banco)
+        if args.atualizar_prior:
+            media, peso = banco.atualizar_prior()
+            print(f"A priori atualizada: média {media:.2f}, peso {peso}")
+        for posicao, (imagem, audio, escore, quantidade, media) in enumerate(banco.top_k(args.top, args.minimo_notas), 1):
+            print(f"{posicao}. {imagem} + {audio}: {escore:.2f} ({quantidade} notas, média {media:.2f})")
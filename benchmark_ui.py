@@ -0,0 +1,182 @@
+"""
+Benchmark Headless da Interface
+===============================
+
+Script para medir o desempenho da interface Pygame sem display e sem um humano clicando.
+Usa os drivers "dummy" do SDL para vídeo e áudio e injeta eventos sintéticos de mouse e
+teclado (hover, nota, pular, abrir ajuda e gráfico) seguindo um roteiro por tela.
+
+Métricas reportadas:
+- Quadros por segundo em cada tela
+- Tempo de transição por meme (da chamada de avaliar_meme até o primeiro quadro desenhado)
+- Pico de memória (heap Python via tracemalloc e RSS do processo)
+
+Uso:
+    python benchmark_ui.py --limite 50 --quadros 30
+
+Nota: deve ser executado na raiz do projeto, onde ficam as pastas imagens/ e audios/.
+"""
+
+import os
+
+# Os drivers precisam ser definidos antes da inicialização do pygame
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import json
+import resource
+import time
+import tracemalloc
+
+import pygame
+import gera_meme
+
+# Centros dos botões no layout 1200x800 de gera_meme
+POS_NOTAS = {n: (570 + ((n - 1) % 5) * 68, 402 + ((n - 1) // 5) * 53) for n in range(1, 11)}
+POS_PULAR = (630, 567)
+POS_AJUDA = (1170, 40)
+POS_FECHAR_AJUDA = (815, 235)
+POS_VER_GRAFICO = (300, 565)
+POS_FECHAR_GRAFICO = (1015, 135)
+POS_VER_MEME = (275, 500)
+POS_FECHAR_RESULTADOS = (600, 565)
+
+class RoteiroEventos:
+    """Substitui pygame.display.flip para contar quadros e injetar eventos agendados"""
+
+    def __init__(self):
+        self._flip_original = pygame.display.flip
+        self.acoes = []
+        self.quadros = 0
+        self.primeiro_quadro = None
+
+    def carregar(self, acoes):
+        # Cada ação é (quadros_de_espera, evento); a espera conta a partir da ação anterior
+        self.acoes = list(acoes)
+        self.quadros = 0
+        self.primeiro_quadro = None
+        self._proximo = self.acoes[0][0] if self.acoes else None
+
+    def flip(self):
+        self._flip_original()
+        self.quadros += 1
+        if self.primeiro_quadro is None:
+            self.primeiro_quadro = time.perf_counter()
+        while self.acoes and self.quadros >= self._proximo:
+            _, evento = self.acoes.pop(0)
+            if evento.type == pygame.MOUSEMOTION:
+                try:
+                    pygame.mouse.set_pos(evento.pos)
+                except pygame.error:
+                    pass
+            pygame.event.post(evento)
+            if self.acoes:
+                self._proximo = self.quadros + self.acoes[0][0]
+
+    def __enter__(self):
+        pygame.display.flip = self.flip
+        return self
+
+    def __exit__(self, *exc):
+        pygame.display.flip = self._flip_original
+
+def _clique(pos):
+    return pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1)
+
+def _movimento(pos):
+    return pygame.event.Event(pygame.MOUSEMOTION, pos=pos, rel=(0, 0), buttons=(0, 0, 0))
+
+def _tecla(key):
+    return pygame.event.Event(pygame.KEYDOWN, key=key, mod=0, unicode="", scancode=0)
+
+def roteiro_avaliacao(indice, quadros):
+    """Roteiro de uma tela de avaliação: passeia pelos botões, abre a ajuda e dá uma nota"""
+    passo = max(1, quadros // 4)
+    acoes = [(passo, _movimento(POS_NOTAS[n])) for n in (1, 5, 10)]
+    if indice % 5 == 0:
+        acoes += [(passo, _clique(POS_AJUDA)), (passo, _clique(POS_FECHAR_AJUDA))]
+    if indice % 7 == 3:
+        acoes.append((passo, _clique(POS_PULAR)))
+    else:
+        acoes.append((passo, _clique(POS_NOTAS[indice % 10 + 1])))
+    return acoes
+
+def roteiro_resultados(quadros):
+    """Roteiro da tela de resultados: gráfico, meme em tela cheia e fechar"""
+    passo = max(1, quadros // 4)
+    return [
+        (passo, _movimento(POS_VER_GRAFICO)),
+        (passo, _clique(POS_VER_GRAFICO)),
+        (quadros, _clique(POS_FECHAR_GRAFICO)),
+        (passo, _clique(POS_VER_MEME)),
+        (quadros, _tecla(pygame.K_ESCAPE)),
+        (passo, _clique(POS_FECHAR_RESULTADOS)),
+    ]
+
+def _rss_mb():
+    # ru_maxrss é reportado em KB no Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def executar_benchmark(pasta_imagens="imagens", pasta_audios="audios", limite=None, quadros=30):
+    imagens = sorted(os.listdir(pasta_imagens))
+    audios = sorted(os.listdir(pasta_audios))
+    total = len(imagens) if limite is None else min(limite, len(imagens))
+
+    tracemalloc.start()
+    transicoes = []
+    fps_avaliacao = []
+    top3 = []
+
+    with RoteiroEventos() as roteiro:
+        for i in range(total):
+            img_path = os.path.join(pasta_imagens, imagens[i])
+            aud_path = os.path.join(pasta_audios, audios[i % len(audios)])
+            roteiro.carregar(roteiro_avaliacao(i, quadros))
+
+            inicio = time.perf_counter()
+            nota, _ = gera_meme.avaliar_meme(img_path, aud_path, top3)
+            fim = time.perf_counter()
+
+            if roteiro.primeiro_quadro is not None:
+                transicoes.append(roteiro.primeiro_quadro - inicio)
+                duracao = fim - roteiro.primeiro_quadro
+                if duracao > 0:
+                    fps_avaliacao.append(roteiro.quadros / duracao)
+
+            if nota is not None:
+                top3.append({'nota': float(nota), 'img_file': imagens[i], 'aud_file': audios[i % len(audios)]})
+                top3 = sorted(top3, key=lambda m: m['nota'], reverse=True)[:3]
+
+        roteiro.carregar(roteiro_resultados(quadros))
+        inicio = time.perf_counter()
+        gera_meme.show_results_screen(top3, [1.0, 2.5, 3.0, 4.2])
+        duracao_resultados = time.perf_counter() - inicio
+        fps_resultados = roteiro.quadros / duracao_resultados if duracao_resultados > 0 else None
+
+    _, pico_heap = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    transicoes.sort()
+    return {
+        'memes': total,
+        'fps_avaliacao_medio': sum(fps_avaliacao) / len(fps_avaliacao) if fps_avaliacao else None,
+        'fps_resultados': fps_resultados,
+        'transicao_media_ms': 1000 * sum(transicoes) / len(transicoes) if transicoes else None,
+        'transicao_p95_ms': 1000 * transicoes[int(0.95 * (len(transicoes) - 1))] if transicoes else None,
+        'pico_heap_python_mb': pico_heap / (1024 * 1024),
+        'pico_rss_mb': _rss_mb(),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark headless da interface de avaliação")
+    parser.add_argument("--limite", type=int, default=None, help="número máximo de memes avaliados")
+    parser.add_argument("--quadros", type=int, default=30, help="quadros aproximados por tela")
+    parser.add_argument("--saida", default=None, help="arquivo JSON para gravar o resultado")
+    args = parser.parse_args()
+
+    resultado = executar_benchmark(limite=args.limite, quadros=args.quadros)
+    print(json.dumps(resultado, indent=2))
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(resultado, f, indent=2)
@@ -0,0 +1,105 @@
+"""
+Cache de Buscas de Vizinhos
+===========================
+
+Cache LRU limitado na frente da busca do item mais próximo do catálogo. Com a seleção
+elitista o mesmo casal de pais (principalmente o melhor meme) é cruzado muitas vezes ao
+longo das gerações, e a média dos embeddings se repete; a resposta da busca pode ser
+reaproveitada em vez de recalcular as distâncias para o catálogo inteiro.
+
+Funcionalidades principais:
+- Chave pelo casal de pais (independente da ordem) quando a consulta é a média sem mutação
+- Chave pelo vetor quantizado nos demais casos: consultas que diferem menos que meio passo
+  de quantização em cada dimensão dividem a mesma entrada
+- Chaves por resumo criptográfico (BLAKE2b) dos bytes, sem colisões práticas
+- Invalidação automática quando a versão do catálogo muda
+- Métricas de acertos, falhas e taxa de acerto
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+CAPACIDADE_PADRAO = 4096
+
+def chave_vetor(vetor):
+    """
+    Resumo BLAKE2b de 128 bits do conteúdo, do tipo e do formato do vetor. Uma colisão
+    devolveria em silêncio os vizinhos de outra consulta; com o hash() de 64 bits do Python
+    ela é improvável, com 128 bits é desprezível.
+    """
+    vetor = np.ascontiguousarray(vetor)
+    resumo = hashlib.blake2b(digest_size=16)
+    resumo.update(f"{vetor.dtype.str}{vetor.shape}".encode())
+    resumo.update(vetor.tobytes())
+    return resumo.digest()
+
+def chave_pais(tipo, emb_pai1, emb_pai2, quantidade=1):
+    """Chave de uma busca pela média dos dois embeddings, que não depende da ordem dos pais"""
+    return ('pais', tipo, frozenset((chave_vetor(emb_pai1), chave_vetor(emb_pai2))), quantidade)
+
+def chave_quantizada(tipo, vetor, passo, quantidade=1):
+    """Chave do vetor arredondado para múltiplos de passo"""
+    return ('vetor', tipo, chave_vetor(np.round(np.asarray(vetor) / passo).astype(np.int32)), quantidade)
+
+class CacheVizinhos:
+    def __init__(self, capacidade=CAPACIDADE_PADRAO):
+        self.capacidade = capacidade
+        self.versao = None
+        self._entradas = OrderedDict()
+        self.acertos = 0
+        self.falhas = 0
+        self.invalidacoes = 0
+        # A especulação da próxima geração roda em outra thread
+        self._trava = threading.Lock()
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def invalidar(self, versao=None):
+        with self._trava:
+            self._invalidar(versao)
+
+    def _invalidar(self, versao):
+        if self._entradas:
+            self.invalidacoes += 1
+        self._entradas.clear()
+        self.versao = versao
+
+    def buscar(self, versao, chave, calcular):
+        """
+        Retorna o resultado guardado para chave, ou chama calcular() e guarda o resultado.
+        Uma versão de catálogo diferente da última esvazia o cache antes da consulta.
+        """
+        with self._trava:
+            if versao != self.versao:
+                self._invalidar(versao)
+            resultado = self._entradas.get(chave)
+            if resultado is not None:
+                self._entradas.move_to_end(chave)
+                self.acertos += 1
+                return resultado
+            self.falhas += 1
+        resultado = calcular()
+        with self._trava:
+            if versao == self.versao:
+                self._entradas[chave] = resultado
+                if len(self._entradas) > self.capacidade:
+                    self._entradas.popitem(last=False)
+        return resultado
+
+    @property
+    def taxa_acerto(self):
+        consultas = self.acertos + self.falhas
+        return self.acertos / consultas if consultas else 0.0
+
+    def metricas(self):
+        return {
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            'taxa_acerto': round(self.taxa_acerto, 4),
+            'entradas': len(self._entradas),
+            'invalidacoes': self.invalidacoes,
+        }
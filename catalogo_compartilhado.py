@@ -0,0 +1,182 @@
+"""
+Catálogo em Memória Compartilhada
+=================================
+
+Publica o catálogo (embeddings, normas e nomes de arquivo) uma única vez em um bloco de
+multiprocessing.shared_memory. Processos auxiliares (ilhas paralelas, varreduras de
+parâmetros, workers de servidor) anexam o bloco como arrays NumPy somente leitura em vez de
+ler os CSVs com pandas: a memória não cresce com o número de processos e a inicialização
+de cada um leva milissegundos.
+
+Funcionalidades principais:
+- Um bloco com todos os arrays alinhados em 64 bytes e um descritor pequeno (nome do bloco
+  e posição, forma e tipo de cada array) que pode ser enviado para outros processos
+- Anexação sem cópia: os arrays do Catalogo do processo são visões do bloco
+- Inicializador pronto para ProcessPoolExecutor, que troca o catálogo padrão de evolutivo.py
+- Benchmark de inicialização e memória privada por worker, CSV contra memória compartilhada
+
+Uso:
+    python catalogo_compartilhado.py --workers 8
+"""
+
+import argparse
+import os
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import evolutivo
+from evolutivo import Catalogo, definir_catalogo, obter_catalogo
+
+ALINHAMENTO = 64
+
+def _arrays_catalogo(catalogo):
+    return {
+        'emb_imagens': catalogo.emb_imagens,
+        'emb_audios': catalogo.emb_audios,
+        'normas_imagens': catalogo.normas('imagens'),
+        'normas_audios': catalogo.normas('audios'),
+        # Nomes como texto de largura fixa, para também serem lidos sem cópia
+        'arquivos_imagens': np.asarray(catalogo.arquivos_imagens, dtype=str),
+        'arquivos_audios': np.asarray(catalogo.arquivos_audios, dtype=str),
+    }
+
+class CatalogoPublicado:
+    """
+    Bloco de memória compartilhada com uma cópia do catálogo. O processo que publica é o
+    dono do bloco e deve chamar fechar() (ou usar with) quando os workers terminarem.
+    """
+
+    def __init__(self, catalogo):
+        arrays = _arrays_catalogo(catalogo)
+        campos = {}
+        tamanho = 0
+        for nome, array in arrays.items():
+            tamanho += -tamanho % ALINHAMENTO
+            campos[nome] = (tamanho, array.shape, array.dtype.str)
+            tamanho += array.nbytes
+
+        self._memoria = shared_memory.SharedMemory(create=True, size=max(tamanho, 1))
+        for nome, array in arrays.items():
+            _visao(self._memoria, campos[nome])[...] = array
+
+        self.descritor = {
+            'memoria': self._memoria.name,
+            'campos': campos,
+            'pasta_imagens': catalogo.pasta_imagens,
+            'pasta_audios': catalogo.pasta_audios,
+            'desvios': {tipo: catalogo.desvio(tipo) for tipo in ('imagens', 'audios')},
+            'versao': catalogo.versao,
+        }
+
+    @property
+    def tamanho(self):
+        return self._memoria.size
+
+    def fechar(self):
+        if self._memoria is not None:
+            self._memoria.close()
+            self._memoria.unlink()
+            self._memoria = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.fechar()
+
+def _visao(memoria, campo):
+    deslocamento, forma, tipo = campo
+    return np.ndarray(forma, dtype=np.dtype(tipo), buffer=memoria.buf, offset=deslocamento)
+
+def publicar_catalogo(catalogo=None):
+    """Copia o catálogo (por padrão, o de evolutivo.py) para a memória compartilhada"""
+    return CatalogoPublicado(obter_catalogo() if catalogo is None else catalogo)
+
+def _anexar_memoria(nome):
+    try:
+        # Python 3.13+: quem anexa não registra o bloco para remoção na saída
+        return shared_memory.SharedMemory(name=nome, track=False)
+    except TypeError:
+        # Versões anteriores: os processos criados por multiprocessing usam o mesmo
+        # resource_tracker do processo que publicou, então o registro não remove o bloco
+        return shared_memory.SharedMemory(name=nome)
+
+def anexar_catalogo(descritor):
+    """Monta um Catalogo cujos arrays são visões somente leitura do bloco publicado"""
+    memoria = _anexar_memoria(descritor['memoria'])
+    arrays = {nome: _visao(memoria, campo) for nome, campo in descritor['campos'].items()}
+    catalogo = Catalogo.de_arrays(
+        arrays['arquivos_imagens'], arrays['arquivos_audios'], arrays['emb_imagens'], arrays['emb_audios'],
+        descritor['pasta_imagens'], descritor['pasta_audios'],
+        normas={'imagens': arrays['normas_imagens'], 'audios': arrays['normas_audios']},
+        desvios=descritor['desvios'], versao=descritor['versao'])
+    # O bloco precisa continuar aberto enquanto o catálogo existir
+    catalogo._memoria_compartilhada = memoria
+    return catalogo
+
+def iniciar_worker(descritor):
+    """Inicializador de ProcessPoolExecutor: o catálogo padrão das sessões passa a ser o publicado"""
+    definir_catalogo(anexar_catalogo(descritor))
+
+def _memoria_privada():
+    """Memória privada do processo em KB (Linux), ou None"""
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            return sum(int(linha.split()[1]) for linha in f if linha.startswith(("Private_Clean", "Private_Dirty")))
+    except OSError:
+        return None
+
+_inicializacao = None
+
+def _iniciar_medindo(descritor, linhas=None):
+    global _inicializacao
+    antes = _memoria_privada()
+    inicio = time.perf_counter()
+    if descritor is None:
+        # Mesmas linhas validadas pelo processo principal, sem varrer os arquivos de novo
+        definir_catalogo(Catalogo.de_csv(evolutivo.arquivo_embeddings_imagens,
+                                         evolutivo.arquivo_embeddings_audios, validar=False, linhas=linhas))
+    else:
+        iniciar_worker(descritor)
+    obter_catalogo().emb_imagens.sum()  # Toca todas as páginas dos embeddings
+    depois = _memoria_privada()
+    _inicializacao = (time.perf_counter() - inicio, None if antes is None else depois - antes)
+
+def _relatar_worker(_):
+    time.sleep(0.05)  # Garante que cada worker receba uma tarefa
+    return os.getpid(), _inicializacao
+
+def comparar_inicializacao(workers):
+    """Inicializa `workers` processos lendo os CSVs e anexando o catálogo publicado"""
+    from concurrent.futures import ProcessPoolExecutor
+
+    resultados = {}
+    with publicar_catalogo() as publicado:
+        linhas = obter_catalogo().linhas_csv
+        for modo, descritor in (('csv', None), ('compartilhado', publicado.descritor)):
+            with ProcessPoolExecutor(workers, initializer=_iniciar_medindo, initargs=(descritor, linhas)) as executor:
+                medidas = dict(executor.map(_relatar_worker, range(workers * 4)))
+            tempos = [t for t, _ in medidas.values()]
+            memorias = [m for _, m in medidas.values() if m is not None]
+            resultados[modo] = {
+                'workers': len(medidas),
+                'inicializacao_ms': 1000 * float(np.median(tempos)),
+                'memoria_privada_kb': float(np.median(memorias)) if memorias else None,
+            }
+        resultados['bloco_kb'] = publicado.tamanho / 1024
+    return resultados
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara workers que leem os CSVs com workers que anexam o catálogo compartilhado")
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    resultados = comparar_inicializacao(args.workers)
+    print(f"Bloco compartilhado: {resultados['bloco_kb']:.0f} KB")
+    for modo in ('csv', 'compartilhado'):
+        r = resultados[modo]
+        memoria = f"{r['memoria_privada_kb']:.0f} KB" if r['memoria_privada_kb'] is not None else "n/d"
+        print(f"{modo}: {r['workers']} workers, inicialização {r['inicializacao_ms']:.1f} ms, "
+              f"memória privada do catálogo {memoria} por worker")
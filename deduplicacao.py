@@ -0,0 +1,288 @@
+"""
+Detecção de Quase-Duplicatas nos Catálogos
+==========================================
+
+Script de ingestão que encontra imagens e áudios praticamente idênticos em imagens/ e
+audios/ (ex.: vine-boom.mp3 e vine-boom-sound-effect_KT89XIq.mp3). Duplicatas ocupam espaço
+no catálogo, deixam a busca de vizinhos mais lenta e fazem o algoritmo mostrar memes iguais.
+
+Funcionalidades principais:
+- Hashes perceptuais de imagem (dHash e pHash de 64 bits)
+- Impressão digital de áudio: hash espectral de 64 bits e vetor de croma de 12 posições
+- Cálculo em paralelo com um pool de processos
+- Busca por distância de Hamming com índice multi-partes (princípio da casa dos pombos)
+- Agrupamento das duplicatas com union-find
+- Relatório JSON e catálogo podado (CSVs de embeddings sem as duplicatas)
+
+Uso:
+    python deduplicacao.py --limiar-imagem 6 --limiar-audio 6
+"""
+
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.fft import dctn
+
+# Bandas do hash espectral: 8 segmentos de tempo x 9 bandas de frequência -> 64 bits
+SEGMENTOS_AUDIO = 8
+BANDAS_AUDIO = 9
+TAXA_ANALISE = 11025
+DURACAO_ANALISE = 10.0
+
+def _iniciar_worker():
+    # Cada processo usa os drivers dummy do SDL e inicializa o mixer uma vez
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import pygame
+    pygame.mixer.init(frequency=44100, size=-16, channels=2)
+
+def _bits_para_int(bits):
+    valor = 0
+    for bit in np.asarray(bits, dtype=bool).ravel():
+        valor = (valor << 1) | int(bit)
+    return valor
+
+def _cinza(surface, tamanho):
+    import pygame
+    if surface.get_bitsize() < 24:
+        # smoothscale só aceita 24/32 bits; copiar para uma surface de 32 bits sem precisar de display
+        copia = pygame.Surface(surface.get_size(), 0, 32)
+        copia.blit(surface, (0, 0))
+        surface = copia
+    reduzida = pygame.transform.smoothscale(surface, tamanho)
+    rgb = pygame.surfarray.array3d(reduzida).astype(float).transpose(1, 0, 2)
+    return rgb @ np.array([0.299, 0.587, 0.114])
+
+def hashes_imagem(caminho):
+    """Retorna (dhash, phash, largura, altura) de uma imagem"""
+    import pygame
+    surface = pygame.image.load(caminho)
+    largura, altura = surface.get_size()
+
+    # dHash: gradiente horizontal em uma imagem 9x8
+    pequena = _cinza(surface, (9, 8))
+    dhash = _bits_para_int(pequena[:, 1:] > pequena[:, :-1])
+
+    # pHash: DCT de uma imagem 32x32, comparando as baixas frequências com a mediana
+    dct = dctn(_cinza(surface, (32, 32)), norm='ortho')[:8, :8]
+    coeficientes = dct.ravel()[1:]
+    phash = _bits_para_int(dct > np.median(coeficientes))
+    return dhash, phash, largura, altura
+
+def _amostras_mono(caminho):
+    import pygame
+    som = pygame.mixer.Sound(caminho)
+    amostras = pygame.sndarray.array(som).astype(np.float32)
+    frequencia = pygame.mixer.get_init()[0]
+    if amostras.ndim > 1:
+        amostras = amostras.mean(axis=1)
+    # Reamostragem simples por média de blocos para a taxa de análise
+    passo = max(1, int(round(frequencia / TAXA_ANALISE)))
+    corte = len(amostras) - len(amostras) % passo
+    return amostras[:corte].reshape(-1, passo).mean(axis=1), frequencia / passo
+
+def hashes_audio(caminho):
+    """Retorna (hash espectral, croma, duração em segundos) de um áudio"""
+    amostras, taxa = _amostras_mono(caminho)
+    duracao = len(amostras) / taxa
+
+    # Remover o silêncio inicial para alinhar versões do mesmo som
+    limiar = 0.02 * (np.abs(amostras).max() + 1e-9)
+    inicio = np.argmax(np.abs(amostras) > limiar)
+    trecho = amostras[inicio:inicio + int(DURACAO_ANALISE * taxa)]
+
+    janela = 1024
+    # Garantir pelo menos um quadro por segmento em áudios muito curtos
+    minimo = janela + (SEGMENTOS_AUDIO - 1) * (janela // 2)
+    if len(trecho) < minimo:
+        trecho = np.pad(trecho, (0, minimo - len(trecho)))
+    n_quadros = (len(trecho) - janela) // (janela // 2) + 1
+    indices = np.arange(janela)[None, :] + (janela // 2) * np.arange(n_quadros)[:, None]
+    espectro = np.abs(np.fft.rfft(trecho[indices] * np.hanning(janela), axis=1)) ** 2
+    freqs = np.fft.rfftfreq(janela, 1 / taxa)
+
+    # Energia em bandas logarítmicas entre 150 Hz e 4 kHz, por segmento de tempo
+    bordas = np.geomspace(150, 4000, BANDAS_AUDIO + 1)
+    bandas = np.stack([espectro[:, (freqs >= a) & (freqs < b)].sum(axis=1) for a, b in zip(bordas[:-1], bordas[1:])], axis=1)
+    segmentos = np.array_split(np.log(bandas + 1e-9), SEGMENTOS_AUDIO)
+    energia = np.stack([s.mean(axis=0) for s in segmentos])
+    hash_espectral = _bits_para_int(energia[:, 1:] > energia[:, :-1])
+
+    # Croma: energia por classe de altura (12 semitons), normalizada
+    validas = freqs > 50
+    classes = np.round(12 * np.log2(freqs[validas] / 440.0)).astype(int) % 12
+    croma = np.bincount(classes, weights=espectro[:, validas].sum(axis=0), minlength=12)
+    croma = croma / (np.linalg.norm(croma) + 1e-12)
+    return hash_espectral, croma.round(4).tolist(), duracao
+
+def _processar_imagem(caminho):
+    try:
+        dhash, phash, largura, altura = hashes_imagem(caminho)
+        return {'arquivo': os.path.basename(caminho), 'dhash': dhash, 'phash': phash,
+                'largura': largura, 'altura': altura, 'bytes': os.path.getsize(caminho)}
+    except Exception as e:
+        return {'arquivo': os.path.basename(caminho), 'erro': str(e)}
+
+def _processar_audio(caminho):
+    try:
+        hash_espectral, croma, duracao = hashes_audio(caminho)
+        return {'arquivo': os.path.basename(caminho), 'hash': hash_espectral, 'croma': croma,
+                'duracao': duracao, 'bytes': os.path.getsize(caminho)}
+    except Exception as e:
+        return {'arquivo': os.path.basename(caminho), 'erro': str(e)}
+
+def calcular_em_paralelo(funcao, pasta, max_workers=None):
+    caminhos = [os.path.join(pasta, nome) for nome in sorted(os.listdir(pasta))]
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_iniciar_worker) as executor:
+        return list(executor.map(funcao, caminhos, chunksize=8))
+
+class IndiceHamming:
+    """
+    Índice multi-partes para hashes de 64 bits: o hash é dividido em limiar + 1 partes e
+    cada parte vira uma chave de tabela. Dois hashes a distância <= limiar coincidem em pelo
+    menos uma parte, então basta comparar os candidatos que dividem algum balde.
+    """
+
+    def __init__(self, limiar, bits=64):
+        self.limiar = limiar
+        self.partes = limiar + 1
+        tamanho = bits // self.partes
+        self.fatias = [(i * tamanho, bits if i == self.partes - 1 else (i + 1) * tamanho) for i in range(self.partes)]
+        self.tabelas = [{} for _ in self.fatias]
+        self.hashes = []
+
+    def _chaves(self, valor):
+        for inicio, fim in self.fatias:
+            yield (valor >> inicio) & ((1 << (fim - inicio)) - 1)
+
+    def adicionar(self, valor):
+        indice = len(self.hashes)
+        self.hashes.append(valor)
+        for tabela, chave in zip(self.tabelas, self._chaves(valor)):
+            tabela.setdefault(chave, []).append(indice)
+        return indice
+
+    def pares_proximos(self):
+        """Todos os pares (i, j, distância) com distância de Hamming <= limiar"""
+        candidatos = set()
+        for tabela in self.tabelas:
+            for balde in tabela.values():
+                for a in range(len(balde)):
+                    for b in range(a + 1, len(balde)):
+                        candidatos.add((balde[a], balde[b]))
+        pares = []
+        for i, j in candidatos:
+            distancia = (self.hashes[i] ^ self.hashes[j]).bit_count()
+            if distancia <= self.limiar:
+                pares.append((i, j, distancia))
+        return sorted(pares)
+
+def _agrupar(n, pares):
+    pai = list(range(n))
+
+    def raiz(i):
+        while pai[i] != i:
+            pai[i] = pai[pai[i]]
+            i = pai[i]
+        return i
+
+    for i, j, _ in pares:
+        ri, rj = raiz(i), raiz(j)
+        if ri != rj:
+            pai[max(ri, rj)] = min(ri, rj)
+
+    grupos = {}
+    for i in range(n):
+        grupos.setdefault(raiz(i), []).append(i)
+    return [membros for membros in grupos.values() if len(membros) > 1]
+
+def agrupar_imagens(registros, limiar=6):
+    """Duplicatas de imagem: pHash próximo (via índice) e dHash também próximo"""
+    validos = [r for r in registros if 'erro' not in r]
+    indice = IndiceHamming(limiar)
+    for r in validos:
+        indice.adicionar(r['phash'])
+    pares = [(i, j, d) for i, j, d in indice.pares_proximos()
+             if (validos[i]['dhash'] ^ validos[j]['dhash']).bit_count() <= 2 * limiar]
+    grupos = []
+    for membros in _agrupar(len(validos), pares):
+        # Manter a versão de maior resolução
+        itens = [validos[i] for i in membros]
+        representante = max(itens, key=lambda r: (r['largura'] * r['altura'], r['bytes']))
+        grupos.append({'representante': representante['arquivo'],
+                       'duplicatas': [r['arquivo'] for r in itens if r is not representante]})
+    return grupos
+
+def agrupar_audios(registros, limiar=6, similaridade_croma=0.9):
+    """Duplicatas de áudio: hash espectral próximo e croma semelhante"""
+    validos = [r for r in registros if 'erro' not in r]
+    indice = IndiceHamming(limiar)
+    for r in validos:
+        indice.adicionar(r['hash'])
+    pares = [(i, j, d) for i, j, d in indice.pares_proximos()
+             if float(np.dot(validos[i]['croma'], validos[j]['croma'])) >= similaridade_croma]
+    grupos = []
+    for membros in _agrupar(len(validos), pares):
+        # Manter a versão mais longa (e maior, em caso de empate)
+        itens = [validos[i] for i in membros]
+        representante = max(itens, key=lambda r: (round(r['duracao'], 1), r['bytes']))
+        grupos.append({'representante': representante['arquivo'],
+                       'duplicatas': [r['arquivo'] for r in itens if r is not representante]})
+    return grupos
+
+def podar_catalogo(arquivo_embeddings, removidos, arquivo_saida):
+    """Grava uma cópia do CSV de embeddings sem as linhas dos arquivos removidos"""
+    import pandas as pd
+    df = pd.read_csv(arquivo_embeddings)
+    podado = df[~df['filename'].isin(removidos)]
+    podado.to_csv(arquivo_saida, index=False)
+    return len(df) - len(podado)
+
+def deduplicar(pasta_imagens="imagens", pasta_audios="audios", limiar_imagem=6, limiar_audio=6,
+               arquivo_relatorio="relatorio_duplicatas.json", max_workers=None):
+    print("Calculando hashes das imagens...")
+    registros_imagens = calcular_em_paralelo(_processar_imagem, pasta_imagens, max_workers)
+    print("Calculando impressões digitais dos áudios...")
+    registros_audios = calcular_em_paralelo(_processar_audio, pasta_audios, max_workers)
+
+    grupos_imagens = agrupar_imagens(registros_imagens, limiar_imagem)
+    grupos_audios = agrupar_audios(registros_audios, limiar_audio)
+
+    removidos_imagens = sorted(d for g in grupos_imagens for d in g['duplicatas'])
+    removidos_audios = sorted(d for g in grupos_audios for d in g['duplicatas'])
+
+    relatorio = {
+        'imagens': {'arquivos': len(registros_imagens), 'grupos': grupos_imagens,
+                    'removidos': removidos_imagens,
+                    'erros': [r for r in registros_imagens if 'erro' in r]},
+        'audios': {'arquivos': len(registros_audios), 'grupos': grupos_audios,
+                   'removidos': removidos_audios,
+                   'erros': [r for r in registros_audios if 'erro' in r]},
+    }
+    with open(arquivo_relatorio, 'w', encoding='utf-8') as f:
+        json.dump(relatorio, f, indent=2, ensure_ascii=False)
+
+    for origem, removidos in (("image_embeddings.csv", removidos_imagens), ("audio_embeddings.csv", removidos_audios)):
+        if os.path.exists(origem):
+            destino = origem.replace(".csv", "_dedup.csv")
+            quantidade = podar_catalogo(origem, removidos, destino)
+            print(f"{destino}: {quantidade} linhas removidas")
+
+    print(f"Imagens: {len(grupos_imagens)} grupos, {len(removidos_imagens)} duplicatas")
+    print(f"Áudios: {len(grupos_audios)} grupos, {len(removidos_audios)} duplicatas")
+    print(f"Relatório salvo em {arquivo_relatorio}")
+    return relatorio
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Encontra imagens e áudios quase duplicados")
+    parser.add_argument("--limiar-imagem", type=int, default=6, help="distância de Hamming máxima do pHash")
+    parser.add_argument("--limiar-audio", type=int, default=6, help="distância de Hamming máxima do hash espectral")
+    parser.add_argument("--relatorio", default="relatorio_duplicatas.json")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    deduplicar(limiar_imagem=args.limiar_imagem, limiar_audio=args.limiar_audio,
+               arquivo_relatorio=args.relatorio, max_workers=args.workers)
@@ -0,0 +1,78 @@
+"""
+Controle de Diversidade da População
+====================================
+
+Mede a diversidade da população a cada geração e ajusta a taxa de mutação (e a
+probabilidade de saltar para um vizinho mais distante) para mantê-la perto de um alvo.
+Sem esse controle a taxa só sobe depois de gerações sem melhora e nunca desce; com ele, uma
+população que converge para memes quase iguais recebe mais mutação antes de gastar notas
+humanas com variações do mesmo meme, e uma população espalhada demais recebe menos.
+
+Funcionalidades principais:
+- Distância média entre todos os pares de embeddings da população, vetorizada por produto de
+  matrizes e normalizada pela distância típica entre itens do catálogo
+- Fração de imagens e de áudios distintos e entropia normalizada de cada modalidade
+- Índice único de diversidade entre 0 (todos iguais) e cerca de 1 (população aleatória)
+- Controlador proporcional multiplicativo, limitado a [mínimo, máximo]
+"""
+
+import numpy as np
+
+def distancia_media(x):
+    """Média das distâncias euclidianas entre todos os pares de linhas de x"""
+    n = len(x)
+    if n < 2:
+        return 0.0
+    normas = np.einsum('ij,ij->i', x, x)
+    d2 = normas[:, None] + normas[None, :] - 2 * (x @ x.T)
+    i, j = np.triu_indices(n, 1)
+    return float(np.sqrt(np.maximum(d2[i, j], 0)).mean())
+
+def entropia_normalizada(indices):
+    """Entropia dos itens da população dividida pelo máximo possível (todos distintos)"""
+    n = len(indices)
+    if n < 2:
+        return 0.0
+    _, contagens = np.unique(indices, return_counts=True)
+    p = contagens / n
+    return float(-(p * np.log(p)).sum() / np.log(n))
+
+def medir_diversidade(catalogo, pares):
+    """
+    Mede a diversidade de uma população dada como lista de (img_idx, aud_idx), usando os
+    embeddings do catálogo (o que o usuário de fato vê). Retorna um dicionário com as medidas
+    por modalidade e o 'indice' combinado.
+    """
+    pares = np.asarray(pares, dtype=int).reshape(-1, 2)
+    medidas = {}
+    componentes = []
+    for coluna, tipo in enumerate(('imagens', 'audios')):
+        indices = pares[:, coluna]
+        embeddings = catalogo.embeddings(tipo)
+        # Distância esperada entre dois itens sorteados do catálogo: sqrt(2 * soma das variâncias)
+        referencia = np.sqrt(2 * embeddings.shape[1]) * catalogo.desvio(tipo)
+        distancia = distancia_media(embeddings[indices]) / referencia
+        entropia = entropia_normalizada(indices)
+        medidas[f'distancia_{tipo}'] = round(float(distancia), 4)
+        medidas[f'distintos_{tipo}'] = round(len(np.unique(indices)) / max(len(indices), 1), 4)
+        medidas[f'entropia_{tipo}'] = round(entropia, 4)
+        componentes += [min(distancia, 1.0), entropia]
+    medidas['pares_distintos'] = round(len({tuple(p) for p in pares}) / max(len(pares), 1), 4)
+    medidas['indice'] = round(float(np.mean(componentes)), 4)
+    return medidas
+
+class ControladorDiversidade:
+    """
+    Multiplica o valor controlado por exp(ganho * (alvo - diversidade) / alvo): abaixo do alvo
+    ele cresce, acima ele diminui, sempre na mesma proporção do erro relativo.
+    """
+
+    def __init__(self, alvo=0.7, ganho=1.0, minimo=0.05, maximo=0.5):
+        self.alvo = alvo
+        self.ganho = ganho
+        self.minimo = minimo
+        self.maximo = maximo
+
+    def ajustar(self, valor, diversidade):
+        fator = np.exp(self.ganho * (self.alvo - diversidade) / self.alvo)
+        return float(np.clip(valor * fator, self.minimo, self.maximo))
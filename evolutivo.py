@@ -14,27 +14,93 @@ Funcionalidades principais:
 - Seleção baseada em fitness (notas do usuário)
 - Geração de novas populações com estratégia elitista
 - Ajuste adaptativo da taxa de mutação baseado em estagnação
+- Telemetria estruturada por geração (tempos por etapa, latência de avaliação, fitness)
+- Modo pipeline: a próxima geração é preparada em segundo plano enquanto o último meme é avaliado
+- Modo estado estacionário: um filho é gerado e substitui o pior meme após cada avaliação
+- Validação do catálogo na inicialização: linhas com arquivo ausente ou corrompido são removidas
+- Modelo de compatibilidade entre imagens e áudios: os pares inéditos com maior nota prevista
+  entram na população
+- Mutação por passeio aleatório no grafo k-NN do catálogo, sem cálculo de distâncias
+- Cache LRU das buscas de vizinhos, por casal de pais ou por embedding quantizado
+- Gravação das avaliações de cada sessão, para reproduzir com gravacao.py
+- Controle da taxa de mutação pela diversidade medida da população
+- População inicial espalhada pelos espaços de embeddings (k-means++ ou ponto mais distante)
+- Notas de todas as sessões guardadas em um banco SQLite compartilhado (banco_notas.py)
+
+O estado de cada execução (configuração, geradores aleatórios, taxa de mutação, melhores,
+telemetria e modelo de pares) fica em uma SessaoEvolutiva. Várias sessões podem rodar no
+mesmo processo e compartilham apenas o Catalogo, que é somente leitura. As variáveis de
+configuração do módulo são os valores padrão de cada nova sessão. Outros processos podem
+anexar o catálogo publicado em memória compartilhada (catalogo_compartilhado.py) em vez de
+ler os CSVs.
 """
 
 import pandas as pd
 import numpy as np
-from gera_meme import avaliar_meme, show_results_screen
-from scipy.spatial.distance import cdist
+from gera_meme import avaliar_meme, show_results_screen, pre_carregar_assets
+from telemetria import Telemetria
+from selecao import casais_elitistas
+from manifesto import linhas_exibiveis
+from modelo_pares import ModeloPares, DIM_ATRIBUTOS, calcular_atributos
+from grafo_knn import obter_grafo
+from cache_vizinhos import CacheVizinhos, chave_pais, chave_quantizada
+from gravacao import Gravador, arquivo_nova_gravacao
+from diversidade import ControladorDiversidade, medir_diversidade
+from sementes import agrupar, semear_catalogo
+from banco_notas import BancoNotas, EscritorNotas
+from novidade import ArquivoNovidade, DIM_NOVIDADE, combinar, vetores_pares
+from concurrent.futures import ThreadPoolExecutor
+import copy
+import hashlib
 import random
+import threading
+import time
+import uuid
 tam_populacao = 10
+tam_populacao_inicial = None  # Memes da primeira geração (aquecimento); None usa tam_populacao
+semeadura = "kmeans++"  # População inicial: "aleatoria", "kmeans++" ou "mais_distante" (sementes.py)
 num_geracoes = 100
 incremento_mutacao = 0.02
 taxa_mutacao_inicial = 0.2
 taxa_mutacao_maxima = 0.5
-taxa_mutacao = taxa_mutacao_inicial
 limite_geracoes_estagnacao = 3
+controle_diversidade = False  # True ajusta a taxa de mutação pela diversidade da população (diversidade.py) em vez da estagnação
+diversidade_alvo = 0.7  # Índice de diversidade desejado (0 = memes iguais, ~1 = população aleatória)
+ganho_diversidade = 1.0
+taxa_mutacao_minima = 0.05
 extincao = 0.1
-melhores = []
-df_imagens = pd.read_csv("image_embeddings.csv")
-df_audios = pd.read_csv("audio_embeddings.csv")
+modo_pipeline = True
+modo_evolucao = "geracional"  # "geracional" ou "estacionario"
+torneio_estacionario = 3
+metodo_selecao = "alias"  # "alias", "sus" ou "torneio"
+verboso = True
+memes_preditos = 2  # Pares inéditos do modelo_pares.py inseridos por geração (0 desliga)
+min_notas_modelo = 10  # Notas necessárias antes de confiar nas previsões
+mutacao_grafo = False  # True troca a mutação do embedding por um passeio no grafo k-NN (grafo_knn.py)
+largura_passeio = 4  # Cada passo do passeio vai para um dos N vizinhos mais próximos
+cache_vizinhos = 4096  # Capacidade do cache LRU de buscas de vizinhos (cache_vizinhos.py, 0 desliga)
+quantizacao_cache = 0.01  # Passo de quantização das consultas, em desvios-padrão do embedding
+peso_novidade = 0  # Peso da novidade (novidade.py) contra a nota estimada na escolha dos filhos (0 desliga; ex.: 0.3)
+candidatos_novidade = 3  # Filhos candidatos gerados por vaga da população quando peso_novidade > 0
+vizinhos_novidade = 10  # Memes já mostrados usados na medida de novidade
+arquivo_telemetria = "telemetria.jsonl"
+pasta_gravacoes = "gravacoes"  # Trilhas das sessões reais para gravacao.py reproduzir (None desliga)
+arquivo_banco_notas = "notas.db"  # Banco com as notas de todas as sessões (None desliga)
+# Use os arquivos *_dedup.csv gerados por deduplicacao.py para o catálogo sem duplicatas
+arquivo_embeddings_imagens = "image_embeddings.csv"
+arquivo_embeddings_audios = "audio_embeddings.csv"
+# Remove do catálogo as linhas cujo arquivo falta ou não abre, antes que gastem uma avaliação
+validar_arquivos = True
 
-emb_imagens = df_imagens.drop(columns=['filename']).values
-emb_audios = df_audios.drop(columns=['filename']).values
+# Parâmetros que cada sessão copia do módulo quando não são informados
+PARAMETROS_SESSAO = (
+    'tam_populacao', 'tam_populacao_inicial', 'semeadura', 'num_geracoes', 'incremento_mutacao', 'taxa_mutacao_inicial',
+    'taxa_mutacao_maxima', 'limite_geracoes_estagnacao', 'modo_pipeline', 'modo_evolucao',
+    'torneio_estacionario', 'metodo_selecao', 'verboso', 'memes_preditos', 'min_notas_modelo',
+    'mutacao_grafo', 'largura_passeio', 'cache_vizinhos', 'quantizacao_cache',
+    'peso_novidade', 'candidatos_novidade', 'vizinhos_novidade',
+    'controle_diversidade', 'diversidade_alvo', 'ganho_diversidade', 'taxa_mutacao_minima',
+)
 
 # Estatísticas dos embeddings (baseadas na análise dos dados)
 EMBEDDING_STATS = {
@@ -54,273 +120,878 @@ EMBEDDING_STATS = {
     }
 }
 
-def criar_meme_aleatorio():
-    img_idx = np.random.randint(len(df_imagens))
-    img_embedding = df_imagens.filter(like='dim_').iloc[img_idx].astype(float).values
-    aud_idx = np.random.randint(len(df_audios))
-    aud_embedding = df_audios.filter(like='dim_').iloc[aud_idx].astype(float).values
-    return img_idx, aud_idx, img_embedding, aud_embedding
-
-def mutate(embedding, embedding_type):
-    if random.random() < taxa_mutacao:
-        # Fazer uma cópia para não modificar o original
-        embedding_mutado = embedding.copy()
-        
-        # Obter estatísticas do tipo de embedding
-        stats = EMBEDDING_STATS[embedding_type]
-        
-        # Número de elementos a serem mutados (entre 1 e 5% do tamanho do embedding)
-        num_mutacoes = random.randint(1, max(1, len(embedding) // 20))
-        
-        for _ in range(num_mutacoes):
-            # Escolher um índice aleatório para mutar
-            idx = random.randint(0, len(embedding) - 1)
-            
-            # Permitir que mais de um tipo de mutação ocorra ao mesmo tempo
-            tipos_mutacao = ['substituir', 'multiplicar', 'somar']
-            # Escolhe aleatoriamente quais mutações aplicar (pelo menos uma)
-            mutacoes_a_aplicar = [tipo for tipo in tipos_mutacao if random.random() < taxa_mutacao/3]
-            if not mutacoes_a_aplicar:
-                mutacoes_a_aplicar = [random.choice(tipos_mutacao)]
-                
-            for tipo_mutacao in mutacoes_a_aplicar:
-                if tipo_mutacao == 'substituir':
-                    embedding_mutado[idx] = random.uniform(stats['min'], stats['max'])
-                elif tipo_mutacao == 'multiplicar':
-                    fator = random.uniform(0.95, 1.05)
-                    embedding_mutado[idx] *= fator
-                elif tipo_mutacao == 'somar':
-                    incremento = random.uniform(-stats['std']*0.05, stats['std']*0.05)
-                    embedding_mutado[idx] += incremento
-        
-        return embedding_mutado
-    
-    return embedding
-
-def cruzar_memes(parents):
-    # Cruzamento de genes, ou a média, ou partes aleatórias dos genes dos pais
-    if(random.random() < 0.5):
-        img_mean = np.mean([parents[0][2], parents[1][2]], axis=0)
-        aud_mean = np.mean([parents[0][3], parents[1][3]], axis=0)
-    else:
-        img_mean = np.array([random.choice([a, b]) for a, b in zip(parents[0][2], parents[1][2])])
-        aud_mean = np.array([random.choice([a, b]) for a, b in zip(parents[0][3], parents[1][3])])
-    
-    # Aplicar mutações seguras com tipos específicos
-    img_mean = mutate(img_mean, embedding_type='image')
-    aud_mean = mutate(aud_mean, embedding_type='audio')
-
-    img_dists = cdist([img_mean], emb_imagens, metric='euclidean')[0]
-    sorted_indices = np.argsort(img_dists)
-    if random.random() < taxa_mutacao and len(sorted_indices) > 1:  
-        img_idx = sorted_indices[1]
-    else:
-        img_idx = sorted_indices[0]
-    aud_dists = cdist([aud_mean], emb_audios, metric='euclidean')[0]
-    sorted_indices = np.argsort(aud_dists)
-    if random.random() < taxa_mutacao and len(sorted_indices) > 1:
-        aud_idx = sorted_indices[1]
-    else:
-        aud_idx = sorted_indices[0]
-    
-    return img_idx, aud_idx, img_mean, aud_mean
-
-
-def gerar_nova_populacao(avaliacoes):
-    avaliacoes.sort(key=lambda x: x[0], reverse=True)
-    melhores.append(avaliacoes[0])
-    indices = list(range(len(avaliacoes)))
-    notas = np.array([a[0] for a in avaliacoes])
-    dados_pais = [(a[1], a[2], a[3], a[4]) for a in avaliacoes]
-    pesos = (notas + 1e-8) / np.sum(notas + 1e-8)
-
-    top1_indice = indices[0]
-    restantes_indices = indices[1:]
-    pesos_restantes = pesos[1:]
-    pesos_restantes = pesos_restantes / np.sum(pesos_restantes)
-
-    nova_populacao = []
-    casais_usados = set()
-
-    # Primeira metade: Top 1 se casa com os outros
-    while len(nova_populacao) < tam_populacao // 2:
-        parceiro_indice = np.random.choice(restantes_indices, p=pesos_restantes)
-        casal = tuple(sorted((top1_indice, parceiro_indice)))
-
-        if casal not in casais_usados:
-            casais_usados.add(casal)
-            
-            pai1 = dados_pais[top1_indice]
-            pai2 = dados_pais[parceiro_indice]
-            
-            filho = cruzar_memes([pai1, pai2])
-            nova_populacao.append(filho)
+class Catalogo:
+    """
+    Nomes de arquivo e embeddings das imagens e dos áudios, em arrays somente leitura.
+    Uma única instância é compartilhada por todas as sessões do processo.
+    """
 
-    # Segunda metade: Casais aleatórios entre os restantes
-    while len(nova_populacao) < tam_populacao:
-        # Garante que há pelo menos dois indivíduos para formar um casal
-        if len(restantes_indices) < 2:
-            break
+    def __init__(self, df_imagens, df_audios, pasta_imagens="./imagens/", pasta_audios="./audios/"):
+        self._iniciar(df_imagens['filename'].to_numpy(dtype=object),
+                      df_audios['filename'].to_numpy(dtype=object),
+                      np.ascontiguousarray(df_imagens.filter(like='dim_').to_numpy(dtype=float)),
+                      np.ascontiguousarray(df_audios.filter(like='dim_').to_numpy(dtype=float)),
+                      pasta_imagens, pasta_audios)
 
-        # Seleciona dois pais de forma aleatória e sem repetição entre os restantes
-        try:
-            pais_indices = np.random.choice(restantes_indices, 2, replace=False, p=pesos_restantes)
-        except ValueError:
-            # Se a soma dos pesos for 0 faz aleatório uniforme
-            pais_indices = np.random.choice(restantes_indices, 2, replace=False)
-            
-        casal = tuple(sorted(pais_indices))
-        
-        if casal not in casais_usados:
-            casais_usados.add(casal)
-            
-            pai1 = dados_pais[pais_indices[0]]
-            pai2 = dados_pais[pais_indices[1]]
-            
-            filho = cruzar_memes([pai1, pai2])
+    @classmethod
+    def de_arrays(cls, arquivos_imagens, arquivos_audios, emb_imagens, emb_audios,
+                  pasta_imagens="./imagens/", pasta_audios="./audios/", normas=None, desvios=None, versao=None):
+        """
+        Monta o catálogo sobre arrays já prontos, sem copiá-los (usado pelos processos que
+        anexam o catálogo publicado em memória compartilhada). normas, desvios e versao,
+        quando informados, evitam recalcular esses valores.
+        """
+        catalogo = cls.__new__(cls)
+        catalogo._iniciar(arquivos_imagens, arquivos_audios, emb_imagens, emb_audios,
+                          pasta_imagens, pasta_audios, normas, desvios, versao)
+        return catalogo
+
+    def _iniciar(self, arquivos_imagens, arquivos_audios, emb_imagens, emb_audios,
+                 pasta_imagens, pasta_audios, normas=None, desvios=None, versao=None):
+        self.linhas_csv = None
+        self.pasta_imagens = pasta_imagens
+        self.pasta_audios = pasta_audios
+        self.arquivos_imagens = arquivos_imagens
+        self.arquivos_audios = arquivos_audios
+        self.emb_imagens = emb_imagens
+        self.emb_audios = emb_audios
+        self._desvios = desvios or {'imagens': float(self.emb_imagens.std(axis=0).mean()),
+                                    'audios': float(self.emb_audios.std(axis=0).mean())}
+        self._versao = versao
+        self._normas = normas or {'imagens': np.einsum('ij,ij->i', self.emb_imagens, self.emb_imagens),
+                                  'audios': np.einsum('ij,ij->i', self.emb_audios, self.emb_audios)}
+        for array in (self.arquivos_imagens, self.arquivos_audios, self.emb_imagens, self.emb_audios,
+                      *self._normas.values()):
+            array.flags.writeable = False
+        self._atributos_modelo = {}
+        self._grafos = {}
+        self._agrupamentos = {}
+        self._trava = threading.Lock()
+
+    @classmethod
+    def de_csv(cls, arquivo_imagens, arquivo_audios, validar=True, linhas=None):
+        """
+        Lê os CSVs. linhas=(índices das imagens, índices dos áudios) usa as linhas já validadas
+        por outro processo em vez de validar de novo; o catálogo guarda em linhas_csv as linhas
+        usadas, para repassá-las a processos auxiliares.
+        """
+        df_imagens = pd.read_csv(arquivo_imagens)
+        df_audios = pd.read_csv(arquivo_audios)
+        if linhas is None and validar:
+            linhas = linhas_exibiveis(df_imagens, df_audios)
+        if linhas is not None:
+            df_imagens = df_imagens.iloc[linhas[0]].reset_index(drop=True)
+            df_audios = df_audios.iloc[linhas[1]].reset_index(drop=True)
+        catalogo = cls(df_imagens, df_audios)
+        catalogo.linhas_csv = linhas
+        return catalogo
+
+    @property
+    def n_imagens(self):
+        return len(self.arquivos_imagens)
+
+    @property
+    def n_audios(self):
+        return len(self.arquivos_audios)
+
+    def caminho_imagem(self, img_idx):
+        return self.pasta_imagens + self.arquivos_imagens[img_idx]
+
+    def caminho_audio(self, aud_idx):
+        return self.pasta_audios + self.arquivos_audios[aud_idx]
+
+    def embeddings(self, tipo):
+        return self.emb_imagens if tipo == 'imagens' else self.emb_audios
+
+    def desvio(self, tipo):
+        """Desvio-padrão médio por dimensão dos embeddings de 'imagens' ou 'audios'"""
+        return self._desvios[tipo]
+
+    @property
+    def versao(self):
+        """Hash do conteúdo do catálogo; muda quando arquivos ou embeddings mudam"""
+        if self._versao is None:
+            digest = hashlib.sha256()
+            for nomes, embeddings in ((self.arquivos_imagens, self.emb_imagens),
+                                      (self.arquivos_audios, self.emb_audios)):
+                digest.update('\0'.join(nomes).encode('utf-8'))
+                digest.update(embeddings.tobytes())
+            self._versao = digest.hexdigest()
+        return self._versao
+
+    def mais_proximos(self, tipo, vetor, quantidade=1):
+        """Índices dos `quantidade` itens mais próximos de vetor, do mais próximo ao mais distante"""
+        # ||e - v||² = ||e||² - 2 e·v + ||v||²; o último termo não muda a ordem
+        d2 = self._normas[tipo] - 2 * (self.embeddings(tipo) @ vetor)
+        if quantidade == 1:
+            return np.array([np.argmin(d2)])
+        quantidade = min(quantidade, len(d2))
+        candidatos = np.argpartition(d2, quantidade - 1)[:quantidade]
+        return candidatos[np.argsort(d2[candidatos])]
+
+    def grafo(self, tipo):
+        """Grafo k-NN de 'imagens' ou 'audios', carregado do disco ou construído na primeira consulta"""
+        with self._trava:
+            if tipo not in self._grafos:
+                nomes = self.arquivos_imagens if tipo == 'imagens' else self.arquivos_audios
+                self._grafos[tipo] = obter_grafo(tipo, nomes, self.embeddings(tipo))
+            return self._grafos[tipo]
+
+    def agrupamento(self, tipo):
+        """Grupos k-means de 'imagens' ou 'audios' para semear catálogos grandes, calculados uma vez"""
+        with self._trava:
+            if tipo not in self._agrupamentos:
+                self._agrupamentos[tipo] = agrupar(self.embeddings(tipo))
+            return self._agrupamentos[tipo]
+
+    def atributos_modelo(self, dimensao):
+        """Atributos do modelo de pares, calculados uma vez e compartilhados entre as sessões"""
+        with self._trava:
+            if dimensao not in self._atributos_modelo:
+                X = calcular_atributos(self.emb_imagens, dimensao)
+                Y = calcular_atributos(self.emb_audios, dimensao)
+                X.flags.writeable = False
+                Y.flags.writeable = False
+                self._atributos_modelo[dimensao] = (X, Y)
+            return self._atributos_modelo[dimensao]
+
+    def normas(self, tipo):
+        """Normas ao quadrado dos embeddings de 'imagens' ou 'audios'"""
+        return self._normas[tipo]
+
+# Catálogo padrão das sessões, lido dos CSVs na primeira vez que é usado
+_catalogo = None
+_trava_catalogo = threading.Lock()
+
+def obter_catalogo():
+    global _catalogo
+    with _trava_catalogo:
+        if _catalogo is None:
+            _catalogo = Catalogo.de_csv(arquivo_embeddings_imagens, arquivo_embeddings_audios, validar_arquivos)
+        return _catalogo
+
+def definir_catalogo(novo_catalogo):
+    """Troca o catálogo padrão (ex.: por um anexado com catalogo_compartilhado.py, sem ler os CSVs)"""
+    global _catalogo
+    with _trava_catalogo:
+        _catalogo = novo_catalogo
+
+def __getattr__(nome):
+    # evolutivo.catalogo continua disponível, mas só carrega os CSVs quando é acessado
+    if nome == 'catalogo':
+        return obter_catalogo()
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+
+# Pool compartilhado pelas sessões para preparar a próxima geração em segundo plano
+_executor_pipeline = None
+_trava_executor = threading.Lock()
+
+def _executor():
+    global _executor_pipeline
+    with _trava_executor:
+        if _executor_pipeline is None:
+            _executor_pipeline = ThreadPoolExecutor(max_workers=4)
+        return _executor_pipeline
+
+class SessaoEvolutiva:
+    """
+    Uma execução do algoritmo evolutivo. Os parâmetros de PARAMETROS_SESSAO podem ser
+    passados como argumentos nomeados; os omitidos usam o valor atual do módulo.
+    """
+
+    def __init__(self, catalogo=None, semente=None, telemetria=None, banco_notas=None, **parametros):
+        desconhecidos = set(parametros) - set(PARAMETROS_SESSAO)
+        if desconhecidos:
+            raise TypeError(f"Parâmetros desconhecidos: {sorted(desconhecidos)}")
+        for nome in PARAMETROS_SESSAO:
+            setattr(self, nome, parametros.get(nome, globals()[nome]))
+
+        self.catalogo = obter_catalogo() if catalogo is None else catalogo
+        # Identifica a sessão nos registros de telemetria e no banco de notas compartilhados
+        self.sessao_id = f"{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        self.telemetria = Telemetria(arquivo_telemetria) if telemetria is None else telemetria
+        if self.telemetria.sessao is None:
+            self.telemetria.sessao = self.sessao_id
+        self.cache_busca = CacheVizinhos(self.cache_vizinhos)
+        # Notas desta sessão também vão para o banco compartilhado, em lotes
+        self.escritor_notas = None
+        if banco_notas is not None:
+            self.escritor_notas = EscritorNotas(banco_notas, sessao=self.sessao_id)
+        self.reiniciar(semente)
+
+    def reiniciar(self, semente=None):
+        """Volta o estado adaptativo da sessão ao inicial"""
+        self.random = random.Random(semente)
+        self.rng = np.random.default_rng(semente)
+        # Origem dos geradores de cada especulação, independentes dos da sessão
+        self._sementes_especulacao = np.random.SeedSequence(semente)
+        self.taxa_mutacao = self.taxa_mutacao_inicial
+        # Probabilidade de ir além do vizinho mais próximo (segundo vizinho ou passo extra no grafo)
+        self.prob_salto = self.taxa_mutacao_inicial
+        self.diversidade = None
+        self.melhores = []
+        self.modelo_pares = None
+        # Embeddings conjuntos de todos os memes mostrados nesta sessão
+        self.arquivo_novidade = ArquivoNovidade(2 * DIM_NOVIDADE) if self.peso_novidade else None
+
+    def _log(self, mensagem):
+        if self.verboso:
+            print(mensagem)
+
+    def criar_meme_aleatorio(self):
+        img_idx = int(self.rng.integers(self.catalogo.n_imagens))
+        aud_idx = int(self.rng.integers(self.catalogo.n_audios))
+        return img_idx, aud_idx, self.catalogo.emb_imagens[img_idx], self.catalogo.emb_audios[aud_idx]
+
+    def criar_populacao_inicial(self, tamanho=None):
+        """Primeira população, com tam_populacao_inicial memes e a estratégia de semeadura da sessão"""
+        if tamanho is None:
+            tamanho = self.tam_populacao_inicial or self.tam_populacao
+        if self.semeadura == "aleatoria":
+            return [self.criar_meme_aleatorio() for _ in range(tamanho)]
+        catalogo = self.catalogo
+        imagens = semear_catalogo(catalogo, 'imagens', tamanho, self.semeadura, self.rng)
+        # Imagens e áudios são semeados separadamente e combinados ao acaso
+        audios = self.rng.permutation(semear_catalogo(catalogo, 'audios', tamanho, self.semeadura, self.rng))
+        return [(int(i), int(a), catalogo.emb_imagens[i], catalogo.emb_audios[a]) for i, a in zip(imagens, audios)]
+
+    def mutate(self, embedding, embedding_type):
+        aleatorio = self.random
+        taxa_mutacao = self.taxa_mutacao
+        if aleatorio.random() < taxa_mutacao:
+            # Fazer uma cópia para não modificar o original
+            embedding_mutado = embedding.copy()
+
+            # Obter estatísticas do tipo de embedding
+            stats = EMBEDDING_STATS[embedding_type]
+
+            # Número de elementos a serem mutados (entre 1 e 5% do tamanho do embedding)
+            num_mutacoes = aleatorio.randint(1, max(1, len(embedding) // 20))
+
+            for _ in range(num_mutacoes):
+                # Escolher um índice aleatório para mutar
+                idx = aleatorio.randint(0, len(embedding) - 1)
+
+                # Permitir que mais de um tipo de mutação ocorra ao mesmo tempo
+                tipos_mutacao = ['substituir', 'multiplicar', 'somar']
+                # Escolhe aleatoriamente quais mutações aplicar (pelo menos uma)
+                mutacoes_a_aplicar = [tipo for tipo in tipos_mutacao if aleatorio.random() < taxa_mutacao/3]
+                if not mutacoes_a_aplicar:
+                    mutacoes_a_aplicar = [aleatorio.choice(tipos_mutacao)]
+
+                for tipo_mutacao in mutacoes_a_aplicar:
+                    if tipo_mutacao == 'substituir':
+                        embedding_mutado[idx] = aleatorio.uniform(stats['min'], stats['max'])
+                    elif tipo_mutacao == 'multiplicar':
+                        fator = aleatorio.uniform(0.95, 1.05)
+                        embedding_mutado[idx] *= fator
+                    elif tipo_mutacao == 'somar':
+                        incremento = aleatorio.uniform(-stats['std']*0.05, stats['std']*0.05)
+                        embedding_mutado[idx] += incremento
+
+            return embedding_mutado
+
+        return embedding
+
+    def _mais_proximos(self, tipo, vetor, quantidade=1, pais=None):
+        """
+        Busca no catálogo passando pelo cache. pais=(emb1, emb2) indica que vetor é a média
+        dos dois sem mutação, e então a chave é o casal de pais em vez do vetor quantizado.
+        """
+        catalogo = self.catalogo
+        if not self.cache_vizinhos:
+            return catalogo.mais_proximos(tipo, vetor, quantidade)
+        if pais is not None:
+            chave = chave_pais(tipo, pais[0], pais[1], quantidade)
+        else:
+            chave = chave_quantizada(tipo, vetor, self.quantizacao_cache * catalogo.desvio(tipo), quantidade)
+        return self.cache_busca.buscar(catalogo.versao, chave,
+                                       lambda: catalogo.mais_proximos(tipo, vetor, quantidade))
+
+    def mutar_por_grafo(self, img_idx, aud_idx):
+        """
+        Com probabilidade taxa_mutacao, move a imagem (e, independentemente, o áudio) para um
+        vizinho no grafo k-NN. O passeio continua com probabilidade prob_salto a cada passo.
+        Retorna (img_idx, aud_idx).
+        """
+        aleatorio = self.random
+        if aleatorio.random() < self.taxa_mutacao:
+            passos = 1
+            while aleatorio.random() < self.prob_salto:
+                passos += 1
+            img_idx = self.catalogo.grafo('imagens').passeio(img_idx, passos, self.rng, self.largura_passeio)
+        if aleatorio.random() < self.taxa_mutacao:
+            passos = 1
+            while aleatorio.random() < self.prob_salto:
+                passos += 1
+            aud_idx = self.catalogo.grafo('audios').passeio(aud_idx, passos, self.rng, self.largura_passeio)
+        return img_idx, aud_idx
+
+    def cruzar_memes(self, parents):
+        aleatorio = self.random
+        catalogo = self.catalogo
+        inicio = time.perf_counter()
+        # Cruzamento de genes, ou a média, ou partes aleatórias dos genes dos pais
+        media = aleatorio.random() < 0.5
+        if media:
+            img_mean = np.mean([parents[0][2], parents[1][2]], axis=0)
+            aud_mean = np.mean([parents[0][3], parents[1][3]], axis=0)
+        else:
+            img_mean = np.array([aleatorio.choice([a, b]) for a, b in zip(parents[0][2], parents[1][2])])
+            aud_mean = np.array([aleatorio.choice([a, b]) for a, b in zip(parents[0][3], parents[1][3])])
+
+        if self.mutacao_grafo:
+            inicio_busca = time.perf_counter()
+            pais_img = (parents[0][2], parents[1][2]) if media else None
+            pais_aud = (parents[0][3], parents[1][3]) if media else None
+            img_idx = int(self._mais_proximos('imagens', img_mean, pais=pais_img)[0])
+            aud_idx = int(self._mais_proximos('audios', aud_mean, pais=pais_aud)[0])
+            fim = time.perf_counter()
+
+            # A mutação anda no grafo; o filho mutado passa a ter o embedding do item escolhido
+            img_mutada, aud_mutado = self.mutar_por_grafo(img_idx, aud_idx)
+            if img_mutada != img_idx:
+                img_idx, img_mean = img_mutada, catalogo.emb_imagens[img_mutada]
+            if aud_mutado != aud_idx:
+                aud_idx, aud_mean = aud_mutado, catalogo.emb_audios[aud_mutado]
+            self.telemetria.acumular('cruzamento_mutacao', (inicio_busca - inicio) + (time.perf_counter() - fim))
+            self.telemetria.acumular('busca_vizinhos', fim - inicio_busca)
+            return img_idx, aud_idx, img_mean, aud_mean
+
+        # Aplicar mutações seguras com tipos específicos
+        img_mutada = self.mutate(img_mean, embedding_type='image')
+        aud_mutado = self.mutate(aud_mean, embedding_type='audio')
+        # mutate devolve o próprio vetor quando não muta, e aí a média ainda é chaveada pelos pais
+        pais_img = (parents[0][2], parents[1][2]) if media and img_mutada is img_mean else None
+        pais_aud = (parents[0][3], parents[1][3]) if media and aud_mutado is aud_mean else None
+        img_mean, aud_mean = img_mutada, aud_mutado
+        inicio_busca = time.perf_counter()
+
+        # Com probabilidade prob_salto, o segundo item mais próximo é escolhido no lugar do primeiro
+        sorted_indices = self._mais_proximos('imagens', img_mean, 2, pais_img)
+        if aleatorio.random() < self.prob_salto and len(sorted_indices) > 1:
+            img_idx = sorted_indices[1]
+        else:
+            img_idx = sorted_indices[0]
+        sorted_indices = self._mais_proximos('audios', aud_mean, 2, pais_aud)
+        if aleatorio.random() < self.prob_salto and len(sorted_indices) > 1:
+            aud_idx = sorted_indices[1]
+        else:
+            aud_idx = sorted_indices[0]
+        fim = time.perf_counter()
+        self.telemetria.acumular('cruzamento_mutacao', inicio_busca - inicio)
+        self.telemetria.acumular('busca_vizinhos', fim - inicio_busca)
+
+        return int(img_idx), int(aud_idx), img_mean, aud_mean
+
+    def gerar_nova_populacao(self, avaliacoes, registrar_melhor=True, dicionario_notas=()):
+        avaliacoes.sort(key=lambda x: x[0], reverse=True)
+        if registrar_melhor:
+            self.melhores.append(avaliacoes[0])
+        notas = np.array([a[0] for a in avaliacoes])
+        dados_pais = [(a[1], a[2], a[3], a[4]) for a in avaliacoes]
+
+        # Primeira metade: Top 1 se casa com os outros
+        # Segunda metade: Casais aleatórios entre os restantes
+        # Todos os casais da geração são sorteados de uma vez, sem repetição
+        casais = casais_elitistas(notas, self.tam_populacao, self.metodo_selecao, self.torneio_estacionario, self.rng)
+
+        if self.arquivo_novidade is not None:
+            # Cada casal gera vários candidatos, estimados pela média dos pais, e a população
+            # fica com os que combinam melhor nota estimada e novidade
+            candidatos = []
+            estimadas = []
+            for i, j in casais:
+                for _ in range(self.candidatos_novidade):
+                    candidatos.append(self.cruzar_memes([dados_pais[i], dados_pais[j]]))
+                    estimadas.append((notas[i] + notas[j]) / 2)
+            return self._escolher_por_novidade(candidatos, estimadas, len(casais), dicionario_notas)
+
+        nova_populacao = []
+        for i, j in casais:
+            filho = self.cruzar_memes([dados_pais[i], dados_pais[j]])
             nova_populacao.append(filho)
-            
-    return nova_populacao
-
-def obter_top3_memes(dicionario_notas):
-    """Retorna os top 3 memes com suas informações"""
-    if not dicionario_notas:
-        return []
-    
-    # Criar lista de memes com suas notas
-    memes_com_notas = []
-    for (img_idx, aud_idx), nota in dicionario_notas.items():
-        # Ignorar apenas memes pulados (None)
-        if nota is not None:
-            try:
-                img_file = df_imagens.iloc[img_idx]['filename']
-                aud_file = df_audios.iloc[aud_idx]['filename']
-                memes_com_notas.append({
-                    'nota': nota,
-                    'img_idx': img_idx,
-                    'aud_idx': aud_idx,
-                    'img_file': img_file,
-                    'aud_file': aud_file
-                })
-            except (IndexError, KeyError):
-                # Se houver erro ao acessar os dados, pular este meme
-                continue
-    
-    # Ordenar por nota (maior primeiro) e pegar top 3
-    memes_com_notas.sort(key=lambda x: x['nota'], reverse=True)
-    return memes_com_notas[:3]
 
-if __name__ == "__main__":
-    populacao = [criar_meme_aleatorio() for _ in range(tam_populacao)]
-
-    dicionario_notas = {}
-    fitness_history = []
-    geracoes_sem_melhora = 0
-    melhor_fitness_global = -1.0
-    encerrar_programa = False
-    
-    for geracao in range(num_geracoes):
-        if encerrar_programa:
-            print("Programa encerrado pelo usuário.")
-            break
-            
-        print(f"\n=== Geração {geracao + 1}/{num_geracoes} ===")
-        quant_repet = 0
-        avaliacoes = []
-        notas = []
-        
-        # Obter top 3 memes para mostrar na interface
-        top3_memes = obter_top3_memes(dicionario_notas)
-        
-        for idx, (img_idx, aud_idx, img_emb, aud_emb) in enumerate(populacao):
-            if encerrar_programa:
-                break
-                
-            meme_id = (img_idx, aud_idx)
+        return nova_populacao
 
-            if meme_id in dicionario_notas:
-                nota = dicionario_notas[meme_id]
-                quant_repet +=1
-                print(f"Meme {idx+1} (cacheado) - Nota: {nota}")
+    def _escolher_por_novidade(self, candidatos, estimadas, quantidade, dicionario_notas=()):
+        """
+        Escolhe `quantidade` memes entre os candidatos (img_idx, aud_idx, img_emb, aud_emb) pela
+        combinação dos postos da nota estimada e da novidade em relação aos memes já mostrados,
+        evitando pares repetidos. Com o modelo de pares pronto, a nota estimada é a dele.
+        Pares já avaliados (chaves de dicionario_notas) são pontuados à parte e só entram
+        depois de todos os inéditos.
+        """
+        img = [c[0] for c in candidatos]
+        aud = [c[1] for c in candidatos]
+        with self.telemetria.medir('novidade'):
+            vetores = vetores_pares(self.catalogo.atributos_modelo(DIM_NOVIDADE), img, aud)
+            novidade = self.arquivo_novidade.novidade(vetores, self.vizinhos_novidade)
+            modelo = self.modelo_pares
+            if modelo is not None and modelo.n_observacoes >= self.min_notas_modelo:
+                estimadas = modelo.prever(img, aud)
+            estimadas = np.asarray(estimadas, dtype=float)
+            avaliados = np.array([par in dicionario_notas for par in zip(img, aud)], dtype=bool)
+            # Os postos de cada grupo são calculados só dentro dele, então um par já avaliado não
+            # muda a ordem dos inéditos
+            pontuacao = np.empty(len(candidatos))
+            for grupo in (~avaliados, avaliados):
+                pontuacao[grupo] = combinar(estimadas[grupo], novidade[grupo], self.peso_novidade)
+            ordem = np.lexsort((-pontuacao, avaliados))
+
+        escolhidos = []
+        repetidos = []
+        vistos = set()
+        for i in ordem:
+            if (img[i], aud[i]) in vistos:
+                repetidos.append(i)
             else:
-                img_file = df_imagens.iloc[img_idx]['filename']
-                aud_file = df_audios.iloc[aud_idx]['filename']
-                print(f"Meme {idx+1} com img {img_file} e audio {aud_file}")
-                
-                # Atualizar top 3 antes de mostrar
-                top3_memes = obter_top3_memes(dicionario_notas)
-                
-                nota, encerrar = avaliar_meme("./imagens/" + img_file, "./audios/" + aud_file, top3_memes)
-                
-                if encerrar:
-                    if encerrar == "show_results":
-                        # Calcular fitness parcial da geração atual antes de mostrar resultados
-                        if notas and len(notas) > 0:
-                            notas_parciais = np.array(notas, dtype=float)
-                            fitness_parcial = notas_parciais.mean()
-                            fitness_history.append(fitness_parcial)
-                        
-                        # Mostrar tela de resultados com gráfico de fitness
-                        top3_final = obter_top3_memes(dicionario_notas)
-                        encerrar_programa = show_results_screen(top3_final, fitness_history)
-                    else:
-                        encerrar_programa = True
-                    break
-                
-                if nota is not None:
-                    dicionario_notas[meme_id] = nota
-                    print(f"Nota atribuída: {nota}")
-                else:
-                    print("Meme pulado (sem nota)")
-                    # Marcar como pulado para não mostrar novamente
-                    dicionario_notas[meme_id] = None
-                    # Atribuir nota mínima para manter a população estável
-                    nota = 0.0
-                    dicionario_notas[meme_id] = 0.0
-            
-            # Adicionar à avaliação (mesmo que seja 0.0 se foi pulado)
+                vistos.add((img[i], aud[i]))
+                escolhidos.append(i)
+        # Com poucos pares distintos entre os candidatos, completa com repetições na mesma ordem
+        return [candidatos[i] for i in (escolhidos + repetidos)[:quantidade]]
+
+    def _caminhos_assets(self, populacao):
+        caminhos = []
+        for img_idx, aud_idx, _, _ in populacao:
+            caminhos.append(self.catalogo.caminho_imagem(img_idx))
+            caminhos.append(self.catalogo.caminho_audio(aud_idx))
+        return caminhos
+
+    def _copia_especulativa(self):
+        """
+        Cópia rasa da sessão para gerar a próxima população em segundo plano. Ela tem geradores
+        aleatórios próprios, derivados da semente da sessão na mesma ordem em toda execução,
+        telemetria própria e instantâneos do modelo de pares e do arquivo de novidade, que a
+        thread principal continua atualizando enquanto o último meme é avaliado.
+        """
+        copia = copy.copy(self)
+        semente = self._sementes_especulacao.spawn(1)[0]
+        copia.random = random.Random(int(semente.generate_state(1)[0]))
+        copia.rng = np.random.default_rng(semente)
+        copia.telemetria = Telemetria(ativa=False)
+        if self.modelo_pares is not None:
+            copia.modelo_pares = self.modelo_pares.instantaneo()
+        if self.arquivo_novidade is not None:
+            copia.arquivo_novidade = self.arquivo_novidade.copia()
+        return copia
+
+    def _especular_populacao(self, avaliacoes_parciais, avaliados):
+        """Gera a próxima população a partir de avaliações parciais e pré-carrega seus arquivos"""
+        nova_populacao = self.gerar_nova_populacao(list(avaliacoes_parciais), registrar_melhor=False,
+                                                   dicionario_notas=avaliados)
+        pre_carregar_assets(self._caminhos_assets(nova_populacao))
+        return nova_populacao
+
+    def iniciar_especulacao(self, avaliacoes, pendentes, dicionario_notas):
+        """
+        Dispara em segundo plano a geração da próxima população enquanto o último meme da
+        geração ainda está sendo avaliado. Os memes pendentes já avaliados em gerações anteriores
+        usam a nota conhecida; os demais recebem a média das notas já coletadas.
+
+        A geração roda em uma cópia da sessão (_copia_especulativa), então uma especulação
+        descartada que ainda esteja rodando não interfere na população gerada de novo.
+
+        Retorna (future, elite, telemetria), onde elite é o meme que seria o top 1 com as notas
+        imputadas e telemetria guarda os tempos da especulação.
+        """
+        media = float(np.mean([a[0] for a in avaliacoes])) if avaliacoes else 0.0
+        parciais = list(avaliacoes)
+        for img_idx, aud_idx, img_emb, aud_emb in pendentes:
+            nota = dicionario_notas.get((img_idx, aud_idx))
+            parciais.append([media if nota is None else nota, img_idx, aud_idx, img_emb, aud_emb])
+
+        # sort é estável, então o top 1 é o primeiro meme com a maior nota, igual ao cálculo final
+        elite = max(parciais, key=lambda a: a[0])
+        copia = self._copia_especulativa()
+        # A thread principal continua inserindo notas em dicionario_notas; a especulação usa os pares de agora
+        avaliados = frozenset(dicionario_notas)
+        return (_executor().submit(copia._especular_populacao, parciais, avaliados), (elite[1], elite[2]),
+                copia.telemetria)
+
+    def finalizar_especulacao(self, especulacao, avaliacoes):
+        """
+        Aceita a população especulada se o top 1 final for o mesmo da especulação. Como as notas
+        dos demais só entram como pesos de seleção, a diferença de uma nota imputada é tolerada.
+        Retorna a nova população ou None se a especulação precisar ser descartada.
+        """
+        future, elite, telemetria = especulacao
+        melhor = max(avaliacoes, key=lambda a: a[0])
+        if (melhor[1], melhor[2]) != elite:
+            future.cancel()
+            return None
+        nova_populacao = future.result()
+        self.telemetria.incorporar(telemetria)
+        self.melhores.append(melhor)
+        return nova_populacao
+
+    def obter_top3_memes(self, dicionario_notas):
+        """Retorna os top 3 memes com suas informações"""
+        if not dicionario_notas:
+            return []
+
+        # Criar lista de memes com suas notas
+        memes_com_notas = []
+        for (img_idx, aud_idx), nota in dicionario_notas.items():
+            # Ignorar apenas memes pulados (None)
             if nota is not None:
-                notas.append(nota)
-                avaliacoes.append([nota, img_idx, aud_idx, img_emb, aud_emb])
-        
-        if encerrar_programa:
-            break
-        
-        if not avaliacoes:
-            print("Nenhuma avaliação válida nesta geração. Pulando...")
-            continue
-            
-        notas_np_array = np.array(notas, dtype=float) 
-        fitness_atual = notas_np_array.mean()
-        fitness_history.append(fitness_atual)
-        
-        print(f"Fitness médio da geração: {fitness_atual:.2f}")
-
-        populacao = gerar_nova_populacao(avaliacoes)
+                try:
+                    img_file = self.catalogo.arquivos_imagens[img_idx]
+                    aud_file = self.catalogo.arquivos_audios[aud_idx]
+                    memes_com_notas.append({
+                        'nota': nota,
+                        'img_idx': img_idx,
+                        'aud_idx': aud_idx,
+                        'img_file': img_file,
+                        'aud_file': aud_file
+                    })
+                except IndexError:
+                    # Se houver erro ao acessar os dados, pular este meme
+                    continue
+
+        # Ordenar por nota (maior primeiro) e pegar top 3
+        memes_com_notas.sort(key=lambda x: x['nota'], reverse=True)
+        return memes_com_notas[:3]
 
+    def avaliar_com_interface(self, img_idx, aud_idx, top3_memes):
+        """Mostra o meme na interface Pygame e retorna (nota, encerrar)"""
+        return avaliar_meme(self.catalogo.caminho_imagem(img_idx), self.catalogo.caminho_audio(aud_idx), top3_memes)
+
+    def _modelo_pares(self):
+        if self.modelo_pares is None:
+            self.modelo_pares = ModeloPares(self.catalogo.emb_imagens, self.catalogo.emb_audios, rng=self.rng,
+                                            atributos=self.catalogo.atributos_modelo(DIM_ATRIBUTOS))
+        return self.modelo_pares
+
+    def _pares_preditos(self, quantidade, dicionario_notas, excluir=()):
+        """
+        Retorna até `quantidade` memes inéditos com maior nota prevista pelo modelo de pares.
+        A lista fica vazia enquanto o modelo tiver menos de min_notas_modelo notas.
+        """
+        modelo = self.modelo_pares
+        if quantidade <= 0 or modelo is None or modelo.n_observacoes < self.min_notas_modelo:
+            return []
+        with self.telemetria.medir('modelo_pares'):
+            img, aud, _ = modelo.melhores_pares(quantidade, set(dicionario_notas) | set(excluir))
+        return [(int(i), int(a), self.catalogo.emb_imagens[i], self.catalogo.emb_audios[a]) for i, a in zip(img, aud)]
+
+    def _avaliar_novo_meme(self, avaliar, dicionario_notas, img_idx, aud_idx):
+        """
+        Pede a nota de um meme inédito e a registra em dicionario_notas.
+        Retorna (nota, encerrar); memes pulados recebem nota 0.0.
+        """
+        meme_id = (img_idx, aud_idx)
+        img_file = self.catalogo.arquivos_imagens[img_idx]
+        aud_file = self.catalogo.arquivos_audios[aud_idx]
+        self._log(f"Meme com img {img_file} e audio {aud_file}")
+
+        # Atualizar top 3 antes de mostrar
+        top3_memes = self.obter_top3_memes(dicionario_notas)
+
+        inicio_avaliacao = time.perf_counter()
+        nota, encerrar = avaliar(img_idx, aud_idx, top3_memes)
+        self.telemetria.registrar_avaliacao(time.perf_counter() - inicio_avaliacao)
+
+        if encerrar:
+            return None, encerrar
+
+        if self.escritor_notas is not None:
+            self.escritor_notas.adicionar(img_file, aud_file, nota)
+        if self.arquivo_novidade is not None:
+            with self.telemetria.medir('novidade'):
+                self.arquivo_novidade.adicionar(vetores_pares(self.catalogo.atributos_modelo(DIM_NOVIDADE),
+                                                              img_idx, aud_idx))
+        if nota is not None:
+            dicionario_notas[meme_id] = nota
+            self._log(f"Nota atribuída: {nota}")
+            if self.memes_preditos:
+                with self.telemetria.medir('modelo_pares'):
+                    self._modelo_pares().observar(img_idx, aud_idx, nota)
+        else:
+            self._log("Meme pulado (sem nota)")
+            # Atribuir nota mínima para manter a população estável e não mostrar novamente
+            nota = 0.0
+            dicionario_notas[meme_id] = 0.0
+        return nota, False
+
+    def _atualizar_taxa_mutacao(self, fitness_atual, melhor_fitness_global, geracoes_sem_melhora, quant_repet,
+                                pares=None):
+        """
+        Com controle_diversidade, ajusta a taxa de mutação e prob_salto pela diversidade dos
+        pares (img_idx, aud_idx) da população; sem ele, aumenta a taxa em caso de estagnação
+        ou de muitas repetições.
+        """
         if fitness_atual <= melhor_fitness_global + 0.01:
             geracoes_sem_melhora += 1
         else:
             melhor_fitness_global = fitness_atual
             geracoes_sem_melhora = 0
-        
+
+        if self.controle_diversidade and pares:
+            self.diversidade = medir_diversidade(self.catalogo, pares)
+            controlador = ControladorDiversidade(self.diversidade_alvo, self.ganho_diversidade,
+                                                 self.taxa_mutacao_minima, self.taxa_mutacao_maxima)
+            self.taxa_mutacao = controlador.ajustar(self.taxa_mutacao, self.diversidade['indice'])
+            self.prob_salto = controlador.ajustar(self.prob_salto, self.diversidade['indice'])
+            self._log(f"Diversidade {self.diversidade['indice']:.2f}: taxa de mutação {self.taxa_mutacao:.2f}, "
+                      f"salto {self.prob_salto:.2f}")
+            return melhor_fitness_global, geracoes_sem_melhora
+
         # Se a estabilização for detectada por X gerações consecutivas
-        if geracoes_sem_melhora >= limite_geracoes_estagnacao or quant_repet >= tam_populacao/2:
-            taxa_mutacao += incremento_mutacao * max(geracoes_sem_melhora,1)
-            taxa_mutacao = min(taxa_mutacao, taxa_mutacao_maxima)
+        if geracoes_sem_melhora >= self.limite_geracoes_estagnacao or quant_repet >= self.tam_populacao/2:
+            self.taxa_mutacao += self.incremento_mutacao * max(geracoes_sem_melhora,1)
+            self.taxa_mutacao = min(self.taxa_mutacao, self.taxa_mutacao_maxima)
+            self.prob_salto = self.taxa_mutacao
             geracoes_sem_melhora = 0
-            print(f"Taxa de mutação ajustada para: {taxa_mutacao:.2f}")
-    
-    # Mostrar top 3 final (se não foi mostrado na tela de resultados)
-    if not encerrar_programa:
+            self._log(f"Taxa de mutação ajustada para: {self.taxa_mutacao:.2f}")
+        return melhor_fitness_global, geracoes_sem_melhora
+
+    def executar(self, avaliar=None, dicionario_notas=None, max_avaliacoes=None):
+        """Executa o loop do modo_evolucao da sessão"""
+        try:
+            if self.modo_evolucao == "estacionario":
+                return self.executar_estado_estacionario(avaliar, dicionario_notas, max_avaliacoes)
+            return self.executar_geracional(avaliar, dicionario_notas)
+        finally:
+            if self.escritor_notas is not None:
+                self.escritor_notas.descarregar()
+
+    def executar_geracional(self, avaliar=None, dicionario_notas=None):
+        """
+        Loop evolutivo geracional: avalia toda a população antes de gerar a próxima.
+
+        avaliar(img_idx, aud_idx, top3_memes) deve retornar (nota, encerrar), como avaliar_meme;
+        o padrão é a interface Pygame.
+        Retorna (dicionario_notas, fitness_history, encerrar), onde encerrar é False, True ou
+        "show_results".
+        """
+        if avaliar is None:
+            avaliar = self.avaliar_com_interface
+        telemetria = self.telemetria
+        populacao = self.criar_populacao_inicial()
+
+        if dicionario_notas is None:
+            dicionario_notas = {}
+        fitness_history = []
+        geracoes_sem_melhora = 0
+        melhor_fitness_global = -1.0
+        encerrar = False
+
+        for geracao in range(self.num_geracoes):
+            self._log(f"\n=== Geração {geracao + 1}/{self.num_geracoes} ===")
+            quant_repet = 0
+            avaliacoes = []
+            notas = []
+            especulacao = None
+
+            for idx, (img_idx, aud_idx, img_emb, aud_emb) in enumerate(populacao):
+                meme_id = (img_idx, aud_idx)
+
+                if meme_id in dicionario_notas:
+                    nota = dicionario_notas[meme_id]
+                    quant_repet +=1
+                    self._log(f"Meme {idx+1} (cacheado) - Nota: {nota}")
+                else:
+                    # Se este é o último meme inédito da geração, preparar a próxima em paralelo
+                    if self.modo_pipeline and especulacao is None:
+                        restantes = populacao[idx + 1:]
+                        if all((r[0], r[1]) in dicionario_notas or (r[0], r[1]) == meme_id for r in restantes):
+                            especulacao = self.iniciar_especulacao(avaliacoes, populacao[idx:], dicionario_notas)
+
+                    nota, encerrar = self._avaliar_novo_meme(avaliar, dicionario_notas, img_idx, aud_idx)
+                    if encerrar:
+                        if notas:
+                            # Fitness parcial da geração atual para a tela de resultados
+                            fitness_history.append(float(np.mean(notas)))
+                        return dicionario_notas, fitness_history, encerrar
+
+                # Adicionar à avaliação (mesmo que seja 0.0 se foi pulado)
+                if nota is not None:
+                    notas.append(nota)
+                    avaliacoes.append([nota, img_idx, aud_idx, img_emb, aud_emb])
+
+            if not avaliacoes:
+                self._log("Nenhuma avaliação válida nesta geração. Pulando...")
+                continue
+
+            notas_np_array = np.array(notas, dtype=float)
+            fitness_atual = notas_np_array.mean()
+            fitness_history.append(fitness_atual)
+
+            self._log(f"Fitness médio da geração: {fitness_atual:.2f}")
+
+            with telemetria.medir('gerar_nova_populacao'):
+                especulacao_aceita = None
+                nova_populacao = None
+                if especulacao is not None:
+                    nova_populacao = self.finalizar_especulacao(especulacao, avaliacoes)
+                    especulacao_aceita = nova_populacao is not None
+                if nova_populacao is None:
+                    nova_populacao = self.gerar_nova_populacao(avaliacoes, dicionario_notas=dicionario_notas)
+                # Os últimos filhos dão lugar aos pares inéditos com maior nota prevista
+                preditos = self._pares_preditos(self.memes_preditos, dicionario_notas,
+                                                [(m[0], m[1]) for m in nova_populacao])
+                if preditos:
+                    nova_populacao[-len(preditos):] = preditos
+                populacao = nova_populacao
+
+            # A diversidade medida é a da população que vai ser avaliada em seguida
+            melhor_fitness_global, geracoes_sem_melhora = self._atualizar_taxa_mutacao(
+                fitness_atual, melhor_fitness_global, geracoes_sem_melhora, quant_repet,
+                [(m[0], m[1]) for m in populacao])
+
+            telemetria.registrar_geracao(geracao + 1, notas, quant_repet, self.taxa_mutacao,
+                                         geracoes_sem_melhora=geracoes_sem_melhora,
+                                         especulacao_aceita=especulacao_aceita,
+                                         prob_salto=self.prob_salto, diversidade=self.diversidade,
+                                         cache_vizinhos=self.cache_busca.metricas())
+
+        return dicionario_notas, fitness_history, encerrar
+
+    def _selecionar_torneio(self, populacao_avaliada):
+        competidores = self.random.sample(populacao_avaliada, min(self.torneio_estacionario, len(populacao_avaliada)))
+        return max(competidores, key=lambda a: a[0])
+
+    def _sortear_pais(self, populacao_avaliada):
+        pai1 = self._selecionar_torneio(populacao_avaliada)
+        pai2 = self._selecionar_torneio([a for a in populacao_avaliada if a is not pai1])
+        return pai1, pai2
+
+    def executar_estado_estacionario(self, avaliar=None, dicionario_notas=None, max_avaliacoes=None):
+        """
+        Loop evolutivo em estado estacionário: depois de cada nota a população é atualizada.
+
+        Cada passo escolhe dois pais por torneio, gera um filho com cruzar_memes e, se o filho
+        for inédito, pede sua nota. O filho substitui o pior indivíduo da população. Memes já
+        presentes em dicionario_notas reutilizam a nota sem nova avaliação humana.
+
+        A cada tam_populacao passos é fechada uma "época", usada no histórico de fitness,
+        na telemetria e no ajuste da taxa de mutação, no mesmo papel de uma geração.
+        Retorna (dicionario_notas, fitness_history, encerrar) como executar_geracional.
+        """
+        if avaliar is None:
+            avaliar = self.avaliar_com_interface
+        telemetria = self.telemetria
+        tam_populacao = self.tam_populacao
+        if dicionario_notas is None:
+            dicionario_notas = {}
+        if max_avaliacoes is None:
+            max_avaliacoes = tam_populacao * self.num_geracoes
+        fitness_history = []
+        geracoes_sem_melhora = 0
+        melhor_fitness_global = -1.0
+        avaliacoes_humanas = 0
+
+        # População inicial avaliada um a um
+        populacao_avaliada = []
+        for img_idx, aud_idx, img_emb, aud_emb in self.criar_populacao_inicial():
+            meme_id = (img_idx, aud_idx)
+            if meme_id in dicionario_notas:
+                nota = dicionario_notas[meme_id]
+            else:
+                nota, encerrar = self._avaliar_novo_meme(avaliar, dicionario_notas, img_idx, aud_idx)
+                if encerrar:
+                    return dicionario_notas, fitness_history, encerrar
+                avaliacoes_humanas += 1
+            populacao_avaliada.append([nota, img_idx, aud_idx, img_emb, aud_emb])
+        # Depois de um aquecimento maior que a população, seguem os tam_populacao melhores
+        if len(populacao_avaliada) > tam_populacao:
+            populacao_avaliada.sort(key=lambda a: a[0], reverse=True)
+            del populacao_avaliada[tam_populacao:]
+
+        passo = 0
+        notas_epoca = []
+        quant_repet = 0
+        # Limite de passos para não girar indefinidamente quando só surgem memes repetidos
+        max_passos = max_avaliacoes * 10
+        while avaliacoes_humanas < max_avaliacoes and passo < max_passos:
+            passo += 1
+            pai1, pai2 = self._sortear_pais(populacao_avaliada)
+            with telemetria.medir('gerar_filho'):
+                # memes_preditos de cada tam_populacao passos vêm do modelo de pares
+                preditos = self._pares_preditos(1, dicionario_notas) if passo % tam_populacao < self.memes_preditos else []
+                if preditos:
+                    img_idx, aud_idx, img_emb, aud_emb = preditos[0]
+                elif self.arquivo_novidade is not None:
+                    # Um candidato por casal sorteado; fica o que combina melhor nota estimada e novidade
+                    casais = [(pai1, pai2)] + [self._sortear_pais(populacao_avaliada)
+                                               for _ in range(self.candidatos_novidade - 1)]
+                    candidatos = [self.cruzar_memes([p1[1:], p2[1:]]) for p1, p2 in casais]
+                    estimadas = [(p1[0] + p2[0]) / 2 for p1, p2 in casais]
+                    escolhido = self._escolher_por_novidade(candidatos, estimadas, 1, dicionario_notas)
+                    img_idx, aud_idx, img_emb, aud_emb = escolhido[0]
+                else:
+                    img_idx, aud_idx, img_emb, aud_emb = self.cruzar_memes([pai1[1:], pai2[1:]])
+            meme_id = (img_idx, aud_idx)
+
+            if meme_id in dicionario_notas:
+                nota = dicionario_notas[meme_id]
+                quant_repet += 1
+            else:
+                nota, encerrar = self._avaliar_novo_meme(avaliar, dicionario_notas, img_idx, aud_idx)
+                if encerrar:
+                    if notas_epoca:
+                        fitness_history.append(float(np.mean(notas_epoca)))
+                    return dicionario_notas, fitness_history, encerrar
+                avaliacoes_humanas += 1
+                notas_epoca.append(nota)
+
+            # Substituição do pior, mantendo a população sem memes duplicados
+            if all((a[1], a[2]) != meme_id for a in populacao_avaliada):
+                pior = min(range(len(populacao_avaliada)), key=lambda i: populacao_avaliada[i][0])
+                populacao_avaliada[pior] = [nota, img_idx, aud_idx, img_emb, aud_emb]
+
+            if passo % tam_populacao == 0:
+                epoca = passo // tam_populacao
+                self.melhores.append(max(populacao_avaliada, key=lambda a: a[0]))
+                if notas_epoca:
+                    fitness_atual = float(np.mean(notas_epoca))
+                    fitness_history.append(fitness_atual)
+                    self._log(f"Época {epoca}: fitness médio {fitness_atual:.2f}")
+                    melhor_fitness_global, geracoes_sem_melhora = self._atualizar_taxa_mutacao(
+                        fitness_atual, melhor_fitness_global, geracoes_sem_melhora, quant_repet,
+                        [(a[1], a[2]) for a in populacao_avaliada])
+                telemetria.registrar_geracao(epoca, notas_epoca, quant_repet, self.taxa_mutacao,
+                                             geracoes_sem_melhora=geracoes_sem_melhora,
+                                             modo="estacionario", prob_salto=self.prob_salto,
+                                             diversidade=self.diversidade,
+                                             cache_vizinhos=self.cache_busca.metricas())
+                notas_epoca = []
+                quant_repet = 0
+
+        return dicionario_notas, fitness_history, False
+
+if __name__ == "__main__":
+    sessao = SessaoEvolutiva(banco_notas=BancoNotas(arquivo_banco_notas) if arquivo_banco_notas else None)
+    avaliar = None
+    if pasta_gravacoes:
+        avaliar = Gravador(sessao.avaliar_com_interface, sessao.catalogo,
+                           arquivo_nova_gravacao(pasta_gravacoes, sessao.sessao_id),
+                           {nome: getattr(sessao, nome) for nome in PARAMETROS_SESSAO})
+    try:
+        dicionario_notas, fitness_history, encerrar = sessao.executar(avaliar)
+    finally:
+        # Fecha a trilha também quando a sessão termina com exceção (ex.: Ctrl+C)
+        if avaliar is not None:
+            avaliar.fechar()
+            print(f"Sessão gravada em {avaliar.arquivo}")
+
+    if encerrar == "show_results":
+        # Mostrar tela de resultados com gráfico de fitness
+        top3_final = sessao.obter_top3_memes(dicionario_notas)
+        show_results_screen(top3_final, fitness_history)
+    elif encerrar:
+        print("Programa encerrado pelo usuário.")
+    else:
+        # Mostrar top 3 final (se não foi mostrado na tela de resultados)
         print("\n=== TOP 3 MEMES FINAIS ===")
-        top3_final = obter_top3_memes(dicionario_notas)
+        top3_final = sessao.obter_top3_memes(dicionario_notas)
         for i, meme in enumerate(top3_final):
             print(f"{i+1}. {meme['img_file']} + {meme['aud_file']} - Nota: {meme['nota']:.2f}")
-        
+
         # Mostrar gráfico de fitness no final se não foi mostrado
         if fitness_history:
             print("\n=== HISTÓRICO DE FITNESS ===")
             print(f"Melhor fitness: {max(fitness_history):.2f}")
             print(f"Fitness médio: {sum(fitness_history)/len(fitness_history):.2f}")
-            print(f"Pior fitness: {min(fitness_history):.2f}")
\ No newline at end of file
+            print(f"Pior fitness: {min(fitness_history):.2f}")
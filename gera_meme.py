@@ -14,11 +14,19 @@ Funcionalidades principais:
 - Gráfico de evolução do fitness ao longo das gerações
 - Modais de ajuda e visualização de gráficos
 - Sistema de botões interativos com efeitos hover
+- Pré-carregamento de arquivos de imagem e áudio em memória
+- Uso dos derivados gerados por normalizacao_imagens.py e normalizacao_audios.py, quando existirem
+- Leitura dos arquivos a partir dos pacotes mapeados em memória (pacote.py), quando existirem
 """
 
 import pygame
 import os
+import io
+import json
 import math
+import threading
+from collections import OrderedDict
+from pacote import abrir_pacotes, PASTA_PACOTES
 
 # Paleta de cores minimalista
 BG_COLOR = (250, 250, 252)  # Fundo suave
@@ -33,6 +41,130 @@ ACCENT_GRAY = (156, 163, 175)  # Cinza
 BORDER_COLOR = (229, 231, 235)  # Borda suave
 SHADOW_COLOR = (0, 0, 0, 30)  # Sombra suave
 
+# Cache de bytes dos arquivos pré-carregados (LRU limitado, compartilhado entre threads)
+MAX_ASSETS_PRE_CARREGADOS = 64
+_cache_assets = OrderedDict()
+_trava_cache_assets = threading.Lock()
+
+# Pacotes de assets (pacote.py), abertos na primeira consulta (pela thread principal ou pela de pré-carregamento)
+_pacotes = None
+_trava_pacotes = threading.Lock()
+
+def _pacote_com(caminho):
+    """
+    Pacote com uma cópia atual do arquivo; os arquivos soltos editados depois do empacotamento
+    saem do índice ao abrir os pacotes (abrir_pacotes) e vêm do disco
+    """
+    global _pacotes
+    with _trava_pacotes:
+        if _pacotes is None:
+            _pacotes = abrir_pacotes(PASTA_PACOTES)
+    for pacote in _pacotes:
+        if caminho in pacote:
+            return pacote
+    return None
+
+# Manifestos dos derivados (normalizacao_imagens.py e normalizacao_audios.py), carregados na primeira consulta
+MANIFESTO_IMAGENS = "./derivados/imagens/manifesto.json"
+MANIFESTO_AUDIOS = "./derivados/audios/manifesto.json"
+EXTENSOES_AUDIO = ('.mp3', '.wav', '.ogg')
+_manifestos_derivados = {}
+# Caminho resolvido de cada (arquivo original, tipo), conferido uma vez por execução
+_derivados_resolvidos = {}
+
+def _manifesto_derivados(arquivo):
+    if arquivo not in _manifestos_derivados:
+        try:
+            with open(arquivo, 'r', encoding='utf-8') as f:
+                _manifestos_derivados[arquivo] = json.load(f)
+        except (OSError, ValueError):
+            _manifestos_derivados[arquivo] = {}
+    return _manifestos_derivados[arquivo]
+
+def _derivado_atual(registro, caminho):
+    """O original não mudou desde que o derivado foi gerado (mesmo mtime e tamanho do manifesto)"""
+    try:
+        info = os.stat(caminho)
+    except OSError:
+        # Sem o original, o derivado é a única cópia
+        return True
+    return registro.get('origem_mtime') == info.st_mtime and registro.get('origem_bytes') == info.st_size
+
+def _resolver_derivado(caminho, tipo=None):
+    """
+    Troca o caminho de um arquivo original pelo derivado do tipo pedido, se existir e tiver
+    sido gerado a partir da versão atual do original; senão usa o original
+    """
+    if tipo is None:
+        tipo = 'audio' if caminho.lower().endswith(EXTENSOES_AUDIO) else 'exibicao'
+    chave = (caminho, tipo)
+    if chave not in _derivados_resolvidos:
+        manifesto = _manifesto_derivados(MANIFESTO_AUDIOS if tipo == 'audio' else MANIFESTO_IMAGENS)
+        registro = manifesto.get(os.path.basename(caminho))
+        resolvido = caminho
+        if registro and tipo in registro and (_pacote_com(registro[tipo]) or os.path.exists(registro[tipo])):
+            if _derivado_atual(registro, caminho):
+                resolvido = registro[tipo]
+            else:
+                print(f"{caminho} mudou depois de gerar o derivado; usando o original "
+                      f"(rode de novo a normalização para atualizar)")
+        _derivados_resolvidos[chave] = resolvido
+    return _derivados_resolvidos[chave]
+
+def pre_carregar_assets(caminhos):
+    """Lê os arquivos para a memória para que a próxima tela não espere pelo disco"""
+    for caminho in caminhos:
+        caminho = _resolver_derivado(caminho)
+        pacote = _pacote_com(caminho)
+        if pacote is not None:
+            # Já está mapeado em memória: basta pedir ao sistema que traga as páginas
+            pacote.pre_carregar(caminho)
+            continue
+        with _trava_cache_assets:
+            if caminho in _cache_assets:
+                _cache_assets.move_to_end(caminho)
+                continue
+        try:
+            with open(caminho, 'rb') as f:
+                dados = f.read()
+        except OSError:
+            continue
+        with _trava_cache_assets:
+            _cache_assets[caminho] = dados
+            while len(_cache_assets) > MAX_ASSETS_PRE_CARREGADOS:
+                _cache_assets.popitem(last=False)
+
+def _abrir_asset(caminho):
+    """
+    Retorna um arquivo em memória se o caminho está em um pacote ou foi pré-carregado,
+    senão o próprio caminho
+    """
+    pacote = _pacote_com(caminho)
+    if pacote is not None:
+        return pacote.abrir(caminho)
+    with _trava_cache_assets:
+        dados = _cache_assets.get(caminho)
+    if dados is None:
+        return caminho
+    return io.BytesIO(dados)
+
+def _carregar_imagem(caminho, tipo='exibicao'):
+    caminho = _resolver_derivado(caminho, tipo)
+    origem = _abrir_asset(caminho)
+    if isinstance(origem, str):
+        return pygame.image.load(origem)
+    return pygame.image.load(origem, os.path.basename(caminho))
+
+def _carregar_musica(caminho):
+    caminho = _resolver_derivado(caminho, 'audio')
+    origem = _abrir_asset(caminho)
+    if isinstance(origem, str):
+        pygame.mixer.music.load(origem)
+    else:
+        pygame.mixer.music.load(origem, os.path.splitext(caminho)[1].lstrip('.'))
+    # Manter referência ao arquivo em memória enquanto a música toca
+    return origem
+
 def _scale_to_fit(surface, target_size):
     tw, th = target_size
     sw, sh = surface.get_size()
@@ -148,7 +280,7 @@ class Button:
 def load_thumbnail(image_path, size=(80, 80)):
     """Carrega uma miniatura da imagem"""
     try:
-        img = pygame.image.load(image_path)
+        img = _carregar_imagem(image_path, 'miniatura')
         img = pygame.transform.smoothscale(img, size)
         return img
     except:
@@ -353,7 +485,7 @@ def show_image_and_play_audio(image_path, audio_path, top3_memes=None, target_si
 
     # Carregar imagem
     try:
-        image = pygame.image.load(image_path).convert_alpha()
+        image = _carregar_imagem(image_path).convert_alpha()
     except:
         image = pygame.Surface((400, 400))
         image.fill(ACCENT_GRAY)
@@ -370,8 +502,9 @@ def show_image_and_play_audio(image_path, audio_path, top3_memes=None, target_si
 
     # Carregar áudio
     pygame.mixer.init()
+    musica = None
     try:
-        pygame.mixer.music.load(audio_path)
+        musica = _carregar_musica(audio_path)
         pygame.mixer.music.play()
     except:
         print(f"Erro ao carregar áudio: {audio_path}")
@@ -411,6 +544,8 @@ def show_image_and_play_audio(image_path, audio_path, top3_memes=None, target_si
     
     # Área da imagem (lado esquerdo)
     image_area = pygame.Rect(30, 100, 480, 480)
+    # Redimensionar uma vez só, fora do loop de desenho
+    scaled, pos = _scale_to_fit(image, (image_area.width, image_area.height))
     
     # Área da tabela top 3 (canto superior direito)
     table_area = pygame.Rect(540, 100, 640, 240)
@@ -495,7 +630,6 @@ def show_image_and_play_audio(image_path, audio_path, top3_memes=None, target_si
             pygame.draw.rect(screen, BORDER_COLOR, image_card, 1)
         
         # Desenhar imagem
-        scaled, pos = _scale_to_fit(image, (image_area.width, image_area.height))
         screen.blit(scaled, (image_area.x + pos[0], image_area.y + pos[1]))
         
         # Desenhar tabela top 3
@@ -547,6 +681,8 @@ def show_image_and_play_audio(image_path, audio_path, top3_memes=None, target_si
                 encerrar_programa = True
             
             if event.type == pygame.MOUSEBUTTONDOWN:
+                # Usar a posição do próprio evento (permite eventos sintéticos)
+                mouse_pos = event.pos
                 if event.button == 1:  # Botão esquerdo
                     if show_help and close_rect:
                         # Verificar se clicou no botão fechar do modal
@@ -563,7 +699,7 @@ def show_image_and_play_audio(image_path, audio_path, top3_memes=None, target_si
                     if repetir_audio_button.is_clicked(mouse_pos):
                         try:
                             pygame.mixer.music.stop()
-                            pygame.mixer.music.load(audio_path)
+                            musica = _carregar_musica(audio_path)
                             pygame.mixer.music.play()
                         except:
                             print(f"Erro ao repetir áudio: {audio_path}")
@@ -755,7 +891,7 @@ def show_results_screen(top3_memes, fitness_history=None, target_size=(1200, 800
             img_path = "./imagens/" + meme_info.get('img_file', '')
             aud_path = "./audios/" + meme_info.get('aud_file', '')
             try:
-                preview_img = pygame.image.load(img_path)
+                preview_img = _carregar_imagem(img_path, 'miniatura')
                 preview_img = pygame.transform.smoothscale(preview_img, (200, 200))
             except:
                 preview_img = pygame.Surface((200, 200))
@@ -872,6 +1008,8 @@ def show_results_screen(top3_memes, fitness_history=None, target_size=(1200, 800
                 encerrar_programa = True
             
             if event.type == pygame.MOUSEBUTTONDOWN:
+                # Usar a posição do próprio evento (permite eventos sintéticos)
+                mouse_pos = event.pos
                 if event.button == 1:  # Botão esquerdo
                     if show_graph and graph_close_rect:
                         # Verificar se clicou no botão fechar do modal de gráfico
@@ -934,7 +1072,7 @@ def show_meme_fullscreen(screen, image_path, audio_path):
                     raise FileNotFoundError(f"Imagem não encontrada: {image_path}")
         
         # Carregar a imagem
-        image = pygame.image.load(image_path).convert()
+        image = _carregar_imagem(image_path, 'original').convert()
         print(f"Imagem carregada com sucesso: {image_path}, tamanho: {image.get_size()}")
         
     except Exception as e:
@@ -956,7 +1094,7 @@ def show_meme_fullscreen(screen, image_path, audio_path):
     # Carregar áudio
     try:
         pygame.mixer.music.stop()
-        pygame.mixer.music.load(audio_path)
+        musica = _carregar_musica(audio_path)
         pygame.mixer.music.play()
     except Exception as e:
         print(f"Erro ao carregar áudio: {audio_path}, erro: {e}")
@@ -965,6 +1103,8 @@ def show_meme_fullscreen(screen, image_path, audio_path):
     voltar_button = Button(500, 700, 200, 50, "Voltar", ACCENT_GRAY, (107, 114, 128), radius=10)
     
     running = True
+    image_area = pygame.Rect(100, 100, 1000, 600)
+    scaled, pos = _scale_to_fit(image, (image_area.width, image_area.height))
     
     while running:
         mouse_pos = pygame.mouse.get_pos()
@@ -972,7 +1112,6 @@ def show_meme_fullscreen(screen, image_path, audio_path):
         screen.fill(BG_COLOR)
         
         # Card da imagem (desenhar primeiro para ficar atrás)
-        image_area = pygame.Rect(100, 100, 1000, 600)
         image_card = pygame.Rect(image_area.x - 10, image_area.y - 10, 
                                 image_area.width + 20, image_area.height + 20)
         draw_rounded_rect(screen, CARD_COLOR, image_card, 16)
@@ -982,7 +1121,6 @@ def show_meme_fullscreen(screen, image_path, audio_path):
             pygame.draw.rect(screen, BORDER_COLOR, image_card, 1)
         
         # Desenhar imagem centralizada (depois do card)
-        scaled, pos = _scale_to_fit(image, (image_area.width, image_area.height))
         screen.blit(scaled, (image_area.x + pos[0], image_area.y + pos[1]))
         
         # Botão voltar
@@ -1005,6 +1143,7 @@ def show_meme_fullscreen(screen, image_path, audio_path):
                 return True  # Indica que deve encerrar
             
             if event.type == pygame.MOUSEBUTTONDOWN:
+                mouse_pos = event.pos
                 if event.button == 1:
                     if voltar_button.is_clicked(mouse_pos):
                         running = False
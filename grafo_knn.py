@@ -0,0 +1,153 @@
+"""
+Grafo de Vizinhos Mais Próximos do Catálogo
+===========================================
+
+Grafo k-NN pré-calculado sobre os embeddings de imagens e de áudios, guardado em formato CSR
+compacto (arrays int32 indptr/indices). A mutação que troca a imagem ou o áudio de um meme
+por um vizinho vira um passeio aleatório nesse grafo: cada passo custa O(1) e não precisa
+de nenhum cálculo de distância.
+
+Funcionalidades principais:
+- Construção exata em blocos de produtos de matrizes (memória bloco × n)
+- Vizinhos ordenados do mais próximo para o mais distante
+- Passeio aleatório limitado aos `largura` vizinhos mais próximos de cada nó
+- Arquivos .npz com a impressão digital do catálogo (nomes e conteúdo dos embeddings), para
+  detectar grafos desatualizados, gravados de forma atômica
+
+Uso:
+    python grafo_knn.py --k 16
+"""
+
+import argparse
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+
+K_PADRAO = 16
+PASTA_GRAFOS = "."
+
+def impressao_digital(nomes_arquivos, embeddings):
+    """
+    Identifica o catálogo (nomes e conteúdo dos embeddings) para validar um grafo salvo:
+    embeddings regenerados para os mesmos arquivos invalidam o grafo
+    """
+    embeddings = np.ascontiguousarray(embeddings)
+    digest = hashlib.sha256()
+    digest.update(f"{embeddings.dtype.str}{embeddings.shape}".encode())
+    digest.update(embeddings.tobytes())
+    for nome in nomes_arquivos:
+        digest.update(str(nome).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+class GrafoKNN:
+    def __init__(self, indptr, indices, impressao=None):
+        self.indptr = np.asarray(indptr, dtype=np.int32)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.impressao = impressao
+
+    @property
+    def n(self):
+        return len(self.indptr) - 1
+
+    def vizinhos(self, i):
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def passeio(self, i, passos, rng, largura=None):
+        """Anda `passos` arestas a partir de i, cada uma sorteada entre os `largura` vizinhos mais próximos"""
+        for _ in range(passos):
+            inicio, fim = self.indptr[i], self.indptr[i + 1]
+            if largura is not None:
+                fim = min(fim, inicio + largura)
+            if fim == inicio:
+                break
+            i = int(self.indices[inicio + rng.integers(fim - inicio)])
+        return i
+
+    def salvar(self, arquivo):
+        """
+        Grava em um temporário da mesma pasta e troca de uma vez (os.replace): processos em
+        paralelo que constroem o mesmo grafo nunca leem um .npz pela metade
+        """
+        descritor, temporario = tempfile.mkstemp(dir=os.path.dirname(arquivo) or ".",
+                                                 prefix=os.path.basename(arquivo) + ".", suffix=".tmp")
+        try:
+            with os.fdopen(descritor, 'wb') as f:
+                np.savez(f, indptr=self.indptr, indices=self.indices, impressao=np.array(self.impressao or ""))
+            os.replace(temporario, arquivo)
+        except BaseException:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            raise
+
+    @classmethod
+    def carregar(cls, arquivo):
+        with np.load(arquivo) as dados:
+            return cls(dados['indptr'], dados['indices'], str(dados['impressao']) or None)
+
+def construir_grafo(embeddings, k=K_PADRAO, bloco=1024, impressao=None):
+    """Calcula os k vizinhos mais próximos (distância euclidiana, sem o próprio nó) de cada linha"""
+    x = np.asarray(embeddings, dtype=np.float64)
+    n = len(x)
+    k = min(k, n - 1)
+    normas = np.einsum('ij,ij->i', x, x)
+    indices = np.empty((n, k), dtype=np.int32)
+    for inicio in range(0, n, bloco):
+        fim = min(inicio + bloco, n)
+        # ||a - b||² = ||a||² + ||b||² - 2 a·b
+        d2 = normas[inicio:fim, None] + normas[None, :] - 2 * (x[inicio:fim] @ x.T)
+        d2[np.arange(fim - inicio), np.arange(inicio, fim)] = np.inf
+        if k < n - 1:
+            candidatos = np.argpartition(d2, k, axis=1)[:, :k]
+        else:
+            candidatos = np.tile(np.arange(n), (fim - inicio, 1))
+        ordem = np.argsort(np.take_along_axis(d2, candidatos, axis=1), axis=1)[:, :k]
+        indices[inicio:fim] = np.take_along_axis(candidatos, ordem, axis=1)
+    indptr = np.arange(0, n * k + 1, k, dtype=np.int32)
+    return GrafoKNN(indptr, indices.ravel(), impressao)
+
+def arquivo_grafo(tipo, pasta=PASTA_GRAFOS):
+    return os.path.join(pasta, f"grafo_knn_{tipo}.npz")
+
+def obter_grafo(tipo, nomes_arquivos, embeddings, k=K_PADRAO, pasta=PASTA_GRAFOS, salvar=True):
+    """
+    Carrega o grafo salvo se ele corresponde ao catálogo atual; senão constrói e salva
+    um novo (o que só acontece na primeira execução ou depois de mudanças no catálogo).
+    """
+    impressao = impressao_digital(nomes_arquivos, embeddings)
+    arquivo = arquivo_grafo(tipo, pasta)
+    if os.path.exists(arquivo):
+        try:
+            grafo = GrafoKNN.carregar(arquivo)
+            if grafo.impressao == impressao and len(grafo.vizinhos(0)) >= min(k, grafo.n - 1):
+                return grafo
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Grafo inválido em {arquivo} ({e}), reconstruindo")
+    grafo = construir_grafo(embeddings, k, impressao=impressao)
+    if salvar:
+        try:
+            grafo.salvar(arquivo)
+        except OSError as e:
+            print(f"Não foi possível salvar {arquivo}: {e}")
+    return grafo
+
+if __name__ == "__main__":
+    import time
+
+    parser = argparse.ArgumentParser(description="Constrói os grafos k-NN do catálogo usado por evolutivo.py")
+    parser.add_argument("--k", type=int, default=K_PADRAO)
+    args = parser.parse_args()
+
+    # O catálogo é o mesmo que o algoritmo carrega (inclusive a validação dos arquivos)
+    from evolutivo import catalogo
+
+    for tipo, nomes, embeddings in (('imagens', catalogo.arquivos_imagens, catalogo.emb_imagens),
+                                    ('audios', catalogo.arquivos_audios, catalogo.emb_audios)):
+        inicio = time.perf_counter()
+        grafo = construir_grafo(embeddings, args.k, impressao=impressao_digital(nomes, embeddings))
+        grafo.salvar(arquivo_grafo(tipo))
+        tamanho = grafo.indptr.nbytes + grafo.indices.nbytes
+        print(f"{tipo}: {grafo.n} nós, k={args.k}, {tamanho / 1024:.0f} KB, "
+              f"{time.perf_counter() - inicio:.2f}s -> {arquivo_grafo(tipo)}")
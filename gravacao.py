@@ -0,0 +1,271 @@
+"""
+Gravação e Reprodução de Sessões de Avaliação
+=============================================
+
+Grava cada chamada de avaliação de uma sessão real (par mostrado, nota ou pulo, tempo de
+resposta) em um arquivo de trilha compacto e reproduz a trilha contra o motor atual, sem
+interface e sem esperas, para comparar vazão e qualidade de mudanças no algoritmo com
+notas de pessoas reais.
+
+Funcionalidades principais:
+- Gravador que envolve qualquer função avaliar(img_idx, aud_idx, top3) -> (nota, encerrar)
+- Trilha em JSON Lines comprimido com gzip: um cabeçalho (parâmetros da sessão e versão do
+  catálogo) e uma linha por avaliação; os pares são gravados pelo nome dos arquivos, então a
+  trilha continua válida depois de mudanças no catálogo
+- Reprodução com as notas gravadas; pares que a sessão original nunca avaliou recebem a
+  nota do par avaliado mais próximo (distância dos embeddings de imagem mais a dos áudios,
+  cada uma na escala da sua modalidade)
+- Leitura de trilhas de sessões interrompidas, que ficam sem o final do gzip: valem todas
+  as linhas descarregadas até a interrupção
+- Relatório de vazão do motor e de qualidade dos memes mostrados
+
+Uso:
+    python gravacao.py gravacoes/sessao_20240101_120000_3f9a1c2e.jsonl.gz
+    python gravacao.py gravacoes/sessao_20240101_120000_3f9a1c2e.jsonl.gz --parametro modo_evolucao=estacionario
+"""
+
+import argparse
+import gzip
+import json
+import os
+import time
+import uuid
+import zlib
+
+import numpy as np
+
+VERSAO_TRILHA = 1
+PASTA_GRAVACOES = "gravacoes"
+
+def arquivo_nova_gravacao(pasta=PASTA_GRAVACOES, sessao=None):
+    """
+    Caminho de uma trilha nova. O identificador da sessão (ou, sem ele, o instante com um
+    sufixo aleatório) evita que sessões iniciadas no mesmo segundo dividam o arquivo.
+    """
+    os.makedirs(pasta, exist_ok=True)
+    if sessao is None:
+        sessao = f"{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+    return os.path.join(pasta, f"sessao_{sessao}.jsonl.gz")
+
+class Gravador:
+    """
+    Envolve uma função avaliar e grava cada chamada. As linhas são descarregadas no disco a
+    cada avaliação, então uma sessão interrompida mantém tudo o que foi avaliado até ali.
+    """
+
+    def __init__(self, avaliar, catalogo, arquivo=None, metadados=None):
+        self.avaliar = avaliar
+        self.catalogo = catalogo
+        self.arquivo = arquivo_nova_gravacao() if arquivo is None else arquivo
+        # 'x' falha em vez de sobrescrever a trilha de outra sessão
+        self._saida = gzip.open(self.arquivo, 'xt', encoding='utf-8')
+        self._inicio = time.perf_counter()
+        self._escrever({
+            'versao': VERSAO_TRILHA,
+            'inicio': time.time(),
+            'catalogo': catalogo.versao,
+            'parametros': metadados or {},
+        })
+
+    def _escrever(self, registro):
+        self._saida.write(json.dumps(registro, ensure_ascii=False, separators=(',', ':')) + '\n')
+        self._saida.flush()
+
+    def __call__(self, img_idx, aud_idx, top3_memes):
+        inicio = time.perf_counter()
+        nota, encerrar = self.avaliar(img_idx, aud_idx, top3_memes)
+        # [instante, imagem, áudio, nota (null = pulado), segundos de resposta, encerrar]
+        self._escrever([round(inicio - self._inicio, 3), self.catalogo.arquivos_imagens[img_idx],
+                        self.catalogo.arquivos_audios[aud_idx], nota, round(time.perf_counter() - inicio, 3),
+                        encerrar])
+        return nota, encerrar
+
+    def fechar(self):
+        if not self._saida.closed:
+            self._saida.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.fechar()
+
+def _linhas_completas(f):
+    """
+    Linhas de um arquivo gzip aberto em modo texto. Uma trilha de sessão interrompida não tem o
+    final do gzip: a leitura para na última linha descarregada em vez de lançar EOFError.
+    """
+    while True:
+        try:
+            linha = f.readline()
+        except (EOFError, gzip.BadGzipFile, zlib.error):
+            print(f"Trilha {f.name} incompleta (sessão interrompida); usando as linhas gravadas até ali")
+            return
+        if not linha:
+            return
+        if linha.endswith('\n'):
+            yield linha
+
+def carregar_trilha(arquivo):
+    """Retorna (cabeçalho, lista de avaliações como dicionários)"""
+    with gzip.open(arquivo, 'rt', encoding='utf-8') as f:
+        linhas = _linhas_completas(f)
+        cabecalho = json.loads(next(linhas))
+        avaliacoes = []
+        for linha in linhas:
+            if not linha.strip():
+                continue
+            instante, imagem, audio, nota, segundos, encerrar = json.loads(linha)
+            avaliacoes.append({'instante': instante, 'imagem': imagem, 'audio': audio, 'nota': nota,
+                               'segundos': segundos, 'encerrar': encerrar})
+    return cabecalho, avaliacoes
+
+class AvaliadorReplay:
+    """
+    Responde às avaliações com as notas gravadas. A reprodução encerra depois do mesmo número
+    de avaliações da sessão original, que é o orçamento de atenção daquela pessoa.
+    """
+
+    def __init__(self, avaliacoes, catalogo, max_avaliacoes=None):
+        self.catalogo = catalogo
+        indice_imagens = {nome: i for i, nome in enumerate(catalogo.arquivos_imagens)}
+        indice_audios = {nome: i for i, nome in enumerate(catalogo.arquivos_audios)}
+
+        # Última resposta de cada par ainda presente no catálogo
+        self.gravadas = {}
+        for avaliacao in avaliacoes:
+            if avaliacao['encerrar']:
+                continue
+            img_idx = indice_imagens.get(avaliacao['imagem'])
+            aud_idx = indice_audios.get(avaliacao['audio'])
+            if img_idx is not None and aud_idx is not None:
+                self.gravadas[(img_idx, aud_idx)] = avaliacao['nota']
+
+        respondidas = sum(1 for a in avaliacoes if not a['encerrar'])
+        self.max_avaliacoes = respondidas if max_avaliacoes is None else max_avaliacoes
+
+        # Só os pares com nota servem de vizinho para os pares nunca avaliados
+        com_nota = [(par, nota) for par, nota in self.gravadas.items() if nota is not None]
+        self._notas_vizinhos = np.array([nota for _, nota in com_nota], dtype=float)
+        imagens = np.array([par[0] for par, _ in com_nota], dtype=int)
+        audios = np.array([par[1] for par, _ in com_nota], dtype=int)
+        # Distâncias de todo o catálogo às imagens e aos áudios avaliados, uma vez só
+        self._dist_imagens = self._distancias('imagens', imagens)
+        self._dist_audios = self._distancias('audios', audios)
+
+        self.avaliacoes = 0
+        self.exatas = 0
+        self.aproximadas = 0
+        self.puladas = 0
+        self.notas = []
+
+    def _distancias(self, tipo, indices):
+        """Distância ao quadrado de cada item do catálogo a cada item de indices, em desvios-padrão"""
+        catalogo = self.catalogo
+        embeddings = catalogo.embeddings(tipo)
+        normas = catalogo.normas(tipo)
+        d2 = normas[:, None] + normas[None, indices] - 2 * (embeddings @ embeddings[indices].T)
+        escala = catalogo.desvio(tipo) ** 2 * embeddings.shape[1]
+        return np.maximum(d2, 0) / escala
+
+    def nota_mais_proxima(self, img_idx, aud_idx):
+        if not len(self._notas_vizinhos):
+            return None
+        distancias = self._dist_imagens[img_idx] + self._dist_audios[aud_idx]
+        return float(self._notas_vizinhos[np.argmin(distancias)])
+
+    def __call__(self, img_idx, aud_idx, top3_memes):
+        if self.avaliacoes >= self.max_avaliacoes:
+            return None, True
+        self.avaliacoes += 1
+        par = (img_idx, aud_idx)
+        if par in self.gravadas:
+            self.exatas += 1
+            nota = self.gravadas[par]
+        else:
+            self.aproximadas += 1
+            nota = self.nota_mais_proxima(img_idx, aud_idx)
+        if nota is None:
+            self.puladas += 1
+        else:
+            self.notas.append(nota)
+        return nota, False
+
+    def metricas(self):
+        notas = sorted(self.notas, reverse=True)
+        return {
+            'avaliacoes': self.avaliacoes,
+            'exatas': self.exatas,
+            'aproximadas': self.aproximadas,
+            'puladas': self.puladas,
+            'nota_media': float(np.mean(notas)) if notas else None,
+            'melhor_nota': notas[0] if notas else None,
+            'media_top3': float(np.mean(notas[:3])) if notas else None,
+        }
+
+def metricas_gravadas(avaliacoes):
+    """As mesmas métricas de qualidade para a sessão original"""
+    notas = sorted((a['nota'] for a in avaliacoes if not a['encerrar'] and a['nota'] is not None), reverse=True)
+    respondidas = [a for a in avaliacoes if not a['encerrar']]
+    return {
+        'avaliacoes': len(respondidas),
+        'puladas': sum(1 for a in respondidas if a['nota'] is None),
+        'nota_media': float(np.mean(notas)) if notas else None,
+        'melhor_nota': notas[0] if notas else None,
+        'media_top3': float(np.mean(notas[:3])) if notas else None,
+        'segundos_humanos': float(sum(a['segundos'] for a in respondidas)),
+    }
+
+def reproduzir(arquivo, semente=0, catalogo=None, **parametros):
+    """
+    Reproduz a trilha com uma nova SessaoEvolutiva. Os parâmetros gravados no cabeçalho são
+    usados como padrão e podem ser trocados por argumentos nomeados. Retorna um dicionário
+    com as métricas da reprodução e as da sessão original.
+    """
+    import evolutivo
+    from telemetria import Telemetria
+
+    cabecalho, avaliacoes = carregar_trilha(arquivo)
+    gravados = {nome: valor for nome, valor in cabecalho.get('parametros', {}).items()
+                if nome in evolutivo.PARAMETROS_SESSAO}
+    parametros = {**gravados, 'verboso': False, 'modo_pipeline': False, **parametros}
+    sessao = evolutivo.SessaoEvolutiva(catalogo, semente=semente, telemetria=Telemetria(ativa=False), **parametros)
+    if cabecalho.get('catalogo') != sessao.catalogo.versao:
+        print("Aviso: o catálogo mudou desde a gravação; pares com arquivos removidos são ignorados")
+
+    avaliador = AvaliadorReplay(avaliacoes, sessao.catalogo)
+    inicio = time.perf_counter()
+    sessao.executar(avaliador, max_avaliacoes=avaliador.max_avaliacoes)
+    segundos = time.perf_counter() - inicio
+
+    reproducao = avaliador.metricas()
+    reproducao['segundos_motor'] = segundos
+    reproducao['avaliacoes_por_segundo'] = avaliador.avaliacoes / segundos if segundos else None
+    return {'parametros': parametros, 'reproducao': reproducao, 'original': metricas_gravadas(avaliacoes)}
+
+def _converter(texto):
+    for tipo in (int, float):
+        try:
+            return tipo(texto)
+        except ValueError:
+            pass
+    return {'True': True, 'False': False}.get(texto, texto)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reproduz uma sessão gravada contra o motor atual")
+    parser.add_argument("trilha", help="arquivo .jsonl.gz gravado por evolutivo.py")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--parametro", action='append', default=[], metavar="NOME=VALOR",
+                        help="troca um parâmetro da SessaoEvolutiva (pode repetir)")
+    args = parser.parse_args()
+
+    parametros = {}
+    for especificacao in args.parametro:
+        nome, _, valor = especificacao.partition('=')
+        parametros[nome] = _converter(valor)
+
+    resultado = reproduzir(args.trilha, args.semente, **parametros)
+    for secao in ('original', 'reproducao'):
+        print(f"\n=== {secao} ===")
+        for chave, valor in resultado[secao].items():
+            print(f"{chave}: {valor}")
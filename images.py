@@ -7,73 +7,58 @@ Permite buscar imagens por termo e baixar em lote para uso no sistema de memes e
 
 Funcionalidades:
 - Busca de imagens no Pinterest por termo
-- Scroll automático para carregar mais resultados
+- Scroll automático para carregar mais resultados, com espera adaptativa (via rolagem.py)
 - Download de imagens em alta resolução
+- Download em lote concorrente, retomável e com deduplicação (via baixador.py)
 - Organização automática em pasta de destino
 
 Nota: Este script é opcional e usado apenas para coletar o dataset inicial de imagens.
 """
 
+import hashlib
 import os
-import time
 import requests
 from selenium import webdriver
-from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
-from selenium.common.exceptions import StaleElementReferenceException
+from baixador import BaixadorHTTP
+from rolagem import colher_com_rolagem
 
-def coletar_urls_pinterest(driver, termo_busca, total_desejado):
+# Assinaturas dos formatos de imagem aceitos
+ASSINATURAS_IMAGEM = (b'\xff\xd8\xff', b'\x89PNG\r\n\x1a\n', b'GIF87a', b'GIF89a')
+
+def _melhor_url_srcset(srcset):
+    """Escolhe no srcset a URL de maior resolução ('originals', senão '736x')"""
+    # O srcset contém vários URLs. Vamos pegar o de maior resolução.
+    urls_list = [url.strip() for url in srcset.split(',')]
+
+    url_encontrada = ''
+    for url_with_size in urls_list:
+        # Extrai a URL
+        url = url_with_size.split(' ')[0]
+        if 'originals' in url:
+            return url # Encontramos a melhor qualidade, podemos parar de procurar
+        elif '736x' in url:
+            url_encontrada = url # Prioriza 736x se 'originals' não for encontrado
+    return url_encontrada or None
+
+def coletar_urls_pinterest(driver, termo_busca, total_desejado, tempo_sem_progresso=10):
     """
     Coleta URLs de imagens do Pinterest para um termo de busca, rolando a página.
+    A espera após cada rolagem termina assim que novas imagens aparecem.
     """
     url_busca = f'https://br.pinterest.com/search/pins/?q={termo_busca.replace(" ", "%20")}'
     driver.get(url_busca)
     
     print(f"Iniciando a coleta de até {total_desejado} imagens para '{termo_busca}'...")
     
-    urls_coletadas = set()
-    
-    while len(urls_coletadas) < total_desejado:
-        try:
-            # Encontra todas as tags <img> com a classe específica para imagens de pin
-            elementos_imagens = driver.find_elements(By.CLASS_NAME, 'hCL')
-            
-            for img in elementos_imagens:
-                srcset = img.get_attribute('srcset')
-                if srcset:
-                    # O srcset contém vários URLs. Vamos pegar o de maior resolução.
-                    # Geralmente é o que tem 'originals' ou a maior largura.
-                    urls_list = [url.strip() for url in srcset.split(',')]
-                    
-                    # Encontra a URL com a maior resolução
-                    url_encontrada = ''
-                    for url_with_size in urls_list:
-                        # Extrai a URL
-                        url = url_with_size.split(' ')[0]
-                        if 'originals' in url:
-                            url_encontrada = url
-                            break # Encontramos a melhor qualidade, podemos parar de procurar
-                        elif '736x' in url:
-                             url_encontrada = url # Prioriza 736x se 'originals' não for encontrado
-                        
-                    if url_encontrada:
-                        urls_coletadas.add(url_encontrada)
-
-        except StaleElementReferenceException:
-            print("Elemento obsoleto, tentando novamente...")
-            continue
-            
-        print(f"URLs encontradas: {len(urls_coletadas)} de {total_desejado}")
-        
-        if len(urls_coletadas) >= total_desejado:
-            break
-            
-        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(3) 
+    # Tags <img> com a classe específica para imagens de pin
+    urls_coletadas = colher_com_rolagem(driver, 'img.hCL', 'srcset', total_desejado,
+                                        processar=_melhor_url_srcset,
+                                        tempo_sem_progresso=tempo_sem_progresso)
 
     print(f"Coleta finalizada. Total de URLs únicas encontradas: {len(urls_coletadas)}")
-    return list(urls_coletadas)
+    return urls_coletadas
 
 def baixar_imagem_da_url(url_imagem, caminho_destino, nome_arquivo):
     """
@@ -92,6 +77,39 @@ def baixar_imagem_da_url(url_imagem, caminho_destino, nome_arquivo):
     except Exception as e:
         print(f"Erro ao baixar a imagem {url_imagem}: {e}")
 
+def verificar_imagem(caminho):
+    """Confere se o arquivo baixado começa com a assinatura de um formato de imagem"""
+    with open(caminho, 'rb') as f:
+        cabecalho = f.read(12)
+    if cabecalho.startswith(b'RIFF') and cabecalho[8:12] == b'WEBP':
+        return True
+    return cabecalho.startswith(ASSINATURAS_IMAGEM)
+
+def nome_arquivo_imagem(url, termo_busca):
+    """
+    Nome derivado da própria URL (hash curto), então a mesma URL recebe sempre o mesmo nome e
+    uma URL nova nunca sobrescreve o arquivo de outra
+    """
+    # Obtém a extensão do arquivo da URL (ex: .jpg, .png)
+    extensao = os.path.splitext(url)[1].split('?')[0]
+    resumo = hashlib.sha1(url.encode('utf-8')).hexdigest()[:12]
+    return f"{termo_busca.replace(' ', '_')}_{resumo}{extensao}"
+
+def baixar_imagens_em_lote(urls, caminho_destino, termo_busca, max_workers=16, max_por_host=8,
+                           intervalo_por_host=0.05, tentativas=4):
+    """
+    Baixa várias imagens em paralelo com uma sessão HTTP compartilhada. O progresso fica em
+    um manifesto na pasta de destino, então uma execução interrompida continua de onde parou
+    e imagens com conteúdo idêntico são gravadas uma única vez.
+    """
+    baixador = BaixadorHTTP(caminho_destino, max_workers=max_workers, max_por_host=max_por_host,
+                            intervalo_por_host=intervalo_por_host, tentativas=tentativas,
+                            verificar=verificar_imagem)
+    # URLs já registradas no manifesto mantêm o nome com que foram baixadas
+    itens = [(url, baixador.manifesto.get(url, {}).get('arquivo') or nome_arquivo_imagem(url, termo_busca))
+             for url in urls]
+    return baixador.baixar(itens)
+
 if __name__ == "__main__":
     TERMO_BUSCA = "figurinha"
     TOTAL_IMAGENS_DESEJADO = 100
@@ -109,12 +127,8 @@ if __name__ == "__main__":
         lista_de_urls = coletar_urls_pinterest(driver, TERMO_BUSCA, TOTAL_IMAGENS_DESEJADO)
         
         print(f"\nIniciando o download de {len(lista_de_urls)} imagens.")
-        for i, url in enumerate(lista_de_urls):
-            # Obtém a extensão do arquivo da URL (ex: .jpg, .png)
-            extensao = os.path.splitext(url)[1].split('?')[0]
-            nome_arquivo = f"{TERMO_BUSCA.replace(' ', '_')}_{i+1}{extensao}"
-            baixar_imagem_da_url(url, CAMINHO_DESTINO, nome_arquivo)
-            time.sleep(1) # Pausa para não sobrecarregar o servidor
+        resumo = baixar_imagens_em_lote(sorted(lista_de_urls), CAMINHO_DESTINO, TERMO_BUSCA)
+        print(f"Resumo: {resumo}")
             
         print("\nTodos os downloads foram processados. Verifique a pasta de destino.")
             
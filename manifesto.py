@@ -0,0 +1,209 @@
+"""
+Manifesto do Catálogo
+=====================
+
+Módulo que registra, para cada linha dos CSVs de embeddings, o arquivo correspondente em
+imagens/ ou audios/ e verifica se ele pode ser exibido. Sem essa verificação, um arquivo
+ausente ou corrompido só aparece na hora da avaliação (imagem cinza ou áudio mudo),
+desperdiçando a nota do usuário.
+
+Funcionalidades principais:
+- Caminho, tamanho, mtime, hash SHA-256, dimensões da imagem ou duração do áudio e linha
+  do embedding de cada arquivo
+- Varredura inicial em paralelo
+- Revalidação incremental: só os arquivos com mtime ou tamanho alterado são abertos de novo
+- Nomes de arquivo repetidos no mesmo CSV são detectados e relatados; só a primeira linha vale
+- Filtro que remove do catálogo as linhas com arquivo ausente, corrompido, repetido ou com
+  embedding inválido (usado por evolutivo.py na inicialização, que repassa os índices das
+  linhas válidas aos processos auxiliares)
+
+Uso:
+    python manifesto.py
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+ARQUIVO_MANIFESTO = "manifesto_catalogo.json"
+PASTAS = {'imagens': "imagens", 'audios': "audios"}
+
+def _iniciar_worker():
+    # Cada processo usa os drivers dummy do SDL e inicializa o mixer uma vez
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import pygame
+    if not pygame.mixer.get_init():
+        pygame.mixer.init(frequency=44100, size=-16, channels=2)
+
+def _sha256(caminho):
+    digest = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1 << 20), b''):
+            digest.update(bloco)
+    return digest.hexdigest()
+
+def inspecionar_arquivo(caminho, tipo):
+    """Abre o arquivo e retorna seus metadados; arquivos que não abrem ficam com status 'corrompido'"""
+    import pygame
+    info = os.stat(caminho)
+    registro = {
+        'caminho': caminho,
+        'bytes': info.st_size,
+        'mtime': info.st_mtime,
+        'sha256': _sha256(caminho),
+        'status': 'ok',
+    }
+    try:
+        if tipo == 'imagens':
+            largura, altura = pygame.image.load(caminho).get_size()
+            registro['largura'] = largura
+            registro['altura'] = altura
+        else:
+            registro['duracao'] = pygame.mixer.Sound(caminho).get_length()
+    except Exception as e:
+        registro['status'] = 'corrompido'
+        registro['erro'] = str(e)
+    return registro
+
+def _inspecionar(args):
+    return inspecionar_arquivo(*args)
+
+def carregar_manifesto(arquivo=ARQUIVO_MANIFESTO):
+    if os.path.exists(arquivo):
+        try:
+            with open(arquivo, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Manifesto inválido ({e}), começando do zero")
+    return {tipo: {} for tipo in PASTAS}
+
+def salvar_manifesto(manifesto, arquivo=ARQUIVO_MANIFESTO):
+    temporario = arquivo + ".tmp"
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, indent=1, ensure_ascii=False)
+    os.replace(temporario, arquivo)
+
+def _inalterado(registro, info):
+    return registro is not None and 'sha256' in registro and \
+        registro['mtime'] == info.st_mtime and registro['bytes'] == info.st_size
+
+def atualizar_manifesto(catalogos, manifesto=None, pastas=PASTAS, max_workers=None):
+    """
+    Atualiza o manifesto para os catálogos {'imagens': df, 'audios': df} (DataFrames com a
+    coluna 'filename' e as colunas 'dim_*'). Cada arquivo só é aberto de novo se o mtime ou o
+    tamanho mudaram desde a última varredura. Um nome repetido no mesmo CSV fica com a primeira
+    linha; as demais são registradas em 'linhas_duplicadas' e não entram no catálogo.
+    Retorna (manifesto, quantidade reinspecionada).
+    """
+    if manifesto is None:
+        manifesto = {tipo: {} for tipo in PASTAS}
+
+    pendentes = []
+    for tipo, df in catalogos.items():
+        anteriores = manifesto.get(tipo, {})
+        embeddings_validos = np.isfinite(df.filter(like='dim_').to_numpy(dtype=float)).all(axis=1)
+        atual = {}
+        for linha, nome in enumerate(df['filename']):
+            if nome in atual:
+                atual[nome].setdefault('linhas_duplicadas', []).append(linha)
+                continue
+            caminho = os.path.join(pastas[tipo], nome)
+            try:
+                info = os.stat(caminho)
+            except OSError:
+                atual[nome] = {'caminho': caminho, 'linha': linha, 'status': 'ausente'}
+                continue
+            registro = anteriores.get(nome)
+            if _inalterado(registro, info):
+                registro = dict(registro, linha=linha)
+                registro.pop('linhas_duplicadas', None)
+            else:
+                registro = {'caminho': caminho, 'linha': linha}
+                pendentes.append((tipo, nome, caminho))
+            atual[nome] = registro
+            if not embeddings_validos[linha]:
+                registro['embedding_invalido'] = True
+            else:
+                registro.pop('embedding_invalido', None)
+        manifesto[tipo] = atual
+
+    if pendentes:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_iniciar_worker) as executor:
+            tarefas = [(caminho, tipo) for tipo, _, caminho in pendentes]
+            for (tipo, nome, _), registro in zip(pendentes, executor.map(_inspecionar, tarefas, chunksize=8)):
+                manifesto[tipo][nome].update(registro)
+    return manifesto, len(pendentes)
+
+def linhas_validas(manifesto, tipo, total):
+    """Máscara booleana das linhas do catálogo que podem ser exibidas"""
+    validas = np.zeros(total, dtype=bool)
+    for registro in manifesto[tipo].values():
+        if registro.get('status') == 'ok' and not registro.get('embedding_invalido'):
+            validas[registro['linha']] = True
+    return validas
+
+def problemas(manifesto):
+    """Lista (tipo, nome, motivo) das entradas que seriam removidas do catálogo"""
+    encontrados = []
+    for tipo, registros in manifesto.items():
+        for nome, registro in registros.items():
+            if registro.get('status') != 'ok':
+                encontrados.append((tipo, nome, registro.get('erro', registro.get('status'))))
+            elif registro.get('embedding_invalido'):
+                encontrados.append((tipo, nome, 'embedding inválido'))
+            if registro.get('linhas_duplicadas'):
+                encontrados.append((tipo, nome, f"nome repetido no CSV: linhas {registro['linhas_duplicadas']} "
+                                                f"ignoradas, vale a linha {registro['linha']}"))
+    return encontrados
+
+def linhas_exibiveis(df_imagens, df_audios, arquivo=ARQUIVO_MANIFESTO):
+    """
+    Atualiza o manifesto e retorna os índices das linhas de cada CSV que podem ser exibidas.
+    Processos auxiliares devem receber esses índices (ou o catálogo já filtrado) de quem os
+    criou, para que as linhas de todos os processos correspondam às mesmas do pai.
+    Um manifesto que não pode ser gravado não impede o uso das linhas válidas.
+    """
+    manifesto, reinspecionados = atualizar_manifesto(
+        {'imagens': df_imagens, 'audios': df_audios}, carregar_manifesto(arquivo))
+    if reinspecionados:
+        try:
+            salvar_manifesto(manifesto, arquivo)
+        except OSError as e:
+            print(f"Não foi possível salvar o manifesto: {e}")
+
+    for tipo, nome, motivo in problemas(manifesto):
+        print(f"Removido do catálogo ({tipo}): {nome} - {motivo}")
+    return (np.flatnonzero(linhas_validas(manifesto, 'imagens', len(df_imagens))),
+            np.flatnonzero(linhas_validas(manifesto, 'audios', len(df_audios))))
+
+def filtrar_catalogo(df_imagens, df_audios, arquivo=ARQUIVO_MANIFESTO):
+    """Catálogos sem as linhas quebradas, com o índice refeito (ver linhas_exibiveis)"""
+    linhas_img, linhas_aud = linhas_exibiveis(df_imagens, df_audios, arquivo)
+    return df_imagens.iloc[linhas_img].reset_index(drop=True), df_audios.iloc[linhas_aud].reset_index(drop=True)
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Gera o manifesto do catálogo e lista as entradas quebradas")
+    parser.add_argument("--imagens", default="image_embeddings.csv")
+    parser.add_argument("--audios", default="audio_embeddings.csv")
+    parser.add_argument("--saida", default=ARQUIVO_MANIFESTO)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    catalogos = {'imagens': pd.read_csv(args.imagens), 'audios': pd.read_csv(args.audios)}
+    manifesto, reinspecionados = atualizar_manifesto(catalogos, carregar_manifesto(args.saida),
+                                                     max_workers=args.workers)
+    salvar_manifesto(manifesto, args.saida)
+
+    encontrados = problemas(manifesto)
+    for tipo, nome, motivo in encontrados:
+        print(f"{tipo}: {nome} - {motivo}")
+    total = sum(len(r) for r in manifesto.values())
+    print(f"{total} entradas, {reinspecionados} reinspecionadas, {len(encontrados)} com problema")
+    print(f"Manifesto salvo em {args.saida}")
@@ -0,0 +1,248 @@
+"""
+Modelo de Compatibilidade entre Imagens e Áudios
+================================================
+
+Modelo de fatoração de baixo posto que prevê a nota de qualquer par (imagem, áudio) a partir
+das notas já dadas. O algoritmo evolutivo só conhece os pares que ele mesmo gera; o modelo
+pontua todas as combinações do catálogo e sugere os pares inéditos mais promissores.
+
+    nota ≈ média + viés_imagem + viés_audio + <u_imagem, v_audio>
+    viés_imagem = X_imagem · w + b_imagem    viés_audio = Y_audio · z + c_audio
+    u = X_imagem · A + P_imagem              v = Y_audio · B + Q_audio
+
+X e Y são os embeddings padronizados e reduzidos por PCA, então imagens e áudios parecidos
+começam com fatores e vieses parecidos e pares nunca avaliados também recebem uma previsão.
+P, Q, b e c são ajustes livres por item, aprendidos e guardados só para os itens que receberam notas.
+
+Funcionalidades principais:
+- Ajuste incremental por SGD em mini-lotes a cada nova nota
+- Previsão vetorizada para listas de pares
+- Top-k de todos os pares (ou dos áudios de uma imagem) em blocos de produtos de matrizes,
+  sem materializar a matriz inteira de pontuações
+"""
+
+import copy
+
+import numpy as np
+
+DIM_ATRIBUTOS = 32
+
+def calcular_atributos(embeddings, dimensao=DIM_ATRIBUTOS):
+    """Padroniza os embeddings e projeta nas primeiras componentes principais"""
+    x = np.asarray(embeddings, dtype=np.float64)
+    x = (x - x.mean(axis=0)) / (x.std(axis=0) + 1e-8)
+    dimensao = min(dimensao, *x.shape)
+    _, _, vt = np.linalg.svd(x, full_matrices=False)
+    x = x @ vt[:dimensao].T
+    # Escala unitária por linha mantém a magnitude de u e v independente da dimensão
+    x /= np.sqrt(dimensao) * (x.std() + 1e-8)
+    return x.astype(np.float32)
+
+def _crescer(matriz):
+    """Dobra o número de linhas de matriz; as linhas novas ficam zeradas"""
+    nova = np.zeros((max(2 * len(matriz), 16),) + matriz.shape[1:], dtype=matriz.dtype)
+    nova[:len(matriz)] = matriz
+    return nova
+
+class ModeloPares:
+    def __init__(self, emb_imagens, emb_audios, rank=16, dim_atributos=DIM_ATRIBUTOS, taxa_aprendizado=0.05,
+                 regularizacao=0.02, tamanho_lote=32, rng=None, atributos=None):
+        """
+        atributos=(X, Y) reaproveita atributos já calculados por calcular_atributos (por
+        exemplo, compartilhados entre sessões); X e Y não são modificados pelo ajuste.
+        """
+        self.rng = np.random.default_rng() if rng is None else rng
+        if atributos is None:
+            atributos = (calcular_atributos(emb_imagens, dim_atributos), calcular_atributos(emb_audios, dim_atributos))
+        self.X, self.Y = atributos
+        self.rank = rank
+        self.taxa_aprendizado = taxa_aprendizado
+        self.regularizacao = regularizacao
+        self.tamanho_lote = tamanho_lote
+
+        escala = 0.1
+        self.A = (self.rng.normal(0, escala, (self.X.shape[1], rank))).astype(np.float32)
+        self.B = (self.rng.normal(0, escala, (self.Y.shape[1], rank))).astype(np.float32)
+        self.w = np.zeros(self.X.shape[1], dtype=np.float32)
+        self.z = np.zeros(self.Y.shape[1], dtype=np.float32)
+        # P, Q, b e c só têm linhas para os itens que já receberam notas (_linha_img e
+        # _linha_aud dão a linha de cada item), então a memória da sessão não cresce com o catálogo
+        self.P = np.zeros((0, rank), dtype=np.float32)
+        self.Q = np.zeros((0, rank), dtype=np.float32)
+        self.b = np.zeros(0, dtype=np.float32)
+        self.c = np.zeros(0, dtype=np.float32)
+        self._linha_img = {}
+        self._linha_aud = {}
+
+        self._img = []
+        self._aud = []
+        self._notas = []
+
+    @property
+    def n_observacoes(self):
+        return len(self._notas)
+
+    @property
+    def media(self):
+        return float(np.mean(self._notas)) if self._notas else 0.0
+
+    def _garantir_linhas(self, img_idx, aud_idx):
+        """Cria linhas zeradas de P e b (Q e c) para uma imagem (áudio) ainda sem notas"""
+        if img_idx not in self._linha_img:
+            self._linha_img[img_idx] = len(self._linha_img)
+            if len(self._linha_img) > len(self.b):
+                self.P, self.b = _crescer(self.P), _crescer(self.b)
+        if aud_idx not in self._linha_aud:
+            self._linha_aud[aud_idx] = len(self._linha_aud)
+            if len(self._linha_aud) > len(self.c):
+                self.Q, self.c = _crescer(self.Q), _crescer(self.c)
+
+    def _passo(self, img, aud, notas):
+        """Um passo de SGD sobre um mini-lote de observações"""
+        x, y = self.X[img], self.Y[aud]
+        img = np.array([self._linha_img[i] for i in img])
+        aud = np.array([self._linha_aud[a] for a in aud])
+        u = x @ self.A + self.P[img]
+        v = y @ self.B + self.Q[aud]
+        vies = x @ self.w + self.b[img] + y @ self.z + self.c[aud]
+        erro = np.clip(notas - (self.media + vies + np.sum(u * v, axis=1)), -10, 10).astype(np.float32)
+        lr = self.taxa_aprendizado
+        lr_lote = lr / len(notas)
+        reg = self.regularizacao
+
+        grad_u = erro[:, None] * v
+        grad_v = erro[:, None] * u
+        # Parâmetros compartilhados: gradiente médio do lote
+        self.A += lr_lote * (x.T @ grad_u) - lr * reg * self.A
+        self.B += lr_lote * (y.T @ grad_v) - lr * reg * self.B
+        self.w += lr_lote * (x.T @ erro) - lr * reg * self.w
+        self.z += lr_lote * (y.T @ erro) - lr * reg * self.z
+        # Parâmetros por item: itens repetidos no lote acumulam as contribuições
+        np.add.at(self.P, img, lr * (grad_u - reg * self.P[img]))
+        np.add.at(self.Q, aud, lr * (grad_v - reg * self.Q[aud]))
+        np.add.at(self.b, img, lr * (erro - reg * self.b[img]))
+        np.add.at(self.c, aud, lr * (erro - reg * self.c[aud]))
+
+    def observar(self, img_idx, aud_idx, nota, passos=20):
+        """Registra uma nota e faz alguns passos de SGD, sempre incluindo a observação nova"""
+        self._garantir_linhas(int(img_idx), int(aud_idx))
+        self._img.append(int(img_idx))
+        self._aud.append(int(aud_idx))
+        self._notas.append(float(nota))
+        n = len(self._notas)
+        img, aud, notas = np.array(self._img), np.array(self._aud), np.array(self._notas, dtype=np.float32)
+        for _ in range(passos):
+            lote = self.rng.integers(n, size=min(self.tamanho_lote, n))
+            lote[0] = n - 1
+            self._passo(img[lote], aud[lote], notas[lote])
+
+    def ajustar(self, epocas=20):
+        """Refaz o ajuste passando várias vezes por todas as observações"""
+        n = len(self._notas)
+        if n == 0:
+            return
+        img, aud, notas = np.array(self._img), np.array(self._aud), np.array(self._notas, dtype=np.float32)
+        for _ in range(epocas):
+            ordem = self.rng.permutation(n)
+            for inicio in range(0, n, self.tamanho_lote):
+                lote = ordem[inicio:inicio + self.tamanho_lote]
+                self._passo(img[lote], aud[lote], notas[lote])
+
+    @staticmethod
+    def _somar_ajustes(indices, linhas, ajuste, ajuste_vies, fatores, vies):
+        """Soma aos fatores e vieses de indices os ajustes (P e b ou Q e c) dos itens com notas"""
+        if not linhas:
+            return
+        itens = np.fromiter(linhas, dtype=np.int64, count=len(linhas))
+        ordem = np.argsort(itens)
+        posicoes = np.minimum(np.searchsorted(itens[ordem], indices), len(itens) - 1)
+        com_notas = itens[ordem][posicoes] == indices
+        linhas_ajuste = ordem[posicoes[com_notas]]
+        fatores[com_notas] += ajuste[linhas_ajuste]
+        vies[com_notas] += ajuste_vies[linhas_ajuste]
+
+    def fatores_imagens(self, img_idx):
+        """(U, viés) das imagens pedidas, calculados na hora: nada do tamanho do catálogo fica guardado"""
+        img_idx = np.asarray(img_idx, dtype=np.int64).ravel()
+        x = self.X[img_idx]
+        U, vies = x @ self.A, x @ self.w
+        self._somar_ajustes(img_idx, self._linha_img, self.P, self.b, U, vies)
+        return U, vies
+
+    def fatores_audios(self, aud_idx):
+        """(V, viés) dos áudios pedidos, calculados na hora"""
+        aud_idx = np.asarray(aud_idx, dtype=np.int64).ravel()
+        y = self.Y[aud_idx]
+        V, vies = y @ self.B, y @ self.z
+        self._somar_ajustes(aud_idx, self._linha_aud, self.Q, self.c, V, vies)
+        return V, vies
+
+    def instantaneo(self):
+        """
+        Cópia só para previsões, com os parâmetros atuais; não muda quando este modelo recebe
+        novas notas (observar não pode ser chamado nela). Só os parâmetros compartilhados e os
+        ajustes dos itens com notas são copiados.
+        """
+        copia = copy.copy(self)
+        for nome in ('A', 'B', 'w', 'z', 'P', 'Q', 'b', 'c'):
+            setattr(copia, nome, getattr(self, nome).copy())
+        copia._linha_img, copia._linha_aud = dict(self._linha_img), dict(self._linha_aud)
+        copia._img, copia._aud, copia._notas = list(self._img), list(self._aud), list(self._notas)
+        return copia
+
+    def prever(self, img_idx, aud_idx):
+        img_idx, aud_idx = np.broadcast_arrays(np.asarray(img_idx), np.asarray(aud_idx))
+        U, vies_img = self.fatores_imagens(img_idx)
+        V, vies_aud = self.fatores_audios(aud_idx)
+        previsao = self.media + vies_img + vies_aud + np.sum(U * V, axis=-1)
+        return previsao.reshape(img_idx.shape)
+
+    def _pontuar_bloco(self, imagens, V, vies_aud):
+        U, vies_img = self.fatores_imagens(imagens)
+        return (U @ V.T) + vies_img[:, None] + vies_aud[None, :] + self.media
+
+    def melhores_pares(self, k, excluir=(), bloco=256):
+        """
+        Retorna (img_idx, aud_idx, previsao) dos k pares com maior previsão, em ordem
+        decrescente, ignorando os pares em excluir. As imagens são processadas em blocos de
+        `bloco` linhas, então a memória usada é bloco × número de áudios.
+        """
+        V, vies_aud = self.fatores_audios(np.arange(len(self.Y)))
+        excluidos = {}
+        for img, aud in excluir:
+            excluidos.setdefault(int(img), []).append(int(aud))
+
+        n_aud = len(self.Y)
+        cand_img = np.empty(0, dtype=np.int64)
+        cand_aud = np.empty(0, dtype=np.int64)
+        cand_val = np.empty(0, dtype=np.float32)
+        for inicio in range(0, len(self.X), bloco):
+            imagens = np.arange(inicio, min(inicio + bloco, len(self.X)))
+            pontuacoes = self._pontuar_bloco(imagens, V, vies_aud)
+            for img in excluidos.keys() & set(range(imagens[0], imagens[-1] + 1)):
+                pontuacoes[img - inicio, excluidos[img]] = -np.inf
+            planas = pontuacoes.ravel()
+            kb = min(k, planas.size)
+            topo = np.argpartition(planas, -kb)[-kb:]
+            cand_img = np.concatenate([cand_img, imagens[topo // n_aud]])
+            cand_aud = np.concatenate([cand_aud, topo % n_aud])
+            cand_val = np.concatenate([cand_val, planas[topo]])
+            if len(cand_val) > k:
+                manter = np.argpartition(cand_val, -k)[-k:]
+                cand_img, cand_aud, cand_val = cand_img[manter], cand_aud[manter], cand_val[manter]
+
+        ordem = np.argsort(-cand_val)
+        ordem = ordem[np.isfinite(cand_val[ordem])]
+        return cand_img[ordem], cand_aud[ordem], cand_val[ordem]
+
+    def melhores_audios(self, img_idx, k, excluir=()):
+        """Retorna (aud_idx, previsao) dos k áudios com maior previsão para uma imagem"""
+        V, vies_aud = self.fatores_audios(np.arange(len(self.Y)))
+        pontuacoes = self._pontuar_bloco(np.array([img_idx]), V, vies_aud)[0]
+        if len(excluir):
+            pontuacoes[np.asarray(list(excluir))] = -np.inf
+        k = min(k, len(pontuacoes))
+        topo = np.argpartition(pontuacoes, -k)[-k:]
+        topo = topo[np.argsort(-pontuacoes[topo])]
+        topo = topo[np.isfinite(pontuacoes[topo])]
+        return topo, pontuacoes[topo]
@@ -0,0 +1,177 @@
+"""
+Normalização de Áudios na Ingestão
+==================================
+
+Script de ingestão que gera versões derivadas dos áudios do catálogo. A pasta audios/ tem
+MP3s com durações e volumes muito diferentes, decodificados a cada reprodução; clipes longos
+ou com silêncio no início atrasam a avaliação e volumes desiguais confundem a comparação.
+
+Funcionalidades principais:
+- Decodificação única de cada MP3 (pygame.mixer.Sound)
+- Remoção do silêncio no início e no fim
+- Limite opcional de duração, com fade out curto no corte
+- Normalização de volume por RMS, limitada pelo pico para não saturar
+- Saída em WAV PCM 16 bits mono, que o mixer carrega sem decodificação
+- Processamento incremental e em paralelo, com a duração registrada no manifesto JSON
+  consultado pela interface (gera_meme.py)
+
+Uso:
+    python normalizacao_audios.py --duracao-maxima 15
+"""
+
+import argparse
+import json
+import os
+import wave
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+PASTA_DERIVADOS = os.path.join("derivados", "audios")
+FREQUENCIA_DECODIFICACAO = 44100
+FREQUENCIA_SAIDA = 22050
+DURACAO_MAXIMA = 15.0  # Segundos; None mantém o clipe inteiro
+LIMIAR_SILENCIO_DB = -45.0  # Relativo ao fundo de escala
+MARGEM_SILENCIO = 0.05  # Segundos mantidos antes e depois do som
+RMS_ALVO_DB = -20.0
+PICO_MAXIMO = 0.98
+DURACAO_FADE = 0.05
+
+def _iniciar_worker():
+    # Cada processo usa os drivers dummy do SDL e inicializa o mixer uma vez
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import pygame
+    pygame.mixer.init(frequency=FREQUENCIA_DECODIFICACAO, size=-16, channels=2)
+
+def _decodificar(caminho):
+    """Retorna as amostras mono em [-1, 1] na frequência de saída"""
+    import pygame
+    som = pygame.mixer.Sound(caminho)
+    amostras = pygame.sndarray.array(som).astype(np.float32) / 32768.0
+    if amostras.ndim > 1:
+        amostras = amostras.mean(axis=1)
+    # Reamostragem simples por média de blocos
+    passo = max(1, int(round(pygame.mixer.get_init()[0] / FREQUENCIA_SAIDA)))
+    corte = len(amostras) - len(amostras) % passo
+    return amostras[:corte].reshape(-1, passo).mean(axis=1)
+
+def aparar_silencio(amostras, taxa=FREQUENCIA_SAIDA, limiar_db=LIMIAR_SILENCIO_DB, margem=MARGEM_SILENCIO):
+    """Remove o silêncio do início e do fim, medido em janelas de 10 ms"""
+    janela = max(1, int(taxa * 0.01))
+    n_janelas = len(amostras) // janela
+    if n_janelas == 0:
+        return amostras
+    rms = np.sqrt(np.mean(amostras[:n_janelas * janela].reshape(n_janelas, janela) ** 2, axis=1))
+    com_som = np.flatnonzero(rms > 10 ** (limiar_db / 20))
+    if len(com_som) == 0:
+        return amostras
+    margem = int(taxa * margem)
+    inicio = max(0, com_som[0] * janela - margem)
+    fim = min(len(amostras), (com_som[-1] + 1) * janela + margem)
+    return amostras[inicio:fim]
+
+def normalizar_volume(amostras, rms_alvo_db=RMS_ALVO_DB, pico_maximo=PICO_MAXIMO):
+    """Leva o RMS ao alvo sem deixar o pico passar de pico_maximo. Retorna (amostras, ganho em dB)."""
+    rms = np.sqrt(np.mean(amostras ** 2)) if len(amostras) else 0.0
+    pico = np.max(np.abs(amostras)) if len(amostras) else 0.0
+    if rms < 1e-6:
+        return amostras, 0.0
+    ganho = min(10 ** (rms_alvo_db / 20) / rms, pico_maximo / pico)
+    return amostras * ganho, float(20 * np.log10(ganho))
+
+def _salvar_wav(destino, amostras, taxa=FREQUENCIA_SAIDA):
+    pcm = np.clip(np.round(amostras * 32767), -32768, 32767).astype('<i2')
+    with wave.open(destino, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(taxa)
+        f.writeframes(pcm.tobytes())
+
+def gerar_derivado(caminho, pasta_saida=PASTA_DERIVADOS, duracao_maxima=DURACAO_MAXIMA):
+    """Gera o derivado de um áudio e retorna o registro do manifesto"""
+    nome = os.path.basename(caminho)
+    info = os.stat(caminho)
+    try:
+        amostras = _decodificar(caminho)
+    except Exception as e:
+        return nome, {'erro': str(e)}
+
+    duracao_original = len(amostras) / FREQUENCIA_SAIDA
+    amostras = aparar_silencio(amostras)
+    if duracao_maxima is not None and len(amostras) > duracao_maxima * FREQUENCIA_SAIDA:
+        amostras = amostras[:int(duracao_maxima * FREQUENCIA_SAIDA)].copy()
+        fade = min(len(amostras), int(DURACAO_FADE * FREQUENCIA_SAIDA))
+        amostras[len(amostras) - fade:] *= np.linspace(1.0, 0.0, fade, dtype=np.float32)
+    amostras, ganho_db = normalizar_volume(amostras)
+
+    # Manter a extensão original no nome, como nos derivados de imagem
+    destino = os.path.join(pasta_saida, nome + ".wav")
+    _salvar_wav(destino, amostras)
+    return nome, {
+        'audio': destino,
+        'duracao': len(amostras) / FREQUENCIA_SAIDA,
+        'duracao_original': duracao_original,
+        'ganho_db': ganho_db,
+        'duracao_maxima': duracao_maxima,
+        'origem_mtime': info.st_mtime,
+        'origem_bytes': info.st_size,
+    }
+
+def carregar_manifesto(arquivo):
+    if os.path.exists(arquivo):
+        with open(arquivo, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+def _atualizado(registro, caminho, duracao_maxima):
+    if not registro or 'erro' in registro:
+        return False
+    info = os.stat(caminho)
+    if registro['origem_mtime'] != info.st_mtime or registro['origem_bytes'] != info.st_size:
+        return False
+    if registro.get('duracao_maxima') != duracao_maxima:
+        return False
+    return os.path.exists(registro['audio'])
+
+def normalizar_audios(pasta_audios="audios", pasta_saida=PASTA_DERIVADOS, duracao_maxima=DURACAO_MAXIMA,
+                      max_workers=None):
+    os.makedirs(pasta_saida, exist_ok=True)
+    arquivo_manifesto = os.path.join(pasta_saida, "manifesto.json")
+    manifesto = carregar_manifesto(arquivo_manifesto)
+
+    nomes = sorted(os.listdir(pasta_audios))
+    # Entradas de arquivos que não existem mais saem do manifesto
+    manifesto = {nome: r for nome, r in manifesto.items() if nome in nomes}
+    pendentes = [os.path.join(pasta_audios, n) for n in nomes
+                 if not _atualizado(manifesto.get(n), os.path.join(pasta_audios, n), duracao_maxima)]
+    print(f"{len(pendentes)} de {len(nomes)} áudios para processar")
+
+    n = len(pendentes)
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_iniciar_worker) as executor:
+        for nome, registro in executor.map(gerar_derivado, pendentes, [pasta_saida] * n, [duracao_maxima] * n,
+                                           chunksize=4):
+            manifesto[nome] = registro
+            if 'erro' in registro:
+                print(f"Erro ao processar {nome}: {registro['erro']}")
+
+    with open(arquivo_manifesto, 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, indent=1, ensure_ascii=False)
+    validos = [r for r in manifesto.values() if 'erro' not in r]
+    if validos:
+        total = sum(r['duracao'] for r in validos)
+        original = sum(r['duracao_original'] for r in validos)
+        print(f"Duração total: {original:.0f}s -> {total:.0f}s")
+    print(f"Manifesto salvo em {arquivo_manifesto}")
+    return manifesto
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera derivados de áudio aparados e com volume normalizado")
+    parser.add_argument("--pasta", default="audios")
+    parser.add_argument("--saida", default=PASTA_DERIVADOS)
+    parser.add_argument("--duracao-maxima", type=float, default=DURACAO_MAXIMA,
+                        help="segundos; 0 mantém o clipe inteiro")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    normalizar_audios(args.pasta, args.saida, args.duracao_maxima or None, args.workers)
@@ -0,0 +1,116 @@
+"""
+Normalização de Imagens na Ingestão
+===================================
+
+Script de ingestão que gera versões derivadas das imagens do catálogo, já no tamanho em que
+a interface as exibe. A pasta imagens/ mistura JPG, PNG e WEBP em resoluções arbitrárias;
+decodificar o original e reduzi-lo a cada meme custa tempo e memória na hora da avaliação.
+
+Funcionalidades principais:
+- Derivado de exibição (cabe em 480x480, a área da imagem na tela de avaliação)
+- Miniatura (cabe em 200x200, usada na tabela Top 3 e na tela de resultados)
+- Formato único JPEG, com transparência achatada sobre a cor do card
+- Processamento incremental e em paralelo (só refaz o que mudou)
+- Manifesto JSON consultado pela interface (gera_meme.py)
+
+Uso:
+    python normalizacao_imagens.py
+"""
+
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+PASTA_DERIVADOS = os.path.join("derivados", "imagens")
+ARQUIVO_MANIFESTO = os.path.join(PASTA_DERIVADOS, "manifesto.json")
+TAMANHOS = {
+    'exibicao': (480, 480),
+    'miniatura': (200, 200),
+}
+COR_FUNDO = (255, 255, 255)  # Mesma cor dos cards da interface
+
+def _iniciar_worker():
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+def _reduzir(surface, caixa):
+    import pygame
+    sw, sh = surface.get_size()
+    escala = min(caixa[0] / sw, caixa[1] / sh, 1.0)
+    tamanho = (max(1, int(sw * escala)), max(1, int(sh * escala)))
+    return pygame.transform.smoothscale(surface, tamanho)
+
+def gerar_derivados(caminho, pasta_saida=PASTA_DERIVADOS):
+    """Gera os derivados de uma imagem e retorna o registro do manifesto"""
+    import pygame
+    nome = os.path.basename(caminho)
+    info = os.stat(caminho)
+    try:
+        original = pygame.image.load(caminho)
+    except Exception as e:
+        return nome, {'erro': str(e)}
+
+    # Achatar a transparência sobre o fundo do card (o JPEG não tem canal alfa)
+    base = pygame.Surface(original.get_size(), 0, 32)
+    base.fill(COR_FUNDO)
+    base.blit(original, (0, 0))
+
+    registro = {
+        'largura': original.get_width(),
+        'altura': original.get_height(),
+        'origem_mtime': info.st_mtime,
+        'origem_bytes': info.st_size,
+    }
+    for tipo, caixa in TAMANHOS.items():
+        # Manter a extensão original no nome evita colisão entre x.png e x.jpg
+        destino = os.path.join(pasta_saida, tipo, nome + ".jpg")
+        pygame.image.save(_reduzir(base, caixa), destino)
+        registro[tipo] = destino
+    return nome, registro
+
+def carregar_manifesto(arquivo=ARQUIVO_MANIFESTO):
+    if os.path.exists(arquivo):
+        with open(arquivo, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+def _atualizado(registro, caminho):
+    if not registro or 'erro' in registro:
+        return False
+    info = os.stat(caminho)
+    if registro['origem_mtime'] != info.st_mtime or registro['origem_bytes'] != info.st_size:
+        return False
+    return all(os.path.exists(registro[tipo]) for tipo in TAMANHOS)
+
+def normalizar_imagens(pasta_imagens="imagens", pasta_saida=PASTA_DERIVADOS, max_workers=None):
+    for tipo in TAMANHOS:
+        os.makedirs(os.path.join(pasta_saida, tipo), exist_ok=True)
+    arquivo_manifesto = os.path.join(pasta_saida, "manifesto.json")
+    manifesto = carregar_manifesto(arquivo_manifesto)
+
+    nomes = sorted(os.listdir(pasta_imagens))
+    # Entradas de arquivos que não existem mais saem do manifesto
+    manifesto = {nome: r for nome, r in manifesto.items() if nome in nomes}
+    pendentes = [os.path.join(pasta_imagens, n) for n in nomes
+                 if not _atualizado(manifesto.get(n), os.path.join(pasta_imagens, n))]
+    print(f"{len(pendentes)} de {len(nomes)} imagens para processar")
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_iniciar_worker) as executor:
+        for nome, registro in executor.map(gerar_derivados, pendentes, [pasta_saida] * len(pendentes), chunksize=8):
+            manifesto[nome] = registro
+            if 'erro' in registro:
+                print(f"Erro ao processar {nome}: {registro['erro']}")
+
+    with open(arquivo_manifesto, 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, indent=1, ensure_ascii=False)
+    print(f"Manifesto salvo em {arquivo_manifesto}")
+    return manifesto
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera derivados de exibição e miniaturas das imagens")
+    parser.add_argument("--pasta", default="imagens")
+    parser.add_argument("--saida", default=PASTA_DERIVADOS)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    normalizar_imagens(args.pasta, args.saida, args.workers)
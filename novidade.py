@@ -0,0 +1,188 @@
+"""
+Arquivo de Novidade
+===================
+
+Guarda o embedding conjunto (imagem + áudio) de cada meme já mostrado e mede a novidade de
+um candidato como a distância média aos k memes mostrados mais próximos. O algoritmo
+evolutivo gera mais filhos do que precisa e escolhe os que combinam boa nota estimada com
+novidade alta; sem isso, a seleção elitista converge para variações do top 1 e muitas
+avaliações caem em pares repetidos ou quase iguais.
+
+Funcionalidades principais:
+- Embedding conjunto de baixa dimensão: as primeiras componentes principais padronizadas de
+  cada modalidade (os mesmos atributos do modelo_pares.py), então imagem e áudio pesam igual
+- Índice dinâmico pelo método logarítmico de Bentley-Saxe: um buffer pequeno consultado por
+  força bruta e níveis de árvores k-d estáticas (scipy.spatial.cKDTree) com buffer·2^i
+  pontos; uma inserção reconstrói em média O(log n) níveis já ordenados e uma consulta visita
+  O(log n) árvores, então os dois custos seguem quase constantes com milhões de memes
+- Consultas aproximadas nas árvores (eps do cKDTree), que bastam para ordenar candidatos
+- Combinação da nota estimada com a novidade por postos (ranks), sem depender da escala
+- Benchmark de inserção e consulta com o arquivo crescendo
+
+Uso:
+    python novidade.py --benchmark --tamanho 2000000
+"""
+
+import argparse
+import threading
+import time
+
+import numpy as np
+from scipy.spatial import cKDTree
+from scipy.stats import rankdata
+
+DIM_NOVIDADE = 4  # Componentes principais por modalidade; árvores k-d perdem eficiência em dimensões altas
+TAMANHO_BUFFER = 256
+# Consultas aproximadas: cada vizinho devolvido está a no máximo (1 + TOLERANCIA) vezes a
+# distância do verdadeiro. Na prática a novidade muda cerca de 1% e a consulta fica várias vezes mais rápida
+TOLERANCIA = 1.0
+
+def vetores_pares(atributos, img_idx, aud_idx):
+    """Embeddings conjuntos dos pares (img_idx, aud_idx), com atributos=(X, Y) de calcular_atributos"""
+    X, Y = atributos
+    return np.hstack([X[np.asarray(img_idx)], Y[np.asarray(aud_idx)]]).reshape(-1, X.shape[1] + Y.shape[1])
+
+class ArquivoNovidade:
+    """
+    Índice de vizinhos mais próximos que só recebe inserções. Seguro para uso por várias
+    threads (a geração especulativa consulta enquanto a thread principal insere).
+    """
+
+    def __init__(self, dimensao, tamanho_buffer=TAMANHO_BUFFER, tolerancia=TOLERANCIA):
+        self.dimensao = dimensao
+        self.tamanho_buffer = tamanho_buffer
+        self.tolerancia = tolerancia
+        self._buffer = np.empty((tamanho_buffer, dimensao), dtype=np.float64)
+        self._no_buffer = 0
+        # Nível i: None ou uma árvore com exatamente tamanho_buffer * 2**i pontos
+        self._niveis = []
+        self._trava = threading.Lock()
+
+    def __len__(self):
+        with self._trava:
+            return self._no_buffer + sum(len(arvore.data) for arvore in self._niveis if arvore is not None)
+
+    def copia(self):
+        """Instantâneo independente do arquivo; as árvores, que nunca mudam, são compartilhadas"""
+        with self._trava:
+            copia = ArquivoNovidade(self.dimensao, self.tamanho_buffer, self.tolerancia)
+            copia._buffer[:] = self._buffer
+            copia._no_buffer = self._no_buffer
+            copia._niveis = list(self._niveis)
+        return copia
+
+    def adicionar(self, vetores):
+        vetores = np.asarray(vetores, dtype=np.float64).reshape(-1, self.dimensao)
+        with self._trava:
+            inicio = 0
+            while inicio < len(vetores):
+                quantidade = min(len(vetores) - inicio, self.tamanho_buffer - self._no_buffer)
+                self._buffer[self._no_buffer:self._no_buffer + quantidade] = vetores[inicio:inicio + quantidade]
+                self._no_buffer += quantidade
+                inicio += quantidade
+                if self._no_buffer == self.tamanho_buffer:
+                    self._descarregar_buffer()
+
+    def _descarregar_buffer(self):
+        """Junta o buffer com os níveis cheios consecutivos em uma árvore no primeiro nível vazio"""
+        blocos = [self._buffer.copy()]
+        nivel = 0
+        while nivel < len(self._niveis) and self._niveis[nivel] is not None:
+            blocos.append(self._niveis[nivel].data)
+            self._niveis[nivel] = None
+            nivel += 1
+        if nivel == len(self._niveis):
+            self._niveis.append(None)
+        # Construção sem balanceamento pela mediana: bem mais rápida e consultas quase iguais
+        self._niveis[nivel] = cKDTree(np.vstack(blocos), balanced_tree=False, compact_nodes=False)
+        self._no_buffer = 0
+
+    def distancias_vizinhos(self, consultas, k=10):
+        """
+        Distâncias de cada consulta aos min(k, len) pontos mais próximos do arquivo (dentro da
+        tolerância), em ordem crescente; matriz (consultas, k) ou com zero colunas se o arquivo
+        estiver vazio.
+        """
+        consultas = np.asarray(consultas, dtype=np.float64).reshape(-1, self.dimensao)
+        with self._trava:
+            buffer = self._buffer[:self._no_buffer]
+            arvores = [arvore for arvore in self._niveis if arvore is not None]
+            partes = []
+            if len(buffer):
+                d2 = (np.einsum('ij,ij->i', consultas, consultas)[:, None] + np.einsum('ij,ij->i', buffer, buffer)[None, :]
+                      - 2 * (consultas @ buffer.T))
+                partes.append(np.sqrt(np.maximum(d2, 0)))
+            for arvore in arvores:
+                distancias, _ = arvore.query(consultas, k=min(k, len(arvore.data)), eps=self.tolerancia)
+                partes.append(distancias.reshape(len(consultas), -1))
+        if not partes:
+            return np.empty((len(consultas), 0))
+        distancias = np.hstack(partes)
+        k = min(k, distancias.shape[1])
+        return np.sort(np.partition(distancias, k - 1, axis=1)[:, :k], axis=1)
+
+    def novidade(self, consultas, k=10):
+        """Distância média aos k vizinhos mais próximos; infinita com o arquivo vazio"""
+        distancias = self.distancias_vizinhos(consultas, k)
+        if distancias.shape[1] == 0:
+            return np.full(len(distancias), np.inf)
+        return distancias.mean(axis=1)
+
+def _postos(valores):
+    """Posto de cada valor normalizado em [0, 1]; empates recebem o posto médio"""
+    if len(valores) < 2:
+        return np.ones(len(valores))
+    return (rankdata(valores) - 1) / (len(valores) - 1)
+
+def combinar(fitness, novidade, peso):
+    """Pontuação (1 - peso) * posto(fitness) + peso * posto(novidade); maior é melhor"""
+    return (1 - peso) * _postos(fitness) + peso * _postos(novidade)
+
+def benchmark(tamanho=1000000, dimensao=2 * DIM_NOVIDADE, consultas=1000, k=10, semente=0):
+    """
+    Insere `tamanho` vetores aleatórios e mede o custo de inserção e de consulta a cada
+    potência de 10. Até 100 mil pontos compara com a força bruta exata; o erro é o quanto a
+    novidade média aproximada fica acima da exata.
+    """
+    rng = np.random.default_rng(semente)
+    arquivo = ArquivoNovidade(dimensao)
+    amostras = rng.normal(size=(consultas, dimensao))
+    print(f"{'tamanho':>10} {'insercao (us)':>14} {'consulta (us)':>14} {'forca bruta (us)':>17} {'erro novidade':>14} {'niveis':>7}")
+    inserido = 0
+    marco = 1000
+    while inserido < tamanho:
+        proximo = min(marco, tamanho)
+        vetores = rng.normal(size=(proximo - inserido, dimensao))
+        inicio = time.perf_counter()
+        arquivo.adicionar(vetores)
+        insercao = (time.perf_counter() - inicio) / len(vetores)
+        inserido = proximo
+
+        inicio = time.perf_counter()
+        obtidas = arquivo.distancias_vizinhos(amostras, k)
+        consulta = (time.perf_counter() - inicio) / consultas
+
+        forca_bruta = erro = float('nan')
+        if inserido <= 100000:
+            # Conferência com a força bruta sobre todos os pontos inseridos até aqui
+            pontos = np.vstack([a.data for a in arquivo._niveis if a is not None] +
+                               [arquivo._buffer[:arquivo._no_buffer]])
+            inicio = time.perf_counter()
+            d2 = (np.einsum('ij,ij->i', amostras, amostras)[:, None] + np.einsum('ij,ij->i', pontos, pontos)[None, :]
+                  - 2 * (amostras @ pontos.T))
+            esperadas = np.sort(np.sqrt(np.maximum(np.partition(d2, k - 1, axis=1)[:, :k], 0)), axis=1)
+            forca_bruta = (time.perf_counter() - inicio) / consultas
+            erro = obtidas.mean(axis=1).sum() / esperadas.mean(axis=1).sum() - 1
+        niveis = sum(a is not None for a in arquivo._niveis)
+        print(f"{inserido:>10} {insercao * 1e6:>14.2f} {consulta * 1e6:>14.1f} {forca_bruta * 1e6:>17.1f} "
+              f"{erro:>14.2%} {niveis:>7}")
+        marco *= 10
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark do arquivo de novidade")
+    parser.add_argument("--benchmark", action="store_true", required=True)
+    parser.add_argument("--tamanho", type=int, default=1000000)
+    parser.add_argument("--consultas", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+    benchmark(args.tamanho, consultas=args.consultas, k=args.k)
@@ -0,0 +1,238 @@
+"""
+Pacotes de Assets Mapeados em Memória
+=====================================
+
+Formato opcional que junta os arquivos de uma pasta (imagens/, audios/ ou uma pasta de
+derivados) em um único arquivo .pack, com um índice JSON de deslocamentos. Em vez de abrir
+um arquivo pequeno por meme, a interface lê intervalos de bytes do pacote via mmap, sem cópia.
+
+Funcionalidades principais:
+- Construtor de pacotes (um por pasta), com escrita atômica
+- Leitor com mmap: ler() devolve um memoryview e abrir() um objeto arquivo somente leitura
+  sobre ele, aceito por pygame.image.load e pygame.mixer.music.load
+- Aviso ao sistema operacional para pré-carregar um intervalo (madvise), usado no pré-carregamento
+- Tamanho e mtime de cada arquivo no índice: um arquivo solto editado depois do empacotamento
+  deixa de ser lido do pacote (conferido uma vez, ao abrir)
+- Benchmark de leitura: arquivos soltos contra o pacote
+
+Os caminhos são indexados como a interface os usa (ex.: imagens/figurinha_1.png), então
+gera_meme.py procura no pacote antes de ir ao disco.
+
+Uso:
+    python pacote.py imagens audios
+    python pacote.py --benchmark imagens
+"""
+
+import argparse
+import io
+import json
+import mmap
+import os
+import time
+
+PASTA_PACOTES = "pacotes"
+ALINHAMENTO = 64
+
+def chave_asset(caminho):
+    """Normaliza um caminho (./imagens/x.png, imagens/x.png) para a chave do índice"""
+    return os.path.normpath(caminho).replace(os.sep, '/')
+
+def _arquivos_pacote(nome, pasta_pacotes=PASTA_PACOTES):
+    base = os.path.join(pasta_pacotes, nome)
+    return base + ".pack", base + ".indice.json"
+
+def construir_pacote(pasta, nome=None, pasta_pacotes=PASTA_PACOTES):
+    """
+    Junta todos os arquivos de pasta em um pacote. O nome padrão deriva do caminho da pasta
+    (derivados/imagens/exibicao vira derivados_imagens_exibicao). Retorna o índice.
+    """
+    if nome is None:
+        nome = chave_asset(pasta).replace('/', '_')
+    os.makedirs(pasta_pacotes, exist_ok=True)
+    arquivo_pacote, arquivo_indice = _arquivos_pacote(nome, pasta_pacotes)
+
+    indice = {}
+    temporario = arquivo_pacote + ".tmp"
+    with open(temporario, 'wb') as saida:
+        for nome_arquivo in sorted(os.listdir(pasta)):
+            caminho = os.path.join(pasta, nome_arquivo)
+            if not os.path.isfile(caminho):
+                continue
+            # Alinhar o início de cada arquivo facilita o acesso e o madvise por página
+            deslocamento = saida.tell()
+            resto = deslocamento % ALINHAMENTO
+            if resto:
+                saida.write(b'\0' * (ALINHAMENTO - resto))
+                deslocamento += ALINHAMENTO - resto
+            with open(caminho, 'rb') as f:
+                dados = f.read()
+                mtime = os.fstat(f.fileno()).st_mtime_ns
+            saida.write(dados)
+            # Tamanho e mtime do arquivo solto permitem detectar que ele mudou depois do empacotamento
+            indice[chave_asset(caminho)] = [deslocamento, len(dados), mtime]
+    os.replace(temporario, arquivo_pacote)
+
+    with open(arquivo_indice + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(indice, f, ensure_ascii=False)
+    os.replace(arquivo_indice + ".tmp", arquivo_indice)
+    return indice
+
+class ArquivoMemoria(io.RawIOBase):
+    """Arquivo somente leitura sobre um memoryview; os bytes só são copiados ao serem lidos"""
+
+    def __init__(self, dados):
+        self._dados = dados
+        self._posicao = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, destino):
+        fim = min(self._posicao + len(destino), len(self._dados))
+        n = fim - self._posicao
+        destino[:n] = self._dados[self._posicao:fim]
+        self._posicao = fim
+        return n
+
+    def seek(self, deslocamento, origem=io.SEEK_SET):
+        if origem == io.SEEK_CUR:
+            deslocamento += self._posicao
+        elif origem == io.SEEK_END:
+            deslocamento += len(self._dados)
+        self._posicao = max(0, deslocamento)
+        return self._posicao
+
+    def tell(self):
+        return self._posicao
+
+class PacoteAssets:
+    """Leitor de um pacote: o arquivo inteiro fica mapeado e cada asset é uma fatia do mapa"""
+
+    def __init__(self, arquivo_pacote, arquivo_indice):
+        with open(arquivo_indice, 'r', encoding='utf-8') as f:
+            self.indice = json.load(f)
+        self._arquivo = open(arquivo_pacote, 'rb')
+        tamanho = os.fstat(self._arquivo.fileno()).st_size
+        self._mapa = mmap.mmap(self._arquivo.fileno(), 0, access=mmap.ACCESS_READ) if tamanho else None
+        self._visao = memoryview(self._mapa) if self._mapa is not None else memoryview(b'')
+
+    def __contains__(self, caminho):
+        return chave_asset(caminho) in self.indice
+
+    def descartar_desatualizados(self):
+        """
+        Tira do índice os arquivos cujo arquivo solto mudou depois do empacotamento (tamanho ou
+        mtime diferentes; índices antigos, sem mtime, só comparam o tamanho), para que sejam
+        lidos do disco. Arquivos soltos que não existem mais continuam no pacote. Feito uma vez
+        na abertura, com uma listagem por pasta, e não a cada leitura. Retorna as chaves tiradas.
+        """
+        por_pasta = {}
+        for chave in self.indice:
+            por_pasta.setdefault(os.path.dirname(chave), []).append(chave)
+        desatualizados = []
+        for pasta, chaves in por_pasta.items():
+            try:
+                with os.scandir(pasta or '.') as entradas:
+                    soltos = {chave_asset(entrada.path): entrada.stat() for entrada in entradas if entrada.is_file()}
+            except OSError:
+                continue
+            for chave in chaves:
+                info = soltos.get(chave)
+                entrada = self.indice[chave]
+                if info is not None and (info.st_size != entrada[1] or
+                                         (len(entrada) >= 3 and info.st_mtime_ns != entrada[2])):
+                    desatualizados.append(chave)
+        for chave in desatualizados:
+            del self.indice[chave]
+        return desatualizados
+
+    def ler(self, caminho):
+        deslocamento, tamanho = self.indice[chave_asset(caminho)][:2]
+        return self._visao[deslocamento:deslocamento + tamanho]
+
+    def abrir(self, caminho):
+        return ArquivoMemoria(self.ler(caminho))
+
+    def pre_carregar(self, caminho):
+        """Pede ao sistema operacional que traga o intervalo do asset para o cache de páginas"""
+        if self._mapa is None or not hasattr(self._mapa, 'madvise'):
+            return
+        deslocamento, tamanho = self.indice[chave_asset(caminho)][:2]
+        inicio = deslocamento - deslocamento % mmap.PAGESIZE
+        self._mapa.madvise(mmap.MADV_WILLNEED, inicio, deslocamento + tamanho - inicio)
+
+def abrir_pacotes(pasta_pacotes=PASTA_PACOTES):
+    """
+    Abre todos os pacotes da pasta, sem os arquivos editados depois do empacotamento; retorna
+    uma lista vazia se não houver nenhum
+    """
+    if not os.path.isdir(pasta_pacotes):
+        return []
+    pacotes = []
+    for nome in sorted(os.listdir(pasta_pacotes)):
+        if nome.endswith(".pack"):
+            arquivo_pacote, arquivo_indice = _arquivos_pacote(nome[:-len(".pack")], pasta_pacotes)
+            try:
+                pacote = PacoteAssets(arquivo_pacote, arquivo_indice)
+            except (OSError, ValueError) as e:
+                print(f"Pacote ignorado ({nome}): {e}")
+                continue
+            desatualizados = pacote.descartar_desatualizados()
+            if desatualizados:
+                print(f"{nome}: {len(desatualizados)} arquivos mudaram depois do empacotamento e serão lidos do disco")
+            pacotes.append(pacote)
+    return pacotes
+
+def comparar_leitura(pasta, pacote, repeticoes=3):
+    """
+    Lê todos os arquivos da pasta soltos e pelo pacote e retorna a vazão de cada forma. As
+    repetições rodam com o cache de páginas já aquecido, o que favorece os arquivos soltos;
+    em disco frio ou de rede a diferença das aberturas de arquivo é maior.
+    """
+    caminhos = [os.path.join(pasta, n) for n in sorted(os.listdir(pasta)) if os.path.join(pasta, n) in pacote]
+    total_bytes = sum(pacote.indice[chave_asset(c)][1] for c in caminhos)
+
+    def _medir(ler):
+        melhor = float('inf')
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            for caminho in caminhos:
+                ler(caminho)
+            melhor = min(melhor, time.perf_counter() - inicio)
+        return {'segundos': melhor, 'mb_por_s': total_bytes / 1e6 / melhor, 'arquivos_por_s': len(caminhos) / melhor}
+
+    def _ler_solto(caminho):
+        with open(caminho, 'rb') as f:
+            return f.read()
+
+    return {
+        'arquivos': len(caminhos),
+        'mb': total_bytes / 1e6,
+        'soltos': _medir(_ler_solto),
+        'pacote_copia': _medir(lambda c: bytes(pacote.ler(c))),
+        'pacote_sem_copia': _medir(pacote.ler),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Constrói pacotes de assets ou mede a leitura")
+    parser.add_argument("pastas", nargs='+', help="pastas a empacotar (ex.: imagens audios)")
+    parser.add_argument("--saida", default=PASTA_PACOTES)
+    parser.add_argument("--benchmark", action="store_true", help="compara leitura solta e pelo pacote")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    for pasta in args.pastas:
+        nome = chave_asset(pasta).replace('/', '_')
+        arquivo_pacote, arquivo_indice = _arquivos_pacote(nome, args.saida)
+        if not args.benchmark or not os.path.exists(arquivo_pacote):
+            indice = construir_pacote(pasta, nome, args.saida)
+            print(f"{pasta}: {len(indice)} arquivos em {arquivo_pacote}")
+        if args.benchmark:
+            resultado = comparar_leitura(pasta, PacoteAssets(arquivo_pacote, arquivo_indice), args.repeticoes)
+            print(f"\n=== {pasta} ({resultado['arquivos']} arquivos, {resultado['mb']:.1f} MB) ===")
+            for forma in ('soltos', 'pacote_copia', 'pacote_sem_copia'):
+                m = resultado[forma]
+                print(f"{forma}: {m['mb_por_s']:.0f} MB/s, {m['arquivos_por_s']:.0f} arquivos/s")
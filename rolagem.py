@@ -0,0 +1,81 @@
+"""
+Coleta com Rolagem Orientada a Eventos
+======================================
+
+Módulo utilitário usado pelos scripts de coleta (images.py e sons.py) para colher atributos
+de elementos em páginas com rolagem infinita, sem pausas fixas.
+
+Funcionalidades principais:
+- Uma única chamada JavaScript por passada extrai, em lote, só os elementos ainda não vistos
+- Elementos já colhidos são marcados no próprio DOM (data-colhido), então cada passada
+  processa apenas os nós novos
+- Espera adaptativa: depois de rolar, a página é consultada em intervalos curtos e a coleta
+  continua assim que surgem itens novos
+- A coleta termina quando nada novo aparece dentro do tempo limite sem progresso
+"""
+
+import time
+
+# Marca cada nó com o valor colhido; nós reciclados pela página (com outro valor) são colhidos de novo
+SCRIPT_COLHER_NOVOS = """
+const seletor = arguments[0];
+const atributo = arguments[1];
+const novos = [];
+for (const no of document.querySelectorAll(seletor)) {
+    let valor = no[atributo];
+    if (typeof valor !== 'string') {
+        valor = no.getAttribute(atributo);
+    }
+    if (!valor || no.dataset.colhido === valor) {
+        continue;
+    }
+    no.dataset.colhido = valor;
+    novos.push(valor);
+}
+return novos;
+"""
+
+SCRIPT_ROLAR = "window.scrollTo(0, document.body.scrollHeight);"
+
+def colher_com_rolagem(driver, seletor_css, atributo, total_desejado, processar=None,
+                       tempo_sem_progresso=10.0, intervalo_consulta=0.25, max_passadas=500):
+    """
+    Rola a página e colhe o atributo dos elementos que casam com seletor_css até reunir
+    total_desejado valores únicos, ou até a página parar de trazer itens novos.
+
+    processar(valor) pode transformar cada valor bruto (retornando None para descartá-lo).
+    Retorna a lista de valores únicos na ordem em que foram encontrados.
+    """
+    coletados = []
+    vistos = set()
+
+    def _colher():
+        # Retorna quantos nós novos a página trouxe (mesmo que descartados por processar)
+        brutos = driver.execute_script(SCRIPT_COLHER_NOVOS, seletor_css, atributo) or []
+        for valor in brutos:
+            if processar is not None:
+                valor = processar(valor)
+            if valor and valor not in vistos:
+                vistos.add(valor)
+                coletados.append(valor)
+        return len(brutos)
+
+    _colher()
+    passadas = 0
+    while len(coletados) < total_desejado and passadas < max_passadas:
+        passadas += 1
+        print(f"URLs encontradas: {len(coletados)} de {total_desejado}")
+        driver.execute_script(SCRIPT_ROLAR)
+
+        # Espera adaptativa: sai assim que algo novo aparece
+        limite = time.monotonic() + tempo_sem_progresso
+        novos = _colher()
+        while novos == 0 and time.monotonic() < limite:
+            time.sleep(intervalo_consulta)
+            novos = _colher()
+
+        if novos == 0:
+            print(f"Nenhum item novo em {tempo_sem_progresso:.0f}s. Finalizando a coleta.")
+            break
+
+    return coletados[:total_desejado]
@@ -0,0 +1,197 @@
+"""
+Seleção de Pais para o Algoritmo Evolutivo
+==========================================
+
+Este módulo sorteia os casais de uma geração inteira de uma vez, com operações vetorizadas,
+em vez de sortear um casal por vez e rejeitar repetições. Funciona bem tanto para a população
+de 10 memes da interface quanto para populações de milhares de indivíduos em execuções
+headless.
+
+Funcionalidades principais:
+- Método alias (Vose) para sorteio proporcional ao fitness em O(1) por amostra
+- Amostragem universal estocástica (SUS)
+- Seleção por torneio vetorizada
+- Sorteio ponderado sem reposição (chaves de Efraimidis-Spirakis)
+- Geração dos casais de uma geração com a política elitista "top 1 cruza com metade"
+"""
+
+import numpy as np
+
+_rng_padrao = np.random.default_rng()
+
+def _normalizar_pesos(pesos):
+    pesos = np.asarray(pesos, dtype=float) + 1e-8
+    return pesos / pesos.sum()
+
+class TabelaAlias:
+    """Tabela do método alias de Vose: construção O(n), cada sorteio O(1)"""
+
+    def __init__(self, pesos):
+        p = _normalizar_pesos(pesos) * len(pesos)
+        n = len(p)
+        self.prob = np.ones(n)
+        self.alias = np.arange(n)
+        pequenos = [i for i in range(n) if p[i] < 1.0]
+        grandes = [i for i in range(n) if p[i] >= 1.0]
+        while pequenos and grandes:
+            s = pequenos.pop()
+            g = grandes.pop()
+            self.prob[s] = p[s]
+            self.alias[s] = g
+            p[g] = p[g] + p[s] - 1.0
+            (pequenos if p[g] < 1.0 else grandes).append(g)
+
+    def sortear(self, quantidade, rng=None):
+        rng = _rng_padrao if rng is None else rng
+        colunas = rng.integers(len(self.prob), size=quantidade)
+        aceita = rng.random(quantidade) < self.prob[colunas]
+        return np.where(aceita, colunas, self.alias[colunas])
+
+def amostragem_universal(pesos, quantidade, rng=None):
+    """SUS: quantidade ponteiros igualmente espaçados sobre a roleta acumulada"""
+    rng = _rng_padrao if rng is None else rng
+    acumulado = np.cumsum(_normalizar_pesos(pesos))
+    acumulado[-1] = 1.0
+    ponteiros = (rng.random() + np.arange(quantidade)) / quantidade
+    selecionados = np.searchsorted(acumulado, ponteiros, side='right')
+    # Embaralhar para que os casais formados a partir da ordem não fiquem enviesados
+    return rng.permutation(selecionados)
+
+def selecao_torneio(fitness, quantidade, tamanho=3, rng=None):
+    """Torneios vetorizados: quantidade linhas de tamanho competidores, vence o maior fitness"""
+    rng = _rng_padrao if rng is None else rng
+    fitness = np.asarray(fitness, dtype=float)
+    competidores = rng.integers(len(fitness), size=(quantidade, tamanho))
+    vencedores = np.argmax(fitness[competidores], axis=1)
+    return competidores[np.arange(quantidade), vencedores]
+
+def sortear_sem_reposicao(pesos, quantidade, rng=None):
+    """Sorteio ponderado sem reposição em uma passada (chaves u^(1/w) de Efraimidis-Spirakis)"""
+    rng = _rng_padrao if rng is None else rng
+    pesos = _normalizar_pesos(pesos)
+    quantidade = min(quantidade, len(pesos))
+    chaves = np.log(rng.random(len(pesos))) / pesos
+    if quantidade == len(pesos):
+        return np.argsort(-chaves)
+    escolhidos = np.argpartition(-chaves, quantidade - 1)[:quantidade]
+    return escolhidos[np.argsort(-chaves[escolhidos])]
+
+def _sortear_pais(fitness, quantidade, metodo, tamanho_torneio, rng, tabela=None):
+    if metodo == 'torneio':
+        return selecao_torneio(fitness, quantidade, tamanho_torneio, rng)
+    if metodo == 'sus':
+        return amostragem_universal(fitness, quantidade, rng)
+    return tabela.sortear(quantidade, rng)
+
+def sortear_casais(fitness, quantidade, metodo='alias', tamanho_torneio=3, rng=None, max_rodadas=8):
+    """
+    Sorteia até quantidade casais distintos (i < j, i != j) entre os índices de fitness.
+
+    Os pais são sorteados em bloco e os casais repetidos ou com o mesmo pai duas vezes são
+    descartados de forma vetorizada. Se após algumas rodadas ainda faltarem casais (poucos
+    pais distintos ou pesos muito concentrados), o restante vem de um sorteio ponderado sem
+    reposição entre os casais livres (_completar_casais), o que sempre termina.
+    """
+    rng = _rng_padrao if rng is None else rng
+    fitness = np.asarray(fitness, dtype=float)
+    n = len(fitness)
+    total_casais = n * (n - 1) // 2
+    quantidade = min(quantidade, total_casais)
+    if quantidade <= 0:
+        return np.empty((0, 2), dtype=int)
+
+    tabela = TabelaAlias(fitness) if metodo == 'alias' else None
+    codigos = np.empty(0, dtype=np.int64)
+    for _ in range(max_rodadas):
+        falta = quantidade - len(codigos)
+        if falta <= 0:
+            break
+        # Sortear com folga para compensar os descartes
+        amostra = 2 * falta + 8
+        a = _sortear_pais(fitness, amostra, metodo, tamanho_torneio, rng, tabela)
+        b = _sortear_pais(fitness, amostra, metodo, tamanho_torneio, rng, tabela)
+        validos = a != b
+        i = np.minimum(a, b)[validos].astype(np.int64)
+        j = np.maximum(a, b)[validos].astype(np.int64)
+        novos = i * n + j
+        # Manter a ordem do sorteio ao remover repetidos
+        todos = np.concatenate([codigos, novos])
+        _, primeira = np.unique(todos, return_index=True)
+        codigos = todos[np.sort(primeira)][:quantidade]
+
+    falta = quantidade - len(codigos)
+    if falta > 0:
+        codigos = np.concatenate([codigos, _completar_casais(_normalizar_pesos(fitness), codigos, falta, rng)])
+
+    return np.stack([codigos // n, codigos % n], axis=1)
+
+def _sortear_indice(massas, rng):
+    acumulado = np.cumsum(massas)
+    return min(int(np.searchsorted(acumulado, rng.random() * acumulado[-1], side='right')), len(massas) - 1)
+
+def _completar_casais(pesos, codigos, quantidade, rng):
+    """
+    Sorteia quantidade casais distintos fora de codigos, um a um e sem reposição, com
+    probabilidade proporcional a pesos[i] * pesos[j] entre os casais livres. Sem enumerar os
+    n²/2 casais: o primeiro pai sai em proporção à massa dos seus casais livres e o parceiro
+    entre os livres dele, então cada casal sai com chance 2·pesos[i]·pesos[j] / massa total.
+    Memória O(n) e tempo O(quantidade · n).
+    """
+    n = len(pesos)
+    parceiros = {}
+    for codigo in codigos.tolist():
+        i, j = divmod(codigo, n)
+        parceiros.setdefault(i, set()).add(j)
+        parceiros.setdefault(j, set()).add(i)
+    massas = pesos * (pesos.sum() - pesos)
+    for i, usados in parceiros.items():
+        massas[i] -= pesos[i] * pesos[list(usados)].sum()
+
+    novos = []
+    while len(novos) < quantidade:
+        i = _sortear_indice(np.maximum(massas, 0), rng)
+        livres = pesos.copy()
+        livres[i] = 0
+        livres[list(parceiros.get(i, ()))] = 0
+        if livres.sum() <= 0:
+            # Pai sem casais livres; a massa só sobrou por arredondamento
+            massas[i] = 0
+            continue
+        j = _sortear_indice(livres, rng)
+        parceiros.setdefault(i, set()).add(j)
+        parceiros.setdefault(j, set()).add(i)
+        massas[i] -= pesos[i] * pesos[j]
+        massas[j] -= pesos[i] * pesos[j]
+        novos.append(min(i, j) * n + max(i, j))
+    return np.array(novos, dtype=np.int64)
+
+def casais_elitistas(notas, tam_populacao, metodo='alias', tamanho_torneio=3, rng=None):
+    """
+    Gera os casais de uma geração a partir das notas já ordenadas (maior primeiro).
+
+    Primeira metade: o top 1 cruza com parceiros distintos, sorteados sem reposição em
+    proporção às notas. Segunda metade: casais distintos entre os demais, sorteados com o
+    método escolhido ('alias', 'sus' ou 'torneio'). Retorna um array (k, 2) de índices.
+    """
+    rng = _rng_padrao if rng is None else rng
+    notas = np.asarray(notas, dtype=float)
+    restantes = notas[1:]
+    if len(restantes) == 0:
+        return np.empty((0, 2), dtype=int)
+
+    metade = tam_populacao // 2
+    if metodo == 'torneio':
+        # Parceiros do top 1 escolhidos pela ordem de vitórias em torneios
+        vencedores = selecao_torneio(restantes, 4 * metade + len(restantes), tamanho_torneio, rng)
+        _, primeira = np.unique(vencedores, return_index=True)
+        parceiros = vencedores[np.sort(primeira)][:metade]
+        if len(parceiros) < min(metade, len(restantes)):
+            livres = np.setdiff1d(np.arange(len(restantes)), parceiros)
+            extras = livres[sortear_sem_reposicao(restantes[livres], metade - len(parceiros), rng)]
+            parceiros = np.concatenate([parceiros, extras])
+    else:
+        parceiros = sortear_sem_reposicao(restantes, metade, rng)
+    elite = np.stack([np.zeros(len(parceiros), dtype=int), parceiros + 1], axis=1)
+
+    casais_restantes = sortear_casais(restantes, tam_populacao - len(elite), metodo, tamanho_torneio, rng) + 1
+    return np.concatenate([elite, casais_restantes]).astype(int)
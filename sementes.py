@@ -0,0 +1,113 @@
+"""
+Semeadura da População Inicial
+==============================
+
+Escolhe as imagens e os áudios da primeira população espalhados pelos espaços de embeddings,
+em vez de sorteá-los uniformemente. Um sorteio uniforme costuma concentrar a primeira geração
+em uma região do catálogo, e as primeiras notas humanas dizem pouco sobre o resto dele.
+
+Funcionalidades principais:
+- k-means++ (sorteio proporcional ao quadrado da distância ao item já escolhido mais próximo)
+- Amostragem pelo ponto mais distante (farthest-point)
+- Cada escolha atualiza as distâncias mínimas com uma única operação vetorizada O(n·d)
+- Catálogos grandes (acima de LIMITE_DIRETO linhas) são semeados sobre grupos pré-calculados
+  por k-means, ponderados pelo tamanho de cada grupo, e cada grupo escolhido contribui com um
+  item sorteado entre os seus membros
+"""
+
+import numpy as np
+
+ESTRATEGIAS = ("aleatoria", "kmeans++", "mais_distante")
+LIMITE_DIRETO = 50000
+GRUPOS_PADRAO = 1024
+
+def _distancias2(embeddings, normas, centro):
+    return np.maximum(normas - 2 * (embeddings @ centro) + centro @ centro, 0)
+
+def semear(embeddings, k, estrategia="kmeans++", rng=None, normas=None, pesos=None):
+    """
+    Índices de k linhas de embeddings espalhadas pelo espaço. pesos (opcional) multiplica a
+    chance de cada linha, por exemplo o tamanho de cada grupo quando as linhas são centróides;
+    linhas com peso zero nunca são escolhidas. Com k maior que o número de linhas elegíveis,
+    as escolhas extras são sorteadas entre elas.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    n = len(embeddings)
+    pesos = np.ones(n) if pesos is None else np.asarray(pesos, dtype=float)
+    probabilidades = pesos / pesos.sum()
+    if estrategia == "aleatoria":
+        return rng.choice(n, size=k, p=probabilidades)
+    if estrategia not in ESTRATEGIAS:
+        raise ValueError(f"Estratégia de semeadura desconhecida: {estrategia!r}")
+    if normas is None:
+        normas = np.einsum('ij,ij->i', embeddings, embeddings)
+
+    elegiveis = int((pesos > 0).sum())
+    escolhidos = [int(rng.choice(n, p=probabilidades))]
+    min_d2 = _distancias2(embeddings, normas, embeddings[escolhidos[0]])
+    for _ in range(min(k, elegiveis) - 1):
+        pontuacao = min_d2 * pesos
+        if estrategia == "kmeans++":
+            total = pontuacao.sum()
+            if total <= 0:
+                break
+            proximo = int(rng.choice(n, p=pontuacao / total))
+        else:
+            proximo = int(np.argmax(pontuacao))
+            if pontuacao[proximo] <= 0:
+                break
+        escolhidos.append(proximo)
+        min_d2 = np.minimum(min_d2, _distancias2(embeddings, normas, embeddings[proximo]))
+
+    if len(escolhidos) < k:
+        escolhidos += list(rng.choice(n, size=k - len(escolhidos), p=probabilidades))
+    return np.array(escolhidos)
+
+class Agrupamento:
+    """Resultado de agrupar: centróides, rótulo de cada linha e membros de cada grupo"""
+
+    def __init__(self, centroides, rotulos):
+        self.centroides = centroides
+        self.rotulos = rotulos
+        self.tamanhos = np.bincount(rotulos, minlength=len(centroides))
+        # Membros do grupo g: ordem[inicio[g]:inicio[g] + tamanhos[g]]
+        self.ordem = np.argsort(rotulos, kind='stable')
+        self.inicio = np.concatenate([[0], np.cumsum(self.tamanhos)[:-1]])
+
+    def sortear_membro(self, grupo, rng):
+        return int(self.ordem[self.inicio[grupo] + rng.integers(self.tamanhos[grupo])])
+
+def _atribuir(embeddings, centroides, bloco=65536):
+    normas_c = np.einsum('ij,ij->i', centroides, centroides)
+    rotulos = np.empty(len(embeddings), dtype=np.int64)
+    for inicio in range(0, len(embeddings), bloco):
+        x = embeddings[inicio:inicio + bloco]
+        rotulos[inicio:inicio + bloco] = np.argmin(normas_c[None, :] - 2 * (x @ centroides.T), axis=1)
+    return rotulos
+
+def agrupar(embeddings, n_grupos=GRUPOS_PADRAO, rng=None, iteracoes=10):
+    """k-means (Lloyd) em blocos, iniciado com k-means++; grupos vazios mantêm o centróide anterior"""
+    rng = np.random.default_rng(0) if rng is None else rng
+    x = np.asarray(embeddings, dtype=np.float64)
+    n_grupos = min(n_grupos, len(x))
+    # Inicialização sobre uma amostra para não custar n_grupos passadas pelo catálogo inteiro
+    amostra = rng.choice(len(x), size=min(len(x), 20 * n_grupos), replace=False)
+    centroides = x[amostra[semear(x[amostra], n_grupos, "kmeans++", rng)]].copy()
+    for _ in range(iteracoes):
+        rotulos = _atribuir(x, centroides)
+        ordem = np.argsort(rotulos, kind='stable')
+        tamanhos = np.bincount(rotulos, minlength=n_grupos)
+        ocupados = tamanhos > 0
+        inicios = np.concatenate([[0], np.cumsum(tamanhos)[:-1]])[ocupados]
+        centroides[ocupados] = np.add.reduceat(x[ordem], inicios, axis=0) / tamanhos[ocupados, None]
+    return Agrupamento(centroides, _atribuir(x, centroides))
+
+def semear_catalogo(catalogo, tipo, k, estrategia="kmeans++", rng=None):
+    """Índices de k itens de 'imagens' ou 'audios' do catálogo, espalhados pelo espaço"""
+    rng = np.random.default_rng() if rng is None else rng
+    embeddings = catalogo.embeddings(tipo)
+    if estrategia == "aleatoria" or len(embeddings) <= LIMITE_DIRETO:
+        return semear(embeddings, k, estrategia, rng, catalogo.normas(tipo))
+    grupos = catalogo.agrupamento(tipo)
+    escolhidos = semear(grupos.centroides, k, estrategia, rng, pesos=grupos.tamanhos)
+    return np.array([grupos.sortear_membro(g, rng) for g in escolhidos])
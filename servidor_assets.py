@@ -0,0 +1,418 @@
+"""
+Servidor Local de Assets
+========================
+
+Servidor HTTP local para as imagens e os áudios do catálogo (e os derivados gerados por
+normalizacao_imagens.py e normalizacao_audios.py), feito para que um navegador ou outro
+cliente guarde os arquivos em cache e não baixe de novo o que já tem.
+
+Funcionalidades principais:
+- ETag forte com o hash SHA-256 do conteúdo, reaproveitado do manifesto do catálogo quando
+  o mtime e o tamanho batem (senão calculado uma vez e guardado em memória)
+- Cache-Control de longa duração; URLs versionadas (?v=<hash>, ver url_asset) são marcadas
+  como immutable, e as demais são revalidadas com If-None-Match (resposta 304 sem corpo)
+- Requisições Range de um intervalo (206 / 416, com If-Range), para avançar e tocar áudios
+  em streaming
+- Variantes pré-comprimidas com gzip (--precomprimir), geradas só para formatos que não são
+  comprimidos (ex.: WAV, SVG, JSON) e só quando economizam ao menos ECONOMIA_MINIMA;
+  a escolha respeita os valores q do Accept-Encoding (gzip;q=0 recusa)
+- Corpo enviado com socket.sendfile (os.sendfile, sem cópia para o espaço do usuário), com
+  TCP_NODELAY para o corpo não esperar o ACK do cabeçalho
+- HTTP/1.1 com conexões persistentes e uma thread por conexão
+- Benchmark com cliente local: requisições por segundo e bytes transferidos para downloads
+  completos, revalidações e intervalos
+
+Uso:
+    python servidor_assets.py --porta 8765
+    python servidor_assets.py --precomprimir
+    python servidor_assets.py --benchmark --clientes 8 --requisicoes 2000
+"""
+
+import argparse
+import email.utils
+import gzip
+import hashlib
+import http.client
+import mimetypes
+import os
+import random
+import shutil
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+from manifesto import ARQUIVO_MANIFESTO, carregar_manifesto
+
+PASTAS_SERVIDAS = ("imagens", "audios", "derivados")
+PASTA_COMPRIMIDOS = "derivados/comprimidos"
+# Formatos já comprimidos: gzip não reduz o tamanho e só gasta CPU do cliente
+EXTENSOES_COMPRIMIDAS = ('.png', '.jpg', '.jpeg', '.gif', '.webp', '.mp3', '.ogg', '.gz')
+ECONOMIA_MINIMA = 0.1
+CACHE_IMUTAVEL = "public, max-age=31536000, immutable"
+CACHE_REVALIDAR = "public, max-age=3600"
+PORTA_PADRAO = 8765
+
+mimetypes.add_type("audio/mpeg", ".mp3")
+mimetypes.add_type("audio/wav", ".wav")
+mimetypes.add_type("image/webp", ".webp")
+
+class RegistroAssets:
+    """
+    Resolve caminhos de URL para arquivos das pastas servidas e guarda o hash de cada um.
+    Uma entrada só vale enquanto o mtime e o tamanho do arquivo não mudam.
+    """
+
+    def __init__(self, raiz=".", pastas=PASTAS_SERVIDAS, pasta_comprimidos=PASTA_COMPRIMIDOS,
+                 arquivo_manifesto=ARQUIVO_MANIFESTO):
+        self.raiz = os.path.abspath(raiz)
+        self.pastas = pastas
+        self.pasta_comprimidos = os.path.join(self.raiz, pasta_comprimidos)
+        self._hashes = {}
+        self._trava = threading.Lock()
+        self.hashes_calculados = 0
+        # Hashes já calculados pelo manifesto.py: {caminho absoluto: (mtime, bytes, sha256)}
+        self._manifesto = {}
+        manifesto = carregar_manifesto(os.path.join(self.raiz, arquivo_manifesto))
+        for registros in manifesto.values():
+            for registro in registros.values():
+                if 'sha256' in registro:
+                    caminho = os.path.join(self.raiz, registro['caminho'])
+                    self._manifesto[caminho] = (registro['mtime'], registro['bytes'], registro['sha256'])
+
+    def resolver(self, caminho_url):
+        """Caminho absoluto do arquivo para /pasta/arquivo, ou None fora das pastas servidas"""
+        partes = [p for p in unquote(caminho_url).split('/') if p]
+        if len(partes) < 2 or partes[0] not in self.pastas or any(p in ('.', '..') for p in partes):
+            return None
+        caminho = os.path.join(self.raiz, *partes)
+        # Links simbólicos que saem da pasta servida não são seguidos
+        base = os.path.realpath(os.path.join(self.raiz, partes[0]))
+        if os.path.commonpath([base, os.path.realpath(caminho)]) != base or not os.path.isfile(caminho):
+            return None
+        return caminho
+
+    def sha256(self, caminho, info=None):
+        info = os.stat(caminho) if info is None else info
+        chave = (caminho, info.st_mtime_ns, info.st_size)
+        with self._trava:
+            valor = self._hashes.get(chave)
+        if valor is not None:
+            return valor
+        registro = self._manifesto.get(caminho)
+        if registro is not None and registro[0] == info.st_mtime and registro[1] == info.st_size:
+            valor = registro[2]
+        else:
+            digest = hashlib.sha256()
+            with open(caminho, 'rb') as f:
+                for bloco in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(bloco)
+            valor = digest.hexdigest()
+            self.hashes_calculados += 1
+        with self._trava:
+            self._hashes[chave] = valor
+        return valor
+
+    def etag(self, caminho, info=None):
+        return f'"{self.sha256(caminho, info)[:32]}"'
+
+    def comprimido(self, caminho, info):
+        """Variante .gz do arquivo, se existir e for mais nova que ele"""
+        variante = os.path.join(self.pasta_comprimidos, os.path.relpath(caminho, self.raiz)) + ".gz"
+        try:
+            info_variante = os.stat(variante)
+        except OSError:
+            return None
+        return variante if info_variante.st_mtime >= info.st_mtime else None
+
+def url_asset(registro, caminho):
+    """URL versionada pelo conteúdo (ex.: /imagens/x.png?v=3fa2...), que pode ficar em cache para sempre"""
+    absoluto = os.path.join(registro.raiz, caminho)
+    relativo = os.path.relpath(absoluto, registro.raiz).replace(os.sep, '/')
+    return f"/{quote(relativo)}?v={registro.sha256(absoluto)[:12]}"
+
+def intervalo_pedido(cabecalho, tamanho):
+    """
+    Interpreta 'bytes=a-b', 'bytes=a-' ou 'bytes=-n'. Retorna (inicio, fim inclusivo), None
+    para ignorar o cabeçalho (vários intervalos ou sintaxe inválida: responde o arquivo
+    inteiro) ou False se o intervalo não pode ser atendido.
+    """
+    unidade, _, especificacao = cabecalho.partition('=')
+    if unidade.strip().lower() != 'bytes' or ',' in especificacao:
+        return None
+    inicio, separador, fim = especificacao.strip().partition('-')
+    if not separador:
+        return None
+    try:
+        if not inicio:
+            sufixo = int(fim)
+            if sufixo <= 0:
+                return False
+            return max(0, tamanho - sufixo), tamanho - 1
+        inicio = int(inicio)
+        fim = int(fim) if fim else tamanho - 1
+    except ValueError:
+        return None
+    if inicio >= tamanho:
+        return False
+    if fim < inicio:
+        return None
+    return inicio, min(fim, tamanho - 1)
+
+def aceita_gzip(cabecalho):
+    """
+    Interpreta o Accept-Encoding com os valores q: gzip (ou x-gzip) decide quando aparece,
+    senão vale '*'; q=0 recusa a codificação.
+    """
+    qualidades = {}
+    for item in cabecalho.split(','):
+        nome, *parametros = item.split(';')
+        nome = nome.strip().lower()
+        if not nome:
+            continue
+        qualidade = 1.0
+        for parametro in parametros:
+            chave, _, valor = parametro.partition('=')
+            if chave.strip().lower() == 'q':
+                try:
+                    qualidade = float(valor)
+                except ValueError:
+                    qualidade = 0.0
+        qualidades[nome] = qualidade
+    for nome in ('gzip', 'x-gzip', '*'):
+        if nome in qualidades:
+            return qualidades[nome] > 0
+    return False
+
+class ManipuladorAssets(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # O cabeçalho sai antes do corpo (sendfile); com Nagle ligado o segundo envio espera o
+    # ACK atrasado do cliente e cada resposta ganha dezenas de milissegundos
+    disable_nagle_algorithm = True
+    server_version = "MemesAssets/1.0"
+    registro = None
+
+    def do_GET(self):
+        self._responder(corpo=True)
+
+    def do_HEAD(self):
+        self._responder(corpo=False)
+
+    def log_message(self, formato, *args):
+        if self.server.verboso:
+            super().log_message(formato, *args)
+
+    def _erro(self, status):
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _responder(self, corpo):
+        url = urlsplit(self.path)
+        caminho = self.registro.resolver(url.path)
+        if caminho is None:
+            self._erro(HTTPStatus.NOT_FOUND)
+            return
+        info = os.stat(caminho)
+        etag = self.registro.etag(caminho, info)
+        versao = parse_qs(url.query).get('v', [None])[0]
+        imutavel = versao is not None and etag.strip('"').startswith(versao)
+
+        variante = None
+        aceita = self.headers.get("Accept-Encoding", "")
+        range_pedido = self.headers.get("Range")
+        if range_pedido is None and aceita_gzip(aceita):
+            variante = self.registro.comprimido(caminho, info)
+        if variante is not None:
+            # Cada codificação tem sua própria ETag, senão um 304 poderia trocar uma pela outra
+            etag = etag[:-1] + '-gz"'
+
+        comuns = [("ETag", etag), ("Cache-Control", CACHE_IMUTAVEL if imutavel else CACHE_REVALIDAR),
+                  ("Last-Modified", email.utils.formatdate(info.st_mtime, usegmt=True)),
+                  ("Accept-Ranges", "bytes"), ("Vary", "Accept-Encoding")]
+
+        conhecidas = [t.strip() for t in self.headers.get("If-None-Match", "").split(',')]
+        if etag in conhecidas or '*' in conhecidas:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            for nome, valor in comuns:
+                self.send_header(nome, valor)
+            self.end_headers()
+            return
+
+        arquivo = variante or caminho
+        tamanho = info.st_size if variante is None else os.stat(variante).st_size
+        inicio, fim = 0, tamanho - 1
+        status = HTTPStatus.OK
+        se_intervalo = self.headers.get("If-Range")
+        if range_pedido is not None and (se_intervalo is None or se_intervalo.strip() == etag):
+            intervalo = intervalo_pedido(range_pedido, tamanho)
+            if intervalo is False:
+                self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                self.send_header("Content-Range", f"bytes */{tamanho}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if intervalo is not None:
+                inicio, fim = intervalo
+                status = HTTPStatus.PARTIAL_CONTENT
+
+        self.send_response(status)
+        self.send_header("Content-Type", mimetypes.guess_type(caminho)[0] or "application/octet-stream")
+        self.send_header("Content-Length", str(fim - inicio + 1))
+        if variante is not None:
+            self.send_header("Content-Encoding", "gzip")
+        if status == HTTPStatus.PARTIAL_CONTENT:
+            self.send_header("Content-Range", f"bytes {inicio}-{fim}/{tamanho}")
+        for nome, valor in comuns:
+            self.send_header(nome, valor)
+        self.end_headers()
+        if corpo and fim >= inicio:
+            with open(arquivo, 'rb') as f:
+                # end_headers já enviou o cabeçalho; o corpo vai do cache de páginas direto para o socket
+                self.connection.sendfile(f, inicio, fim - inicio + 1)
+
+class ServidorAssets(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, endereco, registro, verboso=False):
+        manipulador = type("Manipulador", (ManipuladorAssets,), {'registro': registro})
+        super().__init__(endereco, manipulador)
+        self.registro = registro
+        self.verboso = verboso
+
+def iniciar_servidor(porta=0, raiz=".", host="127.0.0.1", verboso=False):
+    """Inicia o servidor em uma thread; retorna o servidor (porta real em server_address[1])"""
+    servidor = ServidorAssets((host, porta), RegistroAssets(raiz), verboso)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+def precomprimir(raiz=".", pastas=PASTAS_SERVIDAS, pasta_comprimidos=PASTA_COMPRIMIDOS, economia_minima=ECONOMIA_MINIMA):
+    """
+    Gera as variantes .gz dos arquivos que não estão em formato comprimido e mantém só as que
+    economizam ao menos economia_minima. Retorna (geradas, descartadas).
+    """
+    geradas = descartadas = 0
+    destino_base = os.path.join(raiz, pasta_comprimidos)
+    for pasta in pastas:
+        for diretorio, subpastas, nomes in os.walk(os.path.join(raiz, pasta)):
+            # Não comprime as próprias variantes
+            subpastas[:] = [s for s in subpastas
+                            if os.path.abspath(os.path.join(diretorio, s)) != os.path.abspath(destino_base)]
+            for nome in nomes:
+                if nome.lower().endswith(EXTENSOES_COMPRIMIDAS):
+                    continue
+                caminho = os.path.join(diretorio, nome)
+                destino = os.path.join(destino_base, os.path.relpath(caminho, raiz)) + ".gz"
+                os.makedirs(os.path.dirname(destino), exist_ok=True)
+                temporario = destino + ".tmp"
+                with open(caminho, 'rb') as entrada, open(temporario, 'wb') as bruto, \
+                        gzip.GzipFile(fileobj=bruto, mode='wb', compresslevel=9, mtime=0) as saida:
+                    shutil.copyfileobj(entrada, saida, 1 << 20)
+                if os.path.getsize(temporario) <= (1 - economia_minima) * os.path.getsize(caminho):
+                    os.replace(temporario, destino)
+                    geradas += 1
+                else:
+                    os.remove(temporario)
+                    if os.path.exists(destino):
+                        os.remove(destino)
+                    descartadas += 1
+    return geradas, descartadas
+
+def _cliente(host, porta, caminhos, etags, requisicoes, cenario, semente, resultado):
+    rng = random.Random(semente)
+    conexao = http.client.HTTPConnection(host, porta)
+    contagem = 0
+    recebidos = 0
+    status = {}
+    for _ in range(requisicoes):
+        caminho = rng.choice(caminhos)
+        cabecalhos = {}
+        if cenario == 'revalidacao':
+            cabecalhos["If-None-Match"] = etags[caminho]
+        elif cenario == 'intervalo':
+            cabecalhos["Range"] = "bytes=0-65535"
+        conexao.request("GET", caminho, headers=cabecalhos)
+        resposta = conexao.getresponse()
+        recebidos += len(resposta.read())
+        status[resposta.status] = status.get(resposta.status, 0) + 1
+        contagem += 1
+    conexao.close()
+    resultado.append((contagem, recebidos, status))
+
+def benchmark(clientes=8, requisicoes=2000, raiz=".", semente=0):
+    """Mede requisições por segundo e bytes recebidos em três cenários contra um servidor local"""
+    servidor = iniciar_servidor(0, raiz)
+    host, porta = servidor.server_address[:2]
+    caminhos = []
+    for pasta in ("imagens", "audios"):
+        diretorio = os.path.join(raiz, pasta)
+        if os.path.isdir(diretorio):
+            caminhos += [f"/{pasta}/{quote(nome)}" for nome in sorted(os.listdir(diretorio))]
+    if not caminhos:
+        raise SystemExit("Nenhum asset encontrado em imagens/ ou audios/")
+
+    # Primeira passada: hashes calculados (ou lidos do manifesto) e ETags que o cliente guardaria
+    inicio = time.perf_counter()
+    etags = {}
+    conexao = http.client.HTTPConnection(host, porta)
+    for caminho in caminhos:
+        conexao.request("HEAD", caminho)
+        resposta = conexao.getresponse()
+        resposta.read()
+        etags[caminho] = resposta.getheader("ETag")
+    conexao.close()
+    print(f"ETags de {len(caminhos)} assets em {time.perf_counter() - inicio:.2f}s "
+          f"({servidor.registro.hashes_calculados} hashes calculados, o resto veio do manifesto)")
+
+    print(f"{'cenario':<12} {'req/s':>10} {'MB recebidos':>14} {'MB/s':>10}  status")
+    por_cliente = max(1, requisicoes // clientes)
+    for cenario in ('completo', 'revalidacao', 'intervalo'):
+        resultado = []
+        threads = [threading.Thread(target=_cliente, args=(host, porta, caminhos, etags, por_cliente,
+                                                            cenario, semente + i, resultado))
+                   for i in range(clientes)]
+        inicio = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        segundos = time.perf_counter() - inicio
+        total = sum(r[0] for r in resultado)
+        recebidos = sum(r[1] for r in resultado)
+        status = {}
+        for _, _, parcial in resultado:
+            for codigo, quantidade in parcial.items():
+                status[codigo] = status.get(codigo, 0) + quantidade
+        print(f"{cenario:<12} {total / segundos:>10.0f} {recebidos / 1e6:>14.1f} "
+              f"{recebidos / 1e6 / segundos:>10.1f}  {dict(sorted(status.items()))}")
+    servidor.shutdown()
+    servidor.server_close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local das imagens e áudios do catálogo")
+    parser.add_argument("--porta", type=int, default=PORTA_PADRAO)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--raiz", default=".", help="pasta que contém imagens/, audios/ e derivados/")
+    parser.add_argument("--verboso", action="store_true", help="registra cada requisição")
+    parser.add_argument("--precomprimir", action="store_true", help="gera as variantes .gz e sai")
+    parser.add_argument("--benchmark", action="store_true", help="mede o servidor com clientes locais e sai")
+    parser.add_argument("--clientes", type=int, default=8)
+    parser.add_argument("--requisicoes", type=int, default=2000)
+    args = parser.parse_args()
+
+    if args.precomprimir:
+        geradas, descartadas = precomprimir(args.raiz)
+        print(f"{geradas} variantes .gz geradas em {PASTA_COMPRIMIDOS}, {descartadas} descartadas "
+              f"(economia abaixo de {ECONOMIA_MINIMA:.0%})")
+    elif args.benchmark:
+        benchmark(args.clientes, args.requisicoes, args.raiz)
+    else:
+        servidor = ServidorAssets((args.host, args.porta), RegistroAssets(args.raiz), args.verboso)
+        print(f"Servindo {', '.join(PASTAS_SERVIDAS)} em http://{args.host}:{servidor.server_address[1]}/")
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            servidor.server_close()
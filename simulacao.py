@@ -0,0 +1,139 @@
+"""
+Simulação Headless do Algoritmo Evolutivo
+=========================================
+
+Este módulo executa o algoritmo evolutivo sem interface gráfica, trocando o humano por um
+oráculo sintético de notas. Serve para medir quantas avaliações humanas cada modo do
+algoritmo precisa até mostrar um meme realmente bom.
+
+Funcionalidades principais:
+- Oráculo sintético com preferência oculta sobre os embeddings de imagem e áudio
+- Contagem de avaliações até atingir um meme acima de um percentil alvo
+- Comparação entre o modo geracional e o modo de estado estacionário
+
+Uso:
+    python simulacao.py --execucoes 20 --max-avaliacoes 200
+"""
+
+import argparse
+
+import numpy as np
+
+import evolutivo
+from telemetria import Telemetria
+
+class OraculoSintetico:
+    """
+    Dá notas de 1 a 10 a partir de uma preferência oculta: um termo por modalidade (projeção
+    dos embeddings em uma direção aleatória) mais um termo de interação entre imagem e áudio.
+    A nota é o percentil do valor verdadeiro entre pares aleatórios, com ruído gaussiano.
+    """
+
+    def __init__(self, emb_imagens, emb_audios, semente=0, ruido=0.5, prob_pular=0.0, dim_interacao=8):
+        rng = np.random.default_rng(semente)
+        self.rng = rng
+        self.ruido = ruido
+        self.prob_pular = prob_pular
+
+        def _padronizar(x):
+            return (x - x.mean()) / (x.std() + 1e-12)
+
+        self.termo_imagem = _padronizar(emb_imagens @ rng.normal(size=emb_imagens.shape[1]))
+        self.termo_audio = _padronizar(emb_audios @ rng.normal(size=emb_audios.shape[1]))
+        fatores_img = emb_imagens @ rng.normal(size=(emb_imagens.shape[1], dim_interacao))
+        fatores_aud = emb_audios @ rng.normal(size=(emb_audios.shape[1], dim_interacao))
+        self.fatores_img = (fatores_img - fatores_img.mean(0)) / (fatores_img.std(0) + 1e-12)
+        self.fatores_aud = (fatores_aud - fatores_aud.mean(0)) / (fatores_aud.std(0) + 1e-12)
+        self.dim_interacao = dim_interacao
+
+        # Distribuição do valor verdadeiro estimada em uma amostra de pares aleatórios
+        amostra_img = rng.integers(len(emb_imagens), size=20000)
+        amostra_aud = rng.integers(len(emb_audios), size=20000)
+        self._referencia = np.sort(self.valor_verdadeiro(amostra_img, amostra_aud))
+
+    def valor_verdadeiro(self, img_idx, aud_idx):
+        interacao = np.sum(self.fatores_img[img_idx] * self.fatores_aud[aud_idx], axis=-1)
+        return self.termo_imagem[img_idx] + self.termo_audio[aud_idx] + interacao / np.sqrt(self.dim_interacao)
+
+    def percentil(self, img_idx, aud_idx):
+        valor = self.valor_verdadeiro(img_idx, aud_idx)
+        return np.searchsorted(self._referencia, valor) / len(self._referencia)
+
+    def nota(self, img_idx, aud_idx):
+        if self.prob_pular and self.rng.random() < self.prob_pular:
+            return None
+        bruta = 1 + 9 * self.percentil(img_idx, aud_idx) + self.rng.normal(0, self.ruido)
+        return int(np.clip(round(bruta), 1, 10))
+
+class AvaliadorSimulado:
+    """Adapta o oráculo à assinatura avaliar(img_idx, aud_idx, top3) e mede o progresso"""
+
+    def __init__(self, oraculo, percentil_alvo=0.99, max_avaliacoes=None):
+        self.oraculo = oraculo
+        self.percentil_alvo = percentil_alvo
+        self.max_avaliacoes = max_avaliacoes
+        self.avaliacoes = 0
+        self.avaliacoes_ate_alvo = None
+        self.melhor_percentil = 0.0
+
+    def __call__(self, img_idx, aud_idx, top3_memes):
+        if self.max_avaliacoes is not None and self.avaliacoes >= self.max_avaliacoes:
+            return None, True
+        self.avaliacoes += 1
+        percentil = self.oraculo.percentil(img_idx, aud_idx)
+        self.melhor_percentil = max(self.melhor_percentil, percentil)
+        if self.avaliacoes_ate_alvo is None and percentil >= self.percentil_alvo:
+            self.avaliacoes_ate_alvo = self.avaliacoes
+        return self.oraculo.nota(img_idx, aud_idx), False
+
+def simular(modo, semente, max_avaliacoes=200, percentil_alvo=0.99, ruido=0.5, **parametros):
+    """
+    Executa uma sessão headless e retorna um dicionário com as métricas da execução.
+    Os parâmetros extras são repassados à SessaoEvolutiva (ex.: tam_populacao=20).
+    """
+    # Silenciar o loop e não misturar as execuções simuladas com a telemetria real
+    parametros = {'verboso': False, 'modo_pipeline': False, **parametros}
+    sessao = evolutivo.SessaoEvolutiva(semente=semente, telemetria=Telemetria(ativa=False),
+                                       modo_evolucao=modo, **parametros)
+
+    catalogo = sessao.catalogo
+    oraculo = OraculoSintetico(catalogo.emb_imagens, catalogo.emb_audios, semente=semente, ruido=ruido)
+    avaliador = AvaliadorSimulado(oraculo, percentil_alvo, max_avaliacoes)
+    _, fitness_history, _ = sessao.executar(avaliador, max_avaliacoes=max_avaliacoes)
+
+    return {
+        'modo': modo,
+        'semente': semente,
+        'avaliacoes': avaliador.avaliacoes,
+        'avaliacoes_ate_alvo': avaliador.avaliacoes_ate_alvo,
+        'melhor_percentil': avaliador.melhor_percentil,
+        'fitness_final': fitness_history[-1] if fitness_history else None,
+        'taxa_acerto_cache': sessao.cache_busca.taxa_acerto,
+    }
+
+def comparar_modos(execucoes=10, max_avaliacoes=200, percentil_alvo=0.99, ruido=0.5, **parametros):
+    resumo = {}
+    for modo in ("geracional", "estacionario"):
+        resultados = [simular(modo, s, max_avaliacoes, percentil_alvo, ruido, **parametros) for s in range(execucoes)]
+        ate_alvo = [r['avaliacoes_ate_alvo'] for r in resultados if r['avaliacoes_ate_alvo'] is not None]
+        resumo[modo] = {
+            'execucoes': execucoes,
+            'atingiram_alvo': len(ate_alvo),
+            'mediana_avaliacoes_ate_alvo': float(np.median(ate_alvo)) if ate_alvo else None,
+            'media_melhor_percentil': float(np.mean([r['melhor_percentil'] for r in resultados])),
+        }
+    return resumo
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara os modos do algoritmo com um oráculo sintético")
+    parser.add_argument("--execucoes", type=int, default=10)
+    parser.add_argument("--max-avaliacoes", type=int, default=200)
+    parser.add_argument("--percentil-alvo", type=float, default=0.99)
+    parser.add_argument("--ruido", type=float, default=0.5)
+    args = parser.parse_args()
+
+    resumo = comparar_modos(args.execucoes, args.max_avaliacoes, args.percentil_alvo, args.ruido)
+    for modo, metricas in resumo.items():
+        print(f"\n=== {modo} ===")
+        for chave, valor in metricas.items():
+            print(f"{chave}: {valor}")
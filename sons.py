@@ -7,59 +7,49 @@ com Selenium. Permite baixar sons em lote para uso no sistema de memes evolutivo
 
 Funcionalidades:
 - Navegação automática no site Myinstants
-- Scroll automático para carregar mais resultados
+- Scroll automático para carregar mais resultados, com espera adaptativa (via rolagem.py)
 - Download automático de arquivos MP3
+- Modo HTTP: extrai os links MP3 do HTML e baixa em paralelo, sem abrir cada página no Chrome
 - Organização automática em pasta de destino
 
 Nota: Este script é opcional e usado apenas para coletar o dataset inicial de áudios.
 """
 
+import hashlib
 import os
+import re
 import time
+from urllib.parse import urljoin, urlsplit, unquote
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
+from selenium.common.exceptions import TimeoutException
+from baixador import BaixadorHTTP
+from rolagem import colher_com_rolagem
 
-def coletar_urls_com_scroll(driver, url_pagina_lista, total_desejado):
+# Caminhos de MP3 aparecem no onclick dos botões de play e no link "Baixar MP3"
+PADRAO_MP3 = re.compile(r"""(?:play\(\s*['"]|href=['"])([^'"]+?\.mp3)['"]""", re.IGNORECASE)
+# Na listagem cada som é um <div class="instant"> com o botão de play e o link para a página do som
+PADRAO_BLOCO_SOM = re.compile(r"""<div\b[^>]*\bclass=['"](?:[^'"]*\s)?instant(?:\s[^'"]*)?['"]""", re.IGNORECASE)
+PADRAO_LINK_SOM = re.compile(r"""<a\b[^>]*\bclass=['"][^'"]*\binstant-link\b[^>]*>""", re.IGNORECASE)
+PADRAO_HREF = re.compile(r"""\bhref=['"]([^'"]+)['"]""", re.IGNORECASE)
+
+def coletar_urls_com_scroll(driver, url_pagina_lista, total_desejado, tempo_sem_progresso=10):
     """
     Coleta as URLs de sons em uma página de listagem, rolando para carregar mais conteúdo.
+    A espera após cada rolagem termina assim que novos sons aparecem.
     """
     driver.get(url_pagina_lista)
     print(f"Iniciando a coleta de até {total_desejado} URLs...")
     
-    urls_coletadas = set()
-    scroll_count = 0
-    
-    while len(urls_coletadas) < total_desejado:
-        try:
-            elementos_links = driver.find_elements(By.CLASS_NAME, "instant-link")
-            for elemento in elementos_links:
-                href = elemento.get_attribute("href")
-                if href:
-                    urls_coletadas.add(href)
-        except StaleElementReferenceException:
-            print("Elemento obsoleto, tentando novamente...")
-            continue
-        
-        print(f"URLs encontradas: {len(urls_coletadas)} de {total_desejado}")
-        
-        if len(urls_coletadas) >= total_desejado:
-            break
-            
-        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(3) 
-        
-        scroll_count += 1
-        if scroll_count > 50 and len(urls_coletadas) < 100:
-             print("Aviso: Rolagem excessiva sem encontrar novos elementos. Finalizando.")
-             break
+    urls_coletadas = colher_com_rolagem(driver, '.instant-link', 'href', total_desejado,
+                                        tempo_sem_progresso=tempo_sem_progresso)
 
     print(f"Coleta finalizada. Total de URLs únicas encontradas: {len(urls_coletadas)}")
-    return list(urls_coletadas)
+    return urls_coletadas
 
 def baixar_som_myinstants(driver, url_som):
     """
@@ -90,10 +80,88 @@ def baixar_som_myinstants(driver, url_som):
     except (TimeoutException, Exception) as e:
         print(f"Ocorreu um erro ao processar {url_som}: {e}")
 
+def extrair_urls_mp3(html, url_base):
+    """Retorna as URLs absolutas de MP3 encontradas no HTML, na ordem em que aparecem"""
+    urls = []
+    vistas = set()
+    for caminho in PADRAO_MP3.findall(html):
+        url = urljoin(url_base, caminho)
+        if url not in vistas:
+            vistas.add(url)
+            urls.append(url)
+    return urls
+
+def mp3_por_pagina(html, url_base):
+    """
+    Associa a URL da página de cada som da listagem ao MP3 do mesmo bloco. Blocos sem link
+    para a página ou sem MP3 ficam de fora.
+    """
+    associados = {}
+    for bloco in PADRAO_BLOCO_SOM.split(html)[1:]:
+        link = PADRAO_LINK_SOM.search(bloco)
+        href = PADRAO_HREF.search(link.group(0)) if link else None
+        mp3 = PADRAO_MP3.search(bloco)
+        if href and mp3:
+            associados.setdefault(urljoin(url_base, href.group(1)), urljoin(url_base, mp3.group(1)))
+    return associados
+
+def mp3_da_pagina(html, url_som):
+    """URL do MP3 na página de um som (ou None)"""
+    if html is None:
+        return None
+    urls = extrair_urls_mp3(html, url_som)
+    return urls[0] if urls else None
+
+def verificar_mp3(caminho):
+    """Confere se o arquivo começa com uma tag ID3 ou com um cabeçalho de quadro MPEG"""
+    with open(caminho, 'rb') as f:
+        cabecalho = f.read(3)
+    if cabecalho == b'ID3':
+        return True
+    return len(cabecalho) >= 2 and cabecalho[0] == 0xFF and (cabecalho[1] & 0xE0) == 0xE0
+
+def nome_arquivo_mp3(url_mp3):
+    """Nome do arquivo na URL com um sufixo do hash da URL: URLs diferentes com o mesmo nome não se sobrescrevem"""
+    base, extensao = os.path.splitext(unquote(os.path.basename(urlsplit(url_mp3).path)))
+    return f"{base}_{hashlib.sha1(url_mp3.encode('utf-8')).hexdigest()[:8]}{extensao or '.mp3'}"
+
+def baixar_sons_via_http(urls_paginas, caminho_destino, html_listagem=None, url_listagem=None,
+                         max_workers=16, max_por_host=8, intervalo_por_host=0.05):
+    """
+    Baixa os sons sem Selenium: o MP3 de cada página de urls_paginas vem do bloco da
+    listagem que aponta para ela, e as páginas que a listagem não associa a um MP3 são abertas
+    com HTTP simples, em paralelo e com os mesmos limites por host dos downloads, só para
+    extrair o link do MP3. Os arquivos concluídos são verificados (tamanho e cabeçalho MP3) e
+    registrados no manifesto para retomada.
+    """
+    baixador = BaixadorHTTP(caminho_destino, max_workers=max_workers, max_por_host=max_por_host,
+                            intervalo_por_host=intervalo_por_host, verificar=verificar_mp3)
+
+    mp3_das_paginas = mp3_por_pagina(html_listagem, url_listagem) if html_listagem else {}
+    pendentes = [url for url in urls_paginas if url not in mp3_das_paginas]
+    if pendentes:
+        # A listagem não associou essas páginas a um MP3: resolver abrindo cada uma
+        for url_pagina, html in zip(pendentes, baixador.obter_textos(pendentes)):
+            url = mp3_da_pagina(html, url_pagina)
+            if url:
+                mp3_das_paginas[url_pagina] = url
+
+    urls_mp3 = []
+    for url_pagina in urls_paginas:
+        url = mp3_das_paginas.get(url_pagina)
+        if url and url not in urls_mp3:
+            urls_mp3.append(url)
+    print(f"{len(urls_mp3)} arquivos MP3 encontrados para {len(urls_paginas)} páginas")
+    # URLs já registradas no manifesto mantêm o nome com que foram baixadas
+    itens = [(url, baixador.manifesto.get(url, {}).get('arquivo') or nome_arquivo_mp3(url)) for url in urls_mp3]
+    return baixador.baixar(itens)
+
 # --- Exemplo de uso ---
 if __name__ == "__main__":
     URL_PAGINA_INICIAL = "https://www.myinstants.com/pt/index/br/"
     TOTAL_SONS_DESEJADO = 500
+    # "http" baixa os MP3 diretamente; "selenium" clica em "Baixar MP3" em cada página
+    MODO_DOWNLOAD = "http"
 
     CAMINHO_DESTINO = os.path.join(os.getcwd(), "downloads_myinstants")
     
@@ -117,13 +185,23 @@ if __name__ == "__main__":
         lista_de_urls = coletar_urls_com_scroll(driver, URL_PAGINA_INICIAL, TOTAL_SONS_DESEJADO)
         
         print(f"\nIniciando o download de até {TOTAL_SONS_DESEJADO} sons.")
-        print(lista_de_urls)
-        for i, url in enumerate(lista_de_urls):
-            if i >= TOTAL_SONS_DESEJADO:
-                break
-            baixar_som_myinstants(driver, url)
+        if MODO_DOWNLOAD == "http":
+            html_listagem = driver.page_source
+            # O navegador só é necessário para a rolagem
+            driver.quit()
+            driver = None
+            resumo = baixar_sons_via_http(lista_de_urls[:TOTAL_SONS_DESEJADO], CAMINHO_DESTINO,
+                                          html_listagem, URL_PAGINA_INICIAL)
+            print(f"Resumo: {resumo}")
+        else:
+            print(lista_de_urls)
+            for i, url in enumerate(lista_de_urls):
+                if i >= TOTAL_SONS_DESEJADO:
+                    break
+                baixar_som_myinstants(driver, url)
             
         print("\nTodos os downloads foram processados. Verifique a pasta de destino.")
             
     finally:
-        driver.quit()
\ No newline at end of file
+        if driver is not None:
+            driver.quit()
\ No newline at end of file
@@ -0,0 +1,98 @@
+"""
+Telemetria do Loop Evolutivo
+============================
+
+Este módulo coleta métricas estruturadas de cada geração do algoritmo evolutivo e as grava
+como linhas JSON em um arquivo local. O objetivo é descobrir se o gargalo de vazão está no
+motor (busca de vizinhos, cruzamento, mutação) ou no humano que avalia os memes, e acompanhar
+essa relação entre versões.
+
+Funcionalidades principais:
+- Acúmulo de tempo por etapa com time.perf_counter (custo de poucos microssegundos)
+- Latência de avaliação humana por meme
+- Registro de uma linha JSON por geração com tempos, cache, taxa de mutação e fitness
+- Medição do próprio custo da telemetria, gravado junto com as demais métricas
+- Identificador da sessão em cada registro, para separar sessões que gravam no mesmo arquivo
+"""
+
+import json
+import time
+from contextlib import contextmanager
+
+class Telemetria:
+    def __init__(self, caminho="telemetria.jsonl", ativa=True, sessao=None):
+        self.caminho = caminho
+        self.ativa = ativa
+        self.sessao = sessao
+        self._reiniciar()
+
+    def _reiniciar(self):
+        self.tempos = {}
+        self.latencias_avaliacao = []
+        self.custo_proprio = 0.0
+        self._inicio_geracao = time.perf_counter()
+
+    def acumular(self, etapa, segundos):
+        """Soma um intervalo já medido ao total da etapa (uso em trechos quentes)"""
+        self.tempos[etapa] = self.tempos.get(etapa, 0.0) + segundos
+
+    @contextmanager
+    def medir(self, etapa):
+        """Mede o tempo gasto dentro do bloco e acumula na etapa informada"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.acumular(etapa, time.perf_counter() - inicio)
+
+    def incorporar(self, outra):
+        """Soma aos totais desta telemetria os tempos acumulados em outra (ex.: trabalho em outra thread)"""
+        for etapa, segundos in outra.tempos.items():
+            self.acumular(etapa, segundos)
+
+    def registrar_avaliacao(self, segundos):
+        """Registra quanto tempo o humano levou para avaliar um meme"""
+        self.latencias_avaliacao.append(segundos)
+
+    def registrar_geracao(self, geracao, notas, quant_repet, taxa_mutacao, **extras):
+        """Grava uma linha JSON com as métricas da geração e zera os acumuladores"""
+        inicio = time.perf_counter()
+        if self.ativa:
+            latencias = sorted(self.latencias_avaliacao)
+            tempo_humano = sum(latencias)
+            # As etapas podem ser aninhadas, então o tempo do motor é o que sobra da geração
+            tempo_motor = (inicio - self._inicio_geracao) - tempo_humano
+            registro = {
+                'timestamp': time.time(),
+                'sessao': self.sessao,
+                'geracao': geracao,
+                'duracao_geracao': inicio - self._inicio_geracao,
+                'tempos': {etapa: round(t, 6) for etapa, t in self.tempos.items()},
+                'tempo_motor': round(tempo_motor, 6),
+                'tempo_humano': round(tempo_humano, 6),
+                'avaliacao': {
+                    'quantidade': len(latencias),
+                    'media': tempo_humano / len(latencias) if latencias else None,
+                    'mediana': latencias[len(latencias) // 2] if latencias else None,
+                    'maxima': latencias[-1] if latencias else None,
+                },
+                'quant_repet': quant_repet,
+                'taxa_mutacao': taxa_mutacao,
+                'fitness': {
+                    'media': sum(notas) / len(notas) if notas else None,
+                    'maximo': max(notas) if notas else None,
+                    'minimo': min(notas) if notas else None,
+                    'quantidade': len(notas),
+                },
+                'custo_telemetria': round(self.custo_proprio, 6),
+            }
+            registro.update(extras)
+            try:
+                with open(self.caminho, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(registro) + "\n")
+            except OSError as e:
+                print(f"Erro ao gravar telemetria em {self.caminho}: {e}")
+        custo = time.perf_counter() - inicio
+        self._reiniciar()
+        # O custo da gravação entra no registro da próxima geração
+        self.custo_proprio = custo
@@ -0,0 +1,178 @@
+"""
+Varredura de Parâmetros do Algoritmo Evolutivo
+==============================================
+
+Executa o algoritmo com o oráculo sintético de simulacao.py para muitas combinações de
+parâmetros e muitas sementes, em um pool de processos, e resume quantas avaliações cada
+configuração precisa até mostrar um meme acima do percentil alvo.
+
+Funcionalidades principais:
+- Grade completa (--grade) ou amostras aleatórias (--amostras) dos parâmetros de ajuste
+- Sementes determinísticas por execução, derivadas de (semente base, índice da execução)
+  com numpy.random.SeedSequence: a mesma execução de configurações diferentes enfrenta o
+  mesmo oráculo, o que reduz a variância da comparação
+- Workers anexam o catálogo publicado em memória compartilhada (catalogo_compartilhado.py)
+- Tabela resumo ordenada e CSV com o resultado de cada execução
+
+Uso:
+    python varredura.py --grade tam_populacao=6,10,16 taxa_mutacao_inicial=0.1,0.2,0.3 --execucoes 32
+    python varredura.py --amostras 200 --execucoes 16 --workers 32
+"""
+
+import argparse
+import itertools
+import os
+import time
+
+# Um processo por núcleo: cada worker usa uma thread de BLAS (antes de importar o numpy)
+for _variavel in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+    os.environ.setdefault(_variavel, "1")
+
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+import simulacao
+from catalogo_compartilhado import publicar_catalogo, iniciar_worker
+
+# Intervalos das amostras aleatórias: (mínimo, máximo, inteiro)
+ESPACO_PADRAO = {
+    'tam_populacao': (4, 20, True),
+    'incremento_mutacao': (0.0, 0.1, False),
+    'taxa_mutacao_inicial': (0.05, 0.5, False),
+    'taxa_mutacao_maxima': (0.2, 0.8, False),
+    'limite_geracoes_estagnacao': (1, 6, True),
+}
+# incremento_mutacao e limite_geracoes_estagnacao só agem sem o controle de diversidade, então
+# as amostras padrão o desligam explicitamente
+FIXOS_PADRAO = {'controle_diversidade': False}
+ARQUIVO_SAIDA = "varredura_resultados.csv"
+
+def grade(valores):
+    """Todas as combinações de {parametro: [valores]}"""
+    nomes = list(valores)
+    return [dict(zip(nomes, combinacao)) for combinacao in itertools.product(*(valores[n] for n in nomes))]
+
+def amostras(quantidade, espaco=ESPACO_PADRAO, semente=0, fixos=FIXOS_PADRAO):
+    """Configurações sorteadas uniformemente em cada intervalo do espaço, mais os parâmetros fixos"""
+    rng = np.random.default_rng(semente)
+    configuracoes = []
+    for _ in range(quantidade):
+        configuracao = dict(fixos)
+        for nome, (minimo, maximo, inteiro) in espaco.items():
+            if inteiro:
+                configuracao[nome] = int(rng.integers(minimo, maximo + 1))
+            else:
+                configuracao[nome] = round(float(rng.uniform(minimo, maximo)), 4)
+        # A taxa máxima nunca fica abaixo da inicial
+        if 'taxa_mutacao_inicial' in configuracao and 'taxa_mutacao_maxima' in configuracao:
+            configuracao['taxa_mutacao_maxima'] = max(configuracao['taxa_mutacao_maxima'],
+                                                      configuracao['taxa_mutacao_inicial'])
+        configuracoes.append(configuracao)
+    return configuracoes
+
+def semente_execucao(semente_base, execucao):
+    """Semente da execução, independente da configuração e da ordem em que as tarefas rodam"""
+    return int(np.random.SeedSequence([semente_base, execucao]).generate_state(1)[0])
+
+def _executar(tarefa):
+    indice, configuracao, execucao, semente, opcoes = tarefa
+    inicio = time.perf_counter()
+    parametros = dict(configuracao)
+    modo = parametros.pop('modo_evolucao', opcoes['modo'])
+    resultado = simulacao.simular(modo, semente, opcoes['max_avaliacoes'], opcoes['percentil_alvo'],
+                                  opcoes['ruido'], **parametros)
+    resultado.update(configuracao=indice, execucao=execucao, segundos=time.perf_counter() - inicio, **configuracao)
+    return resultado
+
+def executar_varredura(configuracoes, execucoes=16, modo="geracional", max_avaliacoes=200, percentil_alvo=0.99,
+                       ruido=0.5, semente_base=0, workers=None):
+    """
+    Roda cada configuração com `execucoes` sementes e retorna um DataFrame com uma linha por
+    execução. Os parâmetros de cada configuração são repassados à SessaoEvolutiva.
+    """
+    opcoes = {'modo': modo, 'max_avaliacoes': max_avaliacoes, 'percentil_alvo': percentil_alvo, 'ruido': ruido}
+    tarefas = [(indice, configuracao, execucao, semente_execucao(semente_base, execucao), opcoes)
+               for execucao in range(execucoes) for indice, configuracao in enumerate(configuracoes)]
+    workers = workers or os.cpu_count()
+    with publicar_catalogo() as publicado, \
+            ProcessPoolExecutor(workers, initializer=iniciar_worker, initargs=(publicado.descritor,)) as executor:
+        chunksize = max(1, len(tarefas) // (workers * 8))
+        resultados = list(executor.map(_executar, tarefas, chunksize=chunksize))
+    return pd.DataFrame(resultados)
+
+def resumir(resultados, max_avaliacoes=200):
+    """
+    Uma linha por configuração. Execuções que não atingiram o alvo contam como infinitas na
+    mediana de avaliações, então ela só é finita se mais da metade atingiu o alvo.
+    """
+    parametros = [c for c in resultados.columns if c not in (
+        'modo', 'semente', 'avaliacoes', 'avaliacoes_ate_alvo', 'melhor_percentil', 'fitness_final',
+        'taxa_acerto_cache', 'configuracao', 'execucao', 'segundos')]
+    linhas = []
+    for indice, grupo in resultados.groupby('configuracao'):
+        ate_alvo = grupo['avaliacoes_ate_alvo'].astype(float).fillna(np.inf)
+        linha = {'configuracao': indice, **grupo.iloc[0][parametros].to_dict()}
+        linha.update({
+            'execucoes': len(grupo),
+            'atingiram_alvo': int(np.isfinite(ate_alvo).sum()),
+            'mediana_ate_alvo': float(np.median(ate_alvo)),
+            # Média com as falhas contadas como o orçamento inteiro (limite inferior do custo)
+            'media_ate_alvo_limitada': float(np.minimum(ate_alvo, max_avaliacoes).mean()),
+            'media_melhor_percentil': float(grupo['melhor_percentil'].mean()),
+            'media_fitness_final': float(grupo['fitness_final'].astype(float).mean()),
+        })
+        linhas.append(linha)
+    resumo = pd.DataFrame(linhas)
+    return resumo.sort_values(['mediana_ate_alvo', 'media_ate_alvo_limitada', 'media_melhor_percentil'],
+                              ascending=[True, True, False]).reset_index(drop=True)
+
+def _valores_grade(especificacoes):
+    """Converte ['tam_populacao=6,10', 'modo_evolucao=geracional,estacionario'] em listas de valores"""
+    valores = {}
+    for especificacao in especificacoes:
+        nome, _, lista = especificacao.partition('=')
+        if not lista:
+            raise ValueError(f"Esperado parametro=v1,v2,... e não {especificacao!r}")
+        convertidos = []
+        for texto in lista.split(','):
+            for tipo in (int, float):
+                try:
+                    convertidos.append(tipo(texto))
+                    break
+                except ValueError:
+                    pass
+            else:
+                convertidos.append({'True': True, 'False': False}.get(texto, texto))
+        valores[nome] = convertidos
+    return valores
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Varredura de parâmetros do algoritmo evolutivo com o oráculo sintético")
+    grupo = parser.add_mutually_exclusive_group(required=True)
+    grupo.add_argument("--grade", nargs='+', metavar="PARAMETRO=V1,V2", help="valores de cada parâmetro")
+    grupo.add_argument("--amostras", type=int, help="quantidade de configurações aleatórias")
+    parser.add_argument("--execucoes", type=int, default=16, help="sementes por configuração")
+    parser.add_argument("--modo", default="geracional", choices=("geracional", "estacionario"))
+    parser.add_argument("--max-avaliacoes", type=int, default=200)
+    parser.add_argument("--percentil-alvo", type=float, default=0.99)
+    parser.add_argument("--ruido", type=float, default=0.5)
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--saida", default=ARQUIVO_SAIDA, help="CSV com o resultado de cada execução")
+    parser.add_argument("--top", type=int, default=20, help="linhas da tabela resumo")
+    args = parser.parse_args()
+
+    if args.grade:
+        configuracoes = grade(_valores_grade(args.grade))
+    else:
+        configuracoes = amostras(args.amostras, semente=args.semente)
+
+    inicio = time.perf_counter()
+    resultados = executar_varredura(configuracoes, args.execucoes, args.modo, args.max_avaliacoes,
+                                    args.percentil_alvo, args.ruido, args.semente, args.workers)
+    resultados.to_csv(args.saida, index=False)
+    print(f"{len(configuracoes)} configurações x {args.execucoes} execuções em "
+          f"{time.perf_counter() - inicio:.1f}s, resultados em {args.saida}\n")
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print(resumir(resultados, args.max_avaliacoes).head(args.top).to_string(index=False))